@@ -0,0 +1,223 @@
+"""
+SubStudio micro-benchmarks.
+
+    python benchmark.py cues [--cues 10000] [--repeat 5]
+    python benchmark.py workers --media film.mkv [--model small] [--workers 1,2,4,8] [--threads 32]
+    python benchmark.py profiles --media clip1.mkv clip2.mkv [--model small] [--profiles fast,balanced,accurate]
+"""
+import os
+import re
+import time
+import random
+import argparse
+from datetime import timedelta
+from typing import Callable, Dict, List
+
+from core.cues import CueList
+
+# --- CUES: legacy string pipeline vs CueList ---
+
+_WORDS = "the a ship north storm we must reach shore before night falls brother king raven".split()
+
+def make_srt(n_cues: int, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    blocks, t = [], 0
+    for i in range(1, n_cues + 1):
+        start, t = t, t + rng.randint(800, 4000)
+        text = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(3, 18)))
+        fmt = lambda ms: f"{ms // 3600000:02}:{ms // 60000 % 60:02}:{ms // 1000 % 60:02},{ms % 1000:03}"
+        blocks.append(f"{i}\n{fmt(start)} --> {fmt(t)}\n{text}\n")
+        t += rng.randint(0, 1500)
+    return "\n".join(blocks)
+
+def _legacy_split(line: str, max_chars: int) -> str:
+    if len(line) > max_chars:
+        mid = len(line) // 2
+        space_indices = [i for i, char in enumerate(line) if char == ' ']
+        if space_indices:
+            best_space = min(space_indices, key=lambda x: abs(x - mid))
+            line = line[:best_space] + '\n' + line[best_space + 1:]
+    return line
+
+def legacy_pipeline(srt_text: str, offset: float, duration: float) -> str:
+    """The pre-CueList path: offset regex + timedelta, block split, wrap regex, mux regex."""
+    def add_offset(ts: str) -> str:
+        h, m, s_ms = ts.split(':')
+        s, ms = s_ms.split(',')
+        td = timedelta(hours=int(h), minutes=int(m), seconds=int(s), milliseconds=int(ms)) + timedelta(seconds=offset)
+        if td.total_seconds() < 0:
+            td = timedelta(0)
+        total = int(td.total_seconds())
+        return f"{total // 3600:02}:{(total % 3600) // 60:02}:{total % 60:02},{int(td.microseconds / 1000):03}"
+
+    ts_re = re.compile(r'(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})')
+    srt_text = ts_re.sub(lambda m: f"{add_offset(m.group(1))} --> {add_offset(m.group(2))}", srt_text)
+
+    # Translator: split into blocks and reassemble (identity translation)
+    out = []
+    for block in [b for b in srt_text.strip().split('\n\n') if b.strip()]:
+        lines = block.strip().split('\n')
+        out.append(f"{lines[0].strip()}\n{lines[1].strip()}\n" + '\n'.join(lines[2:]).strip())
+    srt_text = "\n\n".join(out)
+
+    # Orchestrator line wrapping
+    block_re = re.compile(r"(\d+)\n(\d{2}:\d{2}:\d{2},\d{3} --> \d{2}:\d{2}:\d{2},\d{3})\n([\s\S]*?)(?:\n\n|\Z)")
+    srt_text = block_re.sub(
+        lambda m: f"{m.group(1)}\n{m.group(2)}\n" + '\n'.join(_legacy_split(l, 50) for l in m.group(3).strip().split('\n')) + "\n\n",
+        srt_text
+    )
+
+    # Muxer clipping + wrapping
+    mux_re = re.compile(r"(\d+)\n(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})\n([\s\S]*?)(?:\n\n|\Z)")
+    blocks = []
+    for m in mux_re.finditer(srt_text):
+        index, start, end, text = m.groups()
+        h, mi, s_ms = start.split(':')
+        s, ms = s_ms.split(',')
+        if int(h) * 3600 + int(mi) * 60 + int(s) + int(ms) / 1000 >= duration:
+            continue
+        clean = '\n'.join(_legacy_split(l, 55) for l in text.strip().split('\n'))
+        blocks.append(f"{index}\n{start} --> {end}\n{clean}")
+    return "\n\n".join(blocks) + "\n\n"
+
+def cuelist_pipeline(srt_text: str, offset: float, duration: float) -> str:
+    cues = CueList.parse_srt(srt_text).shift(offset)
+    cues = cues.with_texts(list(cues.texts)).wrap_lines(50)
+    return cues.clip(duration).wrap_lines(55).to_srt()
+
+def _best_of(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def bench_cues(args: argparse.Namespace):
+    srt_text = make_srt(args.cues)
+    duration = CueList.parse_srt(srt_text).ends[-1] / 1000 * 0.9
+    timings: Dict[str, float] = {
+        "legacy": _best_of(lambda: legacy_pipeline(srt_text, 1.5, duration), args.repeat),
+        "cuelist": _best_of(lambda: cuelist_pipeline(srt_text, 1.5, duration), args.repeat),
+    }
+    for name, secs in timings.items():
+        print(f"{name:>8}: {secs * 1000:8.1f} ms  ({args.cues} cues, offset + translate pass + wrap + clip)")
+    print(f" speedup: {timings['legacy'] / timings['cuelist']:.1f}x")
+
+# --- WORKERS: chunked parallel transcription vs one inference stream ---
+
+def bench_workers(args: argparse.Namespace):
+    """Real-time factor (processing seconds per audio second) as the worker count grows."""
+    from faster_whisper import WhisperModel
+    from core.parallel_transcribe import ChunkedTranscriber
+    from core.transcriber import VideoTranscriber
+
+    transcriber = VideoTranscriber(args.model)
+    # Decode once up front so every run sees the same samples and only inference is timed
+    windows = list(transcriber.iter_audio_windows(args.media))
+    duration = sum(len(samples) for _, samples in windows) / 16000
+    decoding = dict(transcriber.decoding)
+    print(f"{args.media}: {duration:.0f}s of audio, model [{args.model}], {args.threads} threads in total")
+
+    model = WhisperModel(args.model, device="cpu", compute_type="int8", cpu_threads=args.threads)
+    started = time.perf_counter()
+    segments = 0
+    for offset, samples in windows:
+        result, _ = model.transcribe(samples, **decoding)
+        segments += sum(1 for _ in result)
+    baseline = time.perf_counter() - started
+    del model
+    print(f"{'single':>8}: RTF {baseline / duration:.3f}  ({baseline:.1f}s, {segments} segments)")
+
+    counts: List[int] = [int(c) for c in args.workers.split(",")]
+    for count in counts:
+        chunked = ChunkedTranscriber(workers=count, cpu_threads=args.threads, chunk_seconds=args.chunk)
+        try:
+            chunked.warm_up(args.model)
+            started = time.perf_counter()
+            result = chunked.transcribe(windows, args.model, None, decoding)
+            elapsed = time.perf_counter() - started
+        finally:
+            chunked.shutdown()
+        print(
+            f"{count:>6} w: RTF {elapsed / duration:.3f}  ({elapsed:.1f}s, {len(result)} segments, "
+            f"{chunked.threads_per_worker} threads/worker, {baseline / elapsed:.1f}x)"
+        )
+
+# --- PROFILES: decoding speed vs quality on reference clips ---
+
+def word_error_rate(reference: str, hypothesis: str) -> float:
+    """Word-level Levenshtein distance over the reference length (case and punctuation ignored)."""
+    clean = lambda text: re.sub(r"[^\w\s']", " ", text.lower()).split()
+    ref, hyp = clean(reference), clean(hypothesis)
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    row = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        prev, row[0] = row[0], i
+        for j, h in enumerate(hyp, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (r != h))
+    return row[-1] / len(ref)
+
+def bench_profiles(args: argparse.Namespace):
+    """
+    Real-time factor and segment count of each decoding profile on every clip. When a
+    clip has a same-named .srt next to it, it is used as the reference for a word error rate.
+    """
+    from faster_whisper import WhisperModel
+    from core.transcriber import DECODING_PROFILES, VideoTranscriber
+
+    transcriber = VideoTranscriber(args.model)
+    model = WhisperModel(args.model, device="cpu", compute_type="int8")
+    profiles = args.profiles.split(",")
+    print(f"model [{args.model}]; RTF = processing seconds per audio second (lower is faster)")
+
+    for media in args.media:
+        windows = list(transcriber.iter_audio_windows(media))
+        duration = sum(len(samples) for _, samples in windows) / 16000
+        reference_path = os.path.splitext(media)[0] + ".srt"
+        reference = None
+        if os.path.exists(reference_path):
+            with open(reference_path, "r", encoding="utf-8", errors="ignore") as f:
+                reference = " ".join(CueList.parse_srt(f.read()).texts)
+        print(f"\n{os.path.basename(media)}: {duration:.0f}s of audio{' (reference: ' + os.path.basename(reference_path) + ')' if reference else ''}")
+
+        for name in profiles:
+            decoding = DECODING_PROFILES[name]
+            started = time.perf_counter()
+            texts: List[str] = []
+            for _, samples in windows:
+                segments, _ = model.transcribe(samples, **decoding)
+                texts.extend(s.text.strip() for s in segments if s.text.strip())
+            elapsed = time.perf_counter() - started
+            wer = f", WER {word_error_rate(reference, ' '.join(texts)):.1%}" if reference else ""
+            print(f"{name:>9}: RTF {elapsed / duration:.3f}  ({elapsed:.1f}s, {len(texts)} segments{wer})")
+
+def main():
+    parser = argparse.ArgumentParser(description="SubStudio micro-benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    cues = sub.add_parser("cues", help="SRT handling: legacy string pipeline vs CueList")
+    cues.add_argument("--cues", type=int, default=10000)
+    cues.add_argument("--repeat", type=int, default=5)
+    cues.set_defaults(func=bench_cues)
+
+    workers = sub.add_parser("workers", help="Transcription: RTF of chunked parallel workers vs one stream")
+    workers.add_argument("--media", required=True, help="Video or audio file to transcribe")
+    workers.add_argument("--model", default="small")
+    workers.add_argument("--workers", default="1,2,4,8", help="Comma-separated worker counts")
+    workers.add_argument("--threads", type=int, default=os.cpu_count() or 4, help="Total CPU threads shared by the workers")
+    workers.add_argument("--chunk", type=float, default=60.0, help="Target chunk length in seconds")
+    workers.set_defaults(func=bench_workers)
+
+    profiles = sub.add_parser("profiles", help="Transcription: RTF and segments per decoding profile on reference clips")
+    profiles.add_argument("--media", nargs="+", required=True, help="Reference clips (a same-named .srt enables WER)")
+    profiles.add_argument("--model", default="small")
+    profiles.add_argument("--profiles", default="fast,balanced,accurate", help="Comma-separated profile names")
+    profiles.set_defaults(func=bench_profiles)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("SubStudio.CueStream")
+
+class CueStream:
+    """
+    Hands cue texts from the transcribing thread to the event loop as Whisper produces
+    them, so translation can start long before the last segment is out.
+    The producer (an executor thread) calls feed() and close(); the consumer reads
+    `texts` (and `starts`, in seconds, to tell where a cue falls), which only grow, and
+    awaits wait() for more. The finished CueList stays the single source of truth for timings.
+    """
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.texts: List[str] = []
+        self.starts: List[float] = []
+        self.closed = False
+        self.error: Optional[BaseException] = None
+        self._changed = asyncio.Event()
+
+    def feed(self, segments: List[Dict[str, Any]]):
+        """Appends a batch of finished segments. Safe to call from any thread."""
+        texts = [s["text"] for s in segments]
+        if texts:
+            self.loop.call_soon_threadsafe(self._append, texts, [s["start"] for s in segments])
+
+    def close(self, error: Optional[BaseException] = None):
+        """No more segments are coming (`error` if transcription failed). Safe to call from any thread."""
+        self.loop.call_soon_threadsafe(self._close, error)
+
+    def _append(self, texts: List[str], starts: List[float]):
+        self.texts.extend(texts)
+        self.starts.extend(starts)
+        self._changed.set()
+
+    def _close(self, error: Optional[BaseException]):
+        if not self.closed:
+            self.closed = True
+            self.error = error
+        self._changed.set()
+
+    async def wait(self):
+        """Returns once new texts arrived or the stream closed."""
+        await self._changed.wait()
+        self._changed.clear()
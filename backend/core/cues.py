@@ -0,0 +1,161 @@
+import re
+import numpy as np
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# SRT (hh:mm:ss,mmm) and WebVTT (mm:ss.mmm, hours optional) timestamps
+_TIME = r"(?:(\d+):)?(\d{2}):(\d{2})[,.](\d{3})"
+_TIMING_AHEAD = r"(?:[ \t]*\d+[ \t]*\n)?[ \t]*(?:\d+:)?\d{2}:\d{2}[,.]\d{3}[ \t]*-->"
+
+# One pass over the whole file: optional index line, timing line, then text up to the next
+# blank line or the next timing line (so a cue whose text is a number cannot swallow the next block)
+_SRT_BLOCK = re.compile(
+    r"(?:^|\n)[ \t]*(?:\d+[ \t]*\n)?[ \t]*"
+    + _TIME + r"[ \t]*-->[ \t]*" + _TIME + r"[^\n]*"
+    r"((?:\n(?![ \t]*\n)(?!" + _TIMING_AHEAD + r").*)*)"
+)
+
+_MS_FACTORS = np.array([3600000, 60000, 1000, 1], dtype=np.int64)
+
+def _format_times(ms: np.ndarray) -> List[str]:
+    """Vectorized split into h/m/s/ms, then a single formatting pass."""
+    ms = np.maximum(ms, 0)
+    h, rem = np.divmod(ms, 3600000)
+    m, rem = np.divmod(rem, 60000)
+    s, milli = np.divmod(rem, 1000)
+    return [f"{a:02}:{b:02}:{c:02},{d:03}" for a, b, c, d in zip(h.tolist(), m.tolist(), s.tolist(), milli.tolist())]
+
+def _wrap_line(line: str, max_chars: int) -> str:
+    """Breaks a too-long line once, at the space closest to its middle."""
+    if len(line) <= max_chars:
+        return line
+    mid = len(line) // 2
+    left = line.rfind(' ', 0, mid + 1)
+    right = line.find(' ', mid)
+    if left == -1 and right == -1:
+        return line
+    if left == -1 or (right != -1 and right - mid < mid - left):
+        best_space = right
+    else:
+        best_space = left
+    return line[:best_space] + '\n' + line[best_space + 1:]
+
+class CueList:
+    """
+    Compact subtitle track shared by every pipeline stage.
+    Timings live in two int64 millisecond arrays; texts in a parallel list.
+    SRT is parsed once on the way in and serialized once on the way out;
+    offset, clipping and wrapping are array operations in between.
+    """
+    __slots__ = ("starts", "ends", "texts")
+
+    def __init__(self, starts: Optional[np.ndarray] = None, ends: Optional[np.ndarray] = None, texts: Optional[List[str]] = None):
+        self.starts = np.asarray(starts if starts is not None else [], dtype=np.int64)
+        self.ends = np.asarray(ends if ends is not None else [], dtype=np.int64)
+        self.texts = list(texts) if texts is not None else []
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    # --- CONSTRUCTION ---
+
+    @classmethod
+    def parse_srt(cls, srt_text: str) -> "CueList":
+        """SRT, or WebVTT (header, cue ids and settings are skipped). Cues without text are dropped."""
+        srt_text = srt_text.lstrip("\ufeff").replace("\r\n", "\n")
+        matches = [m for m in _SRT_BLOCK.findall(srt_text) if m[8].strip()]
+        if not matches:
+            return cls()
+        parts = np.array([[field or 0 for field in m[:8]] for m in matches]).astype(np.int64)
+        starts = parts[:, :4] @ _MS_FACTORS
+        ends = parts[:, 4:] @ _MS_FACTORS
+        return cls(starts, ends, [m[8].strip() for m in matches])
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Dict[str, Any]]) -> "CueList":
+        """Whisper-style segments ({start, end, text} in seconds)."""
+        segments = list(segments)
+        starts = np.rint(np.array([s["start"] for s in segments], dtype=np.float64) * 1000)
+        ends = np.rint(np.array([s["end"] for s in segments], dtype=np.float64) * 1000)
+        return cls(starts, ends, [s["text"] for s in segments])
+
+    def with_texts(self, texts: List[str]) -> "CueList":
+        """Same timings, new texts (e.g. a translation). The timing arrays are shared, not copied."""
+        return CueList(self.starts, self.ends, texts)
+
+    def take(self, mask_or_indices: Any) -> "CueList":
+        idx = np.flatnonzero(mask_or_indices) if np.asarray(mask_or_indices).dtype == bool else np.asarray(mask_or_indices, dtype=np.int64)
+        return CueList(self.starts[idx], self.ends[idx], [self.texts[i] for i in idx.tolist()])
+
+    def merge(self, other: "CueList") -> "CueList":
+        """Both tracks combined and ordered by start time."""
+        starts = np.concatenate((self.starts, other.starts))
+        ends = np.concatenate((self.ends, other.ends))
+        texts = self.texts + other.texts
+        order = np.argsort(starts, kind="stable")
+        return CueList(starts[order], ends[order], [texts[i] for i in order.tolist()])
+
+    # --- ARRAY OPERATIONS ---
+
+    def shift(self, offset_seconds: float) -> "CueList":
+        """Applies a sync offset (positive or negative); timestamps are clamped at zero."""
+        delta = int(round(offset_seconds * 1000))
+        return CueList(np.maximum(self.starts + delta, 0), np.maximum(self.ends + delta, 0), self.texts)
+
+    def clip(self, max_seconds: float) -> "CueList":
+        """Drops cues that start after `max_seconds` (e.g. past the end of the video)."""
+        return self.take(self.starts < int(max_seconds * 1000))
+
+    def uncovered(self, duration_ms: int, min_gap_ms: int, pad_ms: int = 0) -> List[Tuple[int, int]]:
+        """
+        [start, end) ms ranges of [0, duration_ms) that no cue covers, shrunk by `pad_ms`
+        next to a cue, keeping only those still at least `min_gap_ms` long.
+        Overlapping cues count once: coverage is the running maximum of the sorted ends.
+        """
+        if not len(self):
+            return [(0, duration_ms)] if duration_ms >= min_gap_ms else []
+        order = np.argsort(self.starts, kind="stable")
+        covered_to = np.maximum.accumulate(self.ends[order])
+        # Gap i runs from the coverage before cue i to the start of cue i; the last one to the end
+        gap_starts = np.concatenate(([0], covered_to + pad_ms))
+        gap_ends = np.concatenate((self.starts[order] - pad_ms, [duration_ms]))
+        gap_starts[0] = 0
+        keep = np.flatnonzero(gap_ends - gap_starts >= min_gap_ms)
+        return list(zip(gap_starts[keep].tolist(), gap_ends[keep].tolist()))
+
+    def within(self, ranges: List[Tuple[int, int]]) -> "CueList":
+        """Cues that start inside one of the sorted [start, end) ms ranges, their ends clamped to it."""
+        if not len(self) or not ranges:
+            return CueList()
+        bounds = np.asarray(ranges, dtype=np.int64)
+        idx = np.searchsorted(bounds[:, 0], self.starts, side="right") - 1
+        inside = (idx >= 0) & (self.starts < bounds[np.maximum(idx, 0), 1])
+        kept = self.take(inside)
+        kept.ends = np.minimum(kept.ends, bounds[idx[inside], 1])
+        return kept
+
+    def wrap_lines(self, max_chars: int) -> "CueList":
+        """Splits lines longer than `max_chars`; only cues that can need it are touched."""
+        lengths = np.fromiter((len(t) for t in self.texts), dtype=np.int64, count=len(self.texts))
+        candidates = np.flatnonzero(lengths > max_chars)
+        if not len(candidates):
+            return self
+        texts = list(self.texts)
+        for i in candidates.tolist():
+            texts[i] = '\n'.join(_wrap_line(line, max_chars) for line in texts[i].split('\n'))
+        return CueList(self.starts, self.ends, texts)
+
+    # --- OUTPUT ---
+
+    def to_segments(self) -> List[Dict[str, Any]]:
+        return [
+            {"start": s / 1000, "end": e / 1000, "text": t}
+            for s, e, t in zip(self.starts.tolist(), self.ends.tolist(), self.texts)
+        ]
+
+    def to_srt(self) -> str:
+        starts = _format_times(self.starts)
+        ends = _format_times(self.ends)
+        return "\n".join(
+            f"{i}\n{a} --> {b}\n{t}\n"
+            for i, (a, b, t) in enumerate(zip(starts, ends, self.texts), 1)
+        )
@@ -1,44 +1,186 @@
+import os
+import time
 import asyncio
 import json
 import logging
-from typing import Dict, Any, List, Optional
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Deque, Dict, Any, Iterable, List, Optional, Set, Tuple
 
 logger = logging.getLogger("SubStudio.Events")
 
+# File id of the job the current code is working for. asyncio tasks inherit it,
+# StageExecutor.run and the transcriber's reader thread carry it into their threads.
+current_job: ContextVar[Optional[str]] = ContextVar("substudio_job", default=None)
+
+@contextmanager
+def job_context(file_id: str):
+    """Attributes every log record emitted inside the block (and work it spawns) to `file_id`."""
+    token = current_job.set(file_id)
+    try:
+        yield
+    finally:
+        current_job.reset(token)
+
 class SSELogHandler(logging.Handler):
     """
     Intercepts standard Python logs and pipes them into the EventManager.
     This is what makes 'logger.info("Starting...")' appear in the React terminal.
+    A single instance sits on the root logger and routes each record to the file in
+    `current_job`. Every record is journaled (so a reconnecting client can replay it),
+    but it is only formatted once a client actually receives it.
     """
-    def __init__(self, event_manager: 'EventManager', file_id: str):
+    def __init__(self, event_manager: 'EventManager'):
         super().__init__()
         self.event_manager = event_manager
-        self.file_id = file_id
 
     def emit(self, record):
         try:
             # Avoid infinite loop: don't bridge logs coming from the event system itself
-            if "SubStudio.Events" in record.name:
+            if record.name.startswith("SubStudio.Events"):
                 return
-                
-            log_message = self.format(record)
-            # Send to the broadcaster
-            self.event_manager.emit_log(self.file_id, log_message, record.levelname)
+            file_id = current_job.get()
+            if file_id is None:
+                return
+            if record.exc_info:
+                # Tracebacks pin whole stack frames (audio buffers...): render those right away
+                self.event_manager.emit_log(file_id, self.format(record), record.levelname)
+                return
+            self.event_manager.emit_log_record(file_id, record, self.format)
         except Exception:
             self.handleError(record)
 
+TERMINAL_STATUSES = ("done", "error", "cancelled")
+
+class LogFrame:
+    """
+    SSE frame of a log record, rendered on first use (send or replay) and then kept.
+    len() is an estimate fixed at creation, so journal byte accounting stays consistent.
+    """
+    __slots__ = ("event_id", "file_id", "record", "formatter", "text", "size")
+
+    def __init__(self, event_id: int, file_id: str, record: logging.LogRecord, formatter: Callable[[logging.LogRecord], str]):
+        self.event_id = event_id
+        self.file_id = file_id
+        self.record = record
+        self.formatter = formatter
+        self.text: Optional[str] = None
+        self.size = len(str(record.msg)) + len(file_id) + 96
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __str__(self) -> str:
+        if self.text is None:
+            data = {
+                "type": "log",
+                "fileId": self.file_id,
+                "level": self.record.levelname,
+                "message": self.formatter(self.record)
+            }
+            self.text = f"id: {self.event_id}\ndata: {json.dumps(data)}\n\n"
+            self.record = self.formatter = None
+        return self.text
+
+class EventJournal:
+    """Bounded ring of (event id, frame) for one topic, so clients can resume after a disconnect."""
+    __slots__ = ("events", "bytes", "trimmed_upto", "finished_at")
+
+    def __init__(self, max_events: int):
+        self.events: Deque[Tuple[int, Any]] = deque()
+        self.bytes = 0
+        # Highest id that is no longer replayable from this journal
+        self.trimmed_upto = 0
+        self.finished_at: Optional[float] = None
+
+    def append(self, event_id: int, frame: Any, max_events: int):
+        self.events.append((event_id, frame))
+        self.bytes += len(frame)
+        while len(self.events) > max_events:
+            self.pop_oldest()
+
+    def pop_oldest(self) -> int:
+        event_id, frame = self.events.popleft()
+        self.bytes -= len(frame)
+        self.trimmed_upto = event_id
+        return len(frame)
+
+    def since(self, event_id: int) -> List[Tuple[int, Any]]:
+        return [e for e in self.events if e[0] > event_id]
+
+class Subscriber:
+    """One SSE connection: a bounded queue of (event id, frame) and its topic filter. Frames are str or LogFrame."""
+    __slots__ = ("queue", "topics", "dropped", "behind_since")
+
+    def __init__(self, topics: Optional[Iterable[str]] = None, maxsize: int = 100):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        # None = every topic
+        self.topics: Optional[Set[str]] = set(topics) if topics else None
+        self.dropped = 0
+        # Set when the queue overflowed: live frames stop and the consumer catches up from the journals
+        self.behind_since: Optional[int] = None
+
+    def wants(self, topic: str) -> bool:
+        return self.topics is None or topic in self.topics
+
 class EventManager:
     """
     Manages Server-Sent Events (SSE) subscriptions.
-    Each file_id gets its own dedicated broadcast channel.
+    Every event belongs to a topic (a file_id, 'library', 'system_events') and one
+    connection can follow any set of topics. Each event is serialized once and the same
+    frame is handed to every interested subscriber. Status updates are coalesced per file
+    to at most EVENTS_MAX_RATE_HZ (latest value wins; a status change goes out at once).
+
+    Every broadcast gets a global, increasing event id (the SSE `id:` field) and is kept
+    in its topic's journal (JOURNAL_EVENTS_PER_TOPIC, JOURNAL_BUDGET_MB overall; finished
+    jobs are evicted first). Reconnecting with Last-Event-ID replays what was missed;
+    anything already evicted is reported with an explicit 'gap' event, never silently lost.
     """
     def __init__(self):
-        self.listeners: Dict[str, List[asyncio.Queue]] = {}
+        self.subscribers: List[Subscriber] = []
         # Stores the last known status to show immediately on reconnect
         self.state_cache: Dict[str, Dict[str, Any]] = {}
+        # The loop that owns the queues; worker threads hop back onto it
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.min_interval = 1.0 / float(os.getenv("EVENTS_MAX_RATE_HZ", "4"))
+        # file_id -> (monotonic time, status) of the last status actually broadcast
+        self._last_sent: Dict[str, Tuple[float, str]] = {}
+        self._flush_timers: Dict[str, asyncio.TimerHandle] = {}
+        self.frames_sent = 0
+        self.coalesced = 0
+
+        self.last_event_id = 0
+        self.journals: Dict[str, EventJournal] = {}
+        # Topics whose whole journal was evicted -> last id they had
+        self.evicted: "OrderedDict[str, int]" = OrderedDict()
+        self.journal_bytes = 0
+        self.journal_events = int(os.getenv("JOURNAL_EVENTS_PER_TOPIC", "2000"))
+        self.journal_budget = int(float(os.getenv("JOURNAL_BUDGET_MB", "32")) * 1024 * 1024)
+        self.gaps_reported = 0
+
+    def bind_loop(self, loop: asyncio.AbstractEventLoop):
+        """Called once at startup so emits from executor threads can be marshalled safely."""
+        self.loop = loop
+
+    def _dispatch(self, fn: Callable, *args):
+        """Runs `fn` on the event loop thread, whichever thread we are called from."""
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            fn(*args)
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is loop:
+            fn(*args)
+        else:
+            loop.call_soon_threadsafe(fn, *args)
 
     def emit(self, file_id: str, status: str, progress: int, message: str):
-        """Updates the UI progress bar and status text."""
+        """Updates the UI progress bar and status text. Safe to call from any thread."""
         data = {
             "type": "status",
             "fileId": file_id,
@@ -46,69 +188,198 @@ class EventManager:
             "progress": progress,
             "message": message
         }
+        self._dispatch(self._publish_status, file_id, data)
+
+    def _publish_status(self, file_id: str, data: Dict[str, Any]):
         self.state_cache[file_id] = data
+        last = self._last_sent.get(file_id)
+        now = time.monotonic()
+        if self.loop is None or last is None or last[1] != data["status"] or now - last[0] >= self.min_interval:
+            self._send_status(file_id)
+        elif file_id not in self._flush_timers:
+            # Too soon: whatever is newest when the file's next slot opens goes out then
+            self.coalesced += 1
+            self._flush_timers[file_id] = self.loop.call_later(last[0] + self.min_interval - now, self._send_status, file_id)
+        else:
+            self.coalesced += 1
+
+    def _send_status(self, file_id: str):
+        timer = self._flush_timers.pop(file_id, None)
+        if timer:
+            timer.cancel()
+        data = self.state_cache.get(file_id)
+        if data is None:
+            return
+        self._last_sent[file_id] = (time.monotonic(), data["status"])
         self._broadcast(file_id, data)
+        journal = self.journals.get(file_id)
+        if journal:
+            journal.finished_at = time.monotonic() if data["status"] in TERMINAL_STATUSES else None
 
     def emit_log(self, file_id: str, message: str, level: str = "INFO"):
-        """Sends a raw string to the frontend's console/terminal component."""
+        """Sends a raw string to the frontend's console/terminal component. Safe to call from any thread."""
         data = {
             "type": "log",
             "fileId": file_id,
             "level": level,
             "message": message
         }
-        self._broadcast(file_id, data)
+        self._dispatch(self._broadcast, file_id, data)
+
+    def emit_log_record(self, file_id: str, record: logging.LogRecord, formatter: Callable[[logging.LogRecord], str]):
+        """Like emit_log, but the record is formatted only when a client receives or replays it."""
+        self._dispatch(self._broadcast_record, file_id, record, formatter)
+
+    def publish(self, channel: str, data: Dict[str, Any]):
+        """Pushes an arbitrary event (e.g. library deltas) to a channel. Safe to call from any thread."""
+        self._dispatch(self._broadcast, channel, data)
+
+    def _broadcast(self, topic: str, data: Dict[str, Any]):
+        """Serializes once, journals the frame, then pushes it to every browser tab following this topic."""
+        self.last_event_id += 1
+        event_id = self.last_event_id
+        self._deliver(topic, event_id, f"id: {event_id}\ndata: {json.dumps(data)}\n\n")
+
+    def _broadcast_record(self, topic: str, record: logging.LogRecord, formatter: Callable[[logging.LogRecord], str]):
+        self.last_event_id += 1
+        event_id = self.last_event_id
+        self._deliver(topic, event_id, LogFrame(event_id, topic, record, formatter))
+
+    def _deliver(self, topic: str, event_id: int, frame: Any):
+        self._journal(topic, event_id, frame)
+        for sub in self.subscribers:
+            if not sub.wants(topic) or sub.behind_since is not None:
+                continue
+            # Non-blocking put; a full queue switches the subscriber to catch-up from the journals
+            try:
+                sub.queue.put_nowait((event_id, frame))
+                self.frames_sent += 1
+            except asyncio.QueueFull:
+                sub.dropped += 1
+                sub.behind_since = event_id
+
+    # --- JOURNAL ---
 
-    def _broadcast(self, file_id: str, data: Dict[str, Any]):
-        """Pushes data to all active browser tabs listening to this file_id."""
-        if file_id in self.listeners:
-            for queue in self.listeners[file_id]:
-                # Non-blocking put; if the queue is full, we skip to prevent lag
-                try:
-                    queue.put_nowait(data)
-                except asyncio.QueueFull:
-                    pass
-
-    async def subscribe(self, file_id: str):
-        """The generator function used by FastAPI StreamingResponse."""
-        queue = asyncio.Queue(maxsize=100)
-        
-        # 1. Send immediate state if we have it
-        if file_id in self.state_cache:
-            yield f"data: {json.dumps(self.state_cache[file_id])}\n\n"
+    def _journal(self, topic: str, event_id: int, frame: Any):
+        journal = self.journals.get(topic)
+        if journal is None:
+            journal = self.journals[topic] = EventJournal(self.journal_events)
+            self.evicted.pop(topic, None)
+        before = journal.bytes
+        journal.append(event_id, frame, self.journal_events)
+        self.journal_bytes += journal.bytes - before
+        if self.journal_bytes > self.journal_budget:
+            self._enforce_budget()
+
+    def _enforce_budget(self):
+        """Drops whole journals of finished jobs (oldest first), then trims the largest active ones."""
+        finished = sorted(
+            (j.finished_at, topic) for topic, j in self.journals.items() if j.finished_at is not None
+        )
+        for _, topic in finished:
+            if self.journal_bytes <= self.journal_budget:
+                return
+            self._drop_journal(topic)
+
+        while self.journal_bytes > self.journal_budget and self.journals:
+            topic, journal = max(self.journals.items(), key=lambda kv: kv[1].bytes)
+            if len(journal.events) <= 1:
+                self._drop_journal(topic)
+                continue
+            self.journal_bytes -= journal.pop_oldest()
+
+    def _drop_journal(self, topic: str):
+        journal = self.journals.pop(topic)
+        self.journal_bytes -= journal.bytes
+        if journal.events:
+            self.evicted[topic] = journal.events[-1][0]
+        self._last_sent.pop(topic, None)
+        while len(self.evicted) > 10000:
+            self.evicted.popitem(last=False)
+
+    def _replay(self, sub: Subscriber, after_id: int) -> List[Any]:
+        """Frames after `after_id` for the subscriber's topics, in id order, plus gap markers for what is gone."""
+        events: List[Tuple[int, Any]] = []
+        topics = sub.topics if sub.topics is not None else set(self.journals) | set(self.evicted)
+        for topic in topics:
+            journal = self.journals.get(topic)
+            lost_upto = journal.trimmed_upto if journal else self.evicted.get(topic, 0)
+            if lost_upto > after_id:
+                self.gaps_reported += 1
+                gap = {"type": "gap", "fileId": topic, "fromId": after_id + 1, "toId": lost_upto}
+                events.append((lost_upto, f"data: {json.dumps(gap)}\n\n"))
+            if journal:
+                events.extend(journal.since(after_id))
+        events.sort(key=lambda e: e[0])
+        return [frame for _, frame in events]
+
+    async def subscribe(self, topics: Optional[Iterable[str]] = None, last_event_id: Optional[int] = None):
+        """
+        The generator function used by FastAPI StreamingResponse. No topics = every topic.
+        With `last_event_id` (the Last-Event-ID header), everything after it is replayed first.
+        """
+        sub = Subscriber(topics)
+
+        # 1. Resume from the journals, or send immediate state if we have it.
+        # Both happen synchronously with registration, so nothing slips in between.
+        if last_event_id is not None:
+            backlog = self._replay(sub, last_event_id)
+        else:
+            backlog = [f"data: {json.dumps(data)}\n\n" for file_id, data in list(self.state_cache.items()) if sub.wants(file_id)]
+        delivered = self.last_event_id
 
         # 2. Register this listener
-        if file_id not in self.listeners:
-            self.listeners[file_id] = []
-        self.listeners[file_id].append(queue)
-        
-        logger.debug(f"🔌 New SSE subscriber for: {file_id}")
+        self.subscribers.append(sub)
+        logger.debug(f"🔌 New SSE subscriber for: {', '.join(sub.topics) if sub.topics else 'all topics'}")
 
         try:
+            for frame in backlog:
+                yield str(frame)
             while True:
-                data = await queue.get()
-                yield f"data: {json.dumps(data)}\n\n"
+                if sub.behind_since is not None and sub.queue.empty():
+                    # Fell behind: catch up from the journals, then go back to live frames
+                    backlog = self._replay(sub, delivered)
+                    delivered = self.last_event_id
+                    sub.behind_since = None
+                    for frame in backlog:
+                        yield str(frame)
+                    continue
+                delivered, frame = await sub.queue.get()
+                yield str(frame)
         except asyncio.CancelledError:
-            logger.debug(f"🔌 SSE subscriber disconnected: {file_id}")
+            logger.debug("🔌 SSE subscriber disconnected")
         finally:
-            if file_id in self.listeners:
-                self.listeners[file_id].remove(queue)
-                if not self.listeners[file_id]:
-                    del self.listeners[file_id]
+            self.subscribers.remove(sub)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self.subscribers),
+            "framesSent": self.frames_sent,
+            "coalescedUpdates": self.coalesced,
+            "overflows": sum(sub.dropped for sub in self.subscribers),
+            "lastEventId": self.last_event_id,
+            "journals": len(self.journals),
+            "journalBytes": self.journal_bytes,
+            "journalBudgetBytes": self.journal_budget,
+            "gapsReported": self.gaps_reported
+        }
 
 # Global Singleton
 event_manager = EventManager()
 
-def setup_logging_bridge(file_id: str) -> SSELogHandler:
+def setup_logging_bridge() -> SSELogHandler:
     """
-    Attaches the logger to the SSE stream. 
-    Usage in main.py: handler = setup_logging_bridge(fid) -> ... -> root.removeHandler(handler)
+    Attaches the logger to the SSE stream, once for the whole process.
+    Jobs don't add handlers: they run inside job_context(fid) and the handler routes by it.
     """
     root_logger = logging.getLogger()
-    handler = SSELogHandler(event_manager, file_id)
-    
+    for handler in root_logger.handlers:
+        if isinstance(handler, SSELogHandler):
+            return handler
+    handler = SSELogHandler(event_manager)
+
     # Clean format for the UI Terminal
     handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
-    
+
     root_logger.addHandler(handler)
-    return handler
\ No newline at end of file
+    return handler
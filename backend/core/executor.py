@@ -0,0 +1,43 @@
+import os
+import asyncio
+import contextvars
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger("SubStudio.Executor")
+
+class StageExecutor:
+    """
+    Runs the blocking parts of the pipeline (Whisper, ffmpeg, disk I/O) off the event loop.
+    Each family of work gets its own pool so a 2-hour transcription never starves
+    the muxer, and FastAPI keeps answering /health and SSE streams.
+    LLM calls are native asyncio (see SubtitleTranslator) and need no pool.
+    """
+    def __init__(self):
+        # Whisper (CTranslate2) and ffmpeg release the GIL, so threads are enough here.
+        self.pools: Dict[str, ThreadPoolExecutor] = {
+            "cpu": ThreadPoolExecutor(
+                max_workers=int(os.getenv("CPU_WORKERS", "1")),
+                thread_name_prefix="substudio-cpu"
+            ),
+            "io": ThreadPoolExecutor(
+                max_workers=int(os.getenv("IO_WORKERS", "4")),
+                thread_name_prefix="substudio-io"
+            ),
+        }
+
+    async def run(self, pool: str, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Awaits `fn(*args, **kwargs)` on the given pool ('cpu' or 'io').
+        The caller's contextvars (e.g. the current job for log routing) go along with it.
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self.pools[pool], functools.partial(context.run, fn, *args, **kwargs))
+
+    def shutdown(self):
+        for name, pool in self.pools.items():
+            logger.debug(f"Shutting down [{name}] pool...")
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,128 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.transcript_cache import CACHE_ROOT
+
+logger = logging.getLogger("SubStudio.MediaIndex")
+
+class MediaIndex:
+    """
+    Persistent scan index in SQLite, so a restart does not mean re-probing the library.
+    - files: probe result per video, valid while (size, mtime) are unchanged.
+    - dirs: the last listing of a folder (subfolders + finished video items), valid while
+      the folder's signature (its mtime and those of its Subs/Subtitles folders) is unchanged.
+    """
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or os.path.join(CACHE_ROOT, "media_index.sqlite3")
+        self.probes_reused = 0
+        self.probes_run = 0
+        self.dirs_reused = 0
+        self.dirs_rescanned = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                dir TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                probe TEXT NOT NULL,
+                probed_at REAL NOT NULL
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS files_dir ON files (dir)")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS dirs (
+                path TEXT PRIMARY KEY,
+                signature TEXT NOT NULL,
+                listing TEXT NOT NULL
+            )
+        """)
+        self.db.commit()
+
+    # --- DIRECTORIES ---
+
+    def load_tree(self, root: str, recursive: bool = True) -> Dict[str, Tuple[str, Dict[str, Any]]]:
+        """Every indexed folder under `root` (or just `root`) in one query: {path: (signature, listing)}."""
+        prefix = root.rstrip(os.sep) + os.sep
+        with self._lock:
+            if recursive:
+                rows = self.db.execute(
+                    "SELECT path, signature, listing FROM dirs WHERE path = ? OR substr(path, 1, ?) = ?",
+                    (root, len(prefix), prefix)
+                ).fetchall()
+            else:
+                rows = self.db.execute("SELECT path, signature, listing FROM dirs WHERE path = ?", (root,)).fetchall()
+        return {path: (signature, json.loads(listing)) for path, signature, listing in rows}
+
+    def put_dir(self, path: str, signature: str, listing: Dict[str, Any], removed_dirs: List[str]):
+        """Stores a fresh listing and forgets videos and subfolders that disappeared from it."""
+        present = [item["filePath"] for item in listing.get("videos", [])]
+        with self._lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO dirs (path, signature, listing) VALUES (?, ?, ?)",
+                (path, signature, json.dumps(listing))
+            )
+            marks = ",".join("?" * len(present))
+            self.db.execute(
+                f"DELETE FROM files WHERE dir = ? AND path NOT IN ({marks})" if present else "DELETE FROM files WHERE dir = ?",
+                (path, *present)
+            )
+            for gone in removed_dirs:
+                prefix = gone + os.sep
+                self.db.execute("DELETE FROM dirs WHERE path = ? OR substr(path, 1, ?) = ?", (gone, len(prefix), prefix))
+                self.db.execute("DELETE FROM files WHERE dir = ? OR substr(dir, 1, ?) = ?", (gone, len(prefix), prefix))
+            self.db.commit()
+            self.dirs_rescanned += 1
+
+    def count_reused_dir(self):
+        with self._lock:
+            self.dirs_reused += 1
+
+    # --- FILES ---
+
+    def get_probes(self, dir_path: str) -> Dict[str, Tuple[int, int, Any]]:
+        """{path: (size, mtime_ns, probe)} for the videos indexed in one folder."""
+        with self._lock:
+            rows = self.db.execute(
+                "SELECT path, size, mtime_ns, probe FROM files WHERE dir = ?", (dir_path,)
+            ).fetchall()
+        return {path: (size, mtime_ns, json.loads(probe)) for path, size, mtime_ns, probe in rows}
+
+    def put_probes(self, dir_path: str, rows: List[Tuple[str, int, int, Any]]):
+        """Saves (path, size, mtime_ns, probe) for freshly probed videos."""
+        if not rows:
+            return
+        now = time.time()
+        with self._lock:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO files (path, dir, size, mtime_ns, probe, probed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [(path, dir_path, size, mtime_ns, json.dumps(probe), now) for path, size, mtime_ns, probe in rows]
+            )
+            self.db.commit()
+
+    def count_probes(self, reused: int, run: int):
+        with self._lock:
+            self.probes_reused += reused
+            self.probes_run += run
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            files = self.db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            dirs = self.db.execute("SELECT COUNT(*) FROM dirs").fetchone()[0]
+            return {
+                "files": files,
+                "dirs": dirs,
+                "dirsReused": self.dirs_reused,
+                "dirsRescanned": self.dirs_rescanned,
+                "probesReused": self.probes_reused,
+                "probesRun": self.probes_run
+            }
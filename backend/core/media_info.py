@@ -0,0 +1,183 @@
+import os
+import json
+import logging
+import threading
+import subprocess
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("SubStudio.MediaInfo")
+
+class ProbeError(Exception):
+    """ffprobe could not read the file."""
+
+class ProbeTimeout(ProbeError):
+    """ffprobe did not answer within PROBE_TIMEOUT seconds."""
+
+# Embedded subtitle codecs that are text and can be converted to SRT
+TEXT_SUBTITLE_CODECS = ("subrip", "srt", "ass", "ssa", "webvtt", "mov_text", "text")
+
+class MediaInfo:
+    """Everything we need from one `ffprobe -show_streams -show_format` call."""
+    __slots__ = ("path", "size", "mtime_ns", "duration", "streams")
+
+    def __init__(self, path: str, size: int, mtime_ns: int, duration: Optional[float], streams: List[Dict[str, Any]]):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.duration = duration
+        # [{"index", "type", "codec", "language", "forced"}] in container order
+        self.streams = streams
+
+    @classmethod
+    def from_probe(cls, path: str, size: int, mtime_ns: int, probe: Dict[str, Any]) -> "MediaInfo":
+        streams = [
+            {
+                "index": s.get("index"),
+                "type": s.get("codec_type"),
+                "codec": s.get("codec_name"),
+                "language": s.get("tags", {}).get("language", "und"),
+                "forced": bool(s.get("disposition", {}).get("forced"))
+            }
+            for s in probe.get("streams", [])
+        ]
+        try:
+            duration = float(probe.get("format", {})["duration"])
+        except (KeyError, TypeError, ValueError):
+            duration = None
+        return cls(path, size, mtime_ns, duration, streams)
+
+    @property
+    def subtitle_streams(self) -> List[Dict[str, Any]]:
+        return [s for s in self.streams if s["type"] == "subtitle"]
+
+    @property
+    def text_subtitle_streams(self) -> List[Dict[str, Any]]:
+        """Subtitle streams ffmpeg can turn into SRT (not PGS/VobSub bitmaps)."""
+        return [s for s in self.subtitle_streams if s.get("codec") in TEXT_SUBTITLE_CODECS]
+
+    @property
+    def subtitle_languages(self) -> List[str]:
+        return [s["language"] for s in self.subtitle_streams]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"duration": self.duration, "streams": self.streams}
+
+    @classmethod
+    def from_dict(cls, path: str, size: int, mtime_ns: int, data: Dict[str, Any]) -> "MediaInfo":
+        return cls(path, size, mtime_ns, data.get("duration"), data.get("streams", []))
+
+class MediaProber:
+    """
+    Shared ffprobe front-end for the scanner, the muxer and the pipeline.
+    Probes run on a bounded pool (PROBE_WORKERS); results are cached per path and
+    stay valid while the file's size and mtime are unchanged. Concurrent requests
+    for the same file share one ffprobe run.
+    """
+    def __init__(self, workers: Optional[int] = None, timeout: Optional[float] = None, max_entries: int = 20000):
+        self.timeout = timeout or float(os.getenv("PROBE_TIMEOUT", "10"))
+        self.max_entries = max_entries
+        self.pool = ThreadPoolExecutor(
+            max_workers=workers or int(os.getenv("PROBE_WORKERS", "8")),
+            thread_name_prefix="substudio-probe"
+        )
+        self.cache: "OrderedDict[str, MediaInfo]" = OrderedDict()
+        self.inflight: Dict[str, Future] = {}
+        self.hits = 0
+        self.probes = 0
+        self.timeouts = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def remember(self, info: MediaInfo):
+        """Seeds the cache (e.g. from the persistent media index)."""
+        with self._lock:
+            self.cache[info.path] = info
+            self.cache.move_to_end(info.path)
+            while len(self.cache) > self.max_entries:
+                self.cache.popitem(last=False)
+
+    def submit(self, path: str, size: Optional[int] = None, mtime_ns: Optional[int] = None) -> Future:
+        """Future resolving to the file's MediaInfo, or raising ProbeTimeout / ProbeError / OSError."""
+        if size is None or mtime_ns is None:
+            try:
+                st = os.stat(path)
+            except OSError as e:
+                failed: Future = Future()
+                failed.set_exception(e)
+                return failed
+            size, mtime_ns = st.st_size, st.st_mtime_ns
+
+        with self._lock:
+            info = self.cache.get(path)
+            if info and info.size == size and info.mtime_ns == mtime_ns:
+                self.hits += 1
+                self.cache.move_to_end(path)
+                done: Future = Future()
+                done.set_result(info)
+                return done
+            if path in self.inflight:
+                return self.inflight[path]
+            future = self.pool.submit(self._probe, path, size, mtime_ns)
+            self.inflight[path] = future
+
+        future.add_done_callback(lambda _: self._settle(path, future))
+        return future
+
+    def get(self, path: str) -> MediaInfo:
+        """Blocking lookup; never call it from a probe worker."""
+        return self.submit(path).result()
+
+    def _settle(self, path: str, future: Future):
+        with self._lock:
+            if self.inflight.get(path) is future:
+                del self.inflight[path]
+
+    def _probe(self, path: str, size: int, mtime_ns: int) -> MediaInfo:
+        cmd = [
+            "ffprobe", "-v", "quiet", "-print_format", "json",
+            "-show_streams", "-show_format", path
+        ]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=self.timeout)
+            probe = json.loads(result.stdout or "{}")
+        except subprocess.TimeoutExpired:
+            with self._lock:
+                self.timeouts += 1
+            logger.warning(f"⏱️ ffprobe timed out after {self.timeout:.0f}s: {os.path.basename(path)}")
+            raise ProbeTimeout(f"ffprobe timed out after {self.timeout:.0f}s")
+        except (OSError, ValueError) as e:
+            with self._lock:
+                self.failures += 1
+            logger.warning(f"⚠️ ffprobe failed for {os.path.basename(path)}: {e}")
+            raise ProbeError(str(e))
+
+        if result.returncode != 0 and not probe:
+            with self._lock:
+                self.failures += 1
+            logger.warning(f"⚠️ ffprobe could not read {os.path.basename(path)} (exit {result.returncode})")
+            raise ProbeError(f"ffprobe exited with {result.returncode}")
+
+        info = MediaInfo.from_probe(path, size, mtime_ns, probe)
+        with self._lock:
+            self.probes += 1
+        self.remember(info)
+        return info
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "cached": len(self.cache),
+                "inFlight": len(self.inflight),
+                "hits": self.hits,
+                "probes": self.probes,
+                "timeouts": self.timeouts,
+                "failures": self.failures
+            }
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+# Global Singleton
+media_probe = MediaProber()
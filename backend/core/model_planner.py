@@ -0,0 +1,214 @@
+import os
+import json
+import time
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, Optional, Tuple
+
+from core.transcript_cache import CACHE_ROOT
+
+logger = logging.getLogger("SubStudio.ModelPlanner")
+
+# Candidates for the 'auto' engine, smallest (fastest) first
+AUTO_MODELS = ("tiny", "base", "small", "medium", "large-v3")
+
+# Rough real-time factors (seconds of compute per second of audio) on a 4-core CPU with
+# int8 weights and the 'accurate' profile. Only used until this host has measured its own.
+PRIOR_RTF = {"tiny": 0.04, "base": 0.07, "small": 0.18, "medium": 0.5, "large-v3": 1.1}
+PROFILE_FACTOR = {"fast": 0.45, "balanced": 0.8, "accurate": 1.0}
+
+# Planning for a file whose duration is not probed yet
+UNKNOWN_DURATION = 45 * 60
+
+class RtfStore:
+    """
+    Real-time factors measured on this host, per model and decoding profile (and worker
+    count when chunked transcription is on). Each Whisper run updates an exponential
+    moving average, persisted as a small JSON file next to the caches. Models not yet
+    measured here use the priors, scaled by how fast this host ran the ones that were.
+    """
+    def __init__(self, path: Optional[str] = None, alpha: float = 0.3):
+        self.path = path or os.path.join(CACHE_ROOT, "realtime_factors.json")
+        self.alpha = alpha
+        self._lock = threading.Lock()
+        self.entries: Dict[str, Dict[str, Any]] = self._load()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=1)
+        os.replace(tmp, self.path)
+
+    @staticmethod
+    def key(model: str, profile: str, workers: int = 1) -> str:
+        return f"{model}|{profile}" if workers <= 1 else f"{model}|{profile}|x{workers}"
+
+    @staticmethod
+    def prior(model: str, profile: str, workers: int = 1) -> float:
+        rtf = PRIOR_RTF.get(model, PRIOR_RTF["medium"]) * PROFILE_FACTOR.get(profile, 1.0)
+        # Chunked transcription scales well but not linearly
+        return rtf / max(1, workers) ** 0.7
+
+    def host_speed(self) -> float:
+        """How this host compares to the priors (0.5 = twice as fast), from every measured run."""
+        with self._lock:
+            ratios = sorted(
+                e["rtf"] / self.prior(e["model"], e["profile"], e["workers"])
+                for e in self.entries.values() if "model" in e
+            )
+        return ratios[len(ratios) // 2] if ratios else 1.0
+
+    def get(self, model: str, profile: str, workers: int = 1) -> Tuple[float, bool]:
+        """(rtf, measured): the host's own figure if we have one, else the prior scaled to this host."""
+        with self._lock:
+            entry = self.entries.get(self.key(model, profile, workers))
+        if entry:
+            return entry["rtf"], True
+        return self.prior(model, profile, workers) * self.host_speed(), False
+
+    def record(self, model: str, profile: str, audio_seconds: float, elapsed: float, workers: int = 1) -> Optional[float]:
+        """Folds one finished transcription into the average. Returns the run's own RTF."""
+        if audio_seconds < 30 or elapsed <= 0:
+            # Too short to say anything: model warm-up and ffmpeg start-up dominate
+            return None
+        rtf = elapsed / audio_seconds
+        key = self.key(model, profile, workers)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry:
+                entry["rtf"] = round(entry["rtf"] + self.alpha * (rtf - entry["rtf"]), 4)
+                entry["samples"] += 1
+            else:
+                entry = self.entries[key] = {
+                    "model": model, "profile": profile, "workers": workers, "rtf": round(rtf, 4), "samples": 1
+                }
+            entry["updatedAt"] = int(time.time())
+            try:
+                self._save()
+            except OSError as e:
+                logger.warning(f"⚠️ Could not save real-time factors: {e}")
+        logger.info(f"📏 [{model}/{profile}] ran at RTF {rtf:.2f} (average now {entry['rtf']:.2f} over {entry['samples']} run(s))")
+        return rtf
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.entries)
+
+class BatchPlanner:
+    """
+    Picks the Whisper model for each file of an 'auto' batch. With a deadline it takes
+    the largest model whose predicted time for everything still waiting fits in what is
+    left of it; without one, the largest model that keeps up with AUTO_MAX_RTF.
+    Every pick re-plans from the clock and the durations of the files not yet started,
+    so a batch that runs ahead of plan moves up a size and one that falls behind moves down.
+    """
+    def __init__(
+        self,
+        store: RtfStore,
+        profile: str,
+        deadline_seconds: Optional[float] = None,
+        max_rtf: Optional[float] = None,
+        parallel: int = 1,
+        workers: int = 1,
+        models: Tuple[str, ...] = AUTO_MODELS
+    ):
+        self.store = store
+        self.profile = profile
+        self.started_at = time.time()
+        self.deadline_at = self.started_at + deadline_seconds if deadline_seconds else None
+        self.max_rtf = max_rtf if max_rtf is not None else float(os.getenv("AUTO_MAX_RTF", "0.5"))
+        # Files transcribed at the same time, and processes per file (chunked transcription)
+        self.parallel = max(1, parallel)
+        self.workers = workers
+        self.models = models
+        # Not started yet: file id -> probe future (resolves to MediaInfo)
+        self.waiting: Dict[str, Future] = {}
+        # Transcribing: file id -> (model, predicted end epoch)
+        self.running: Dict[str, Tuple[str, float]] = {}
+        self.last_finished_at: Optional[float] = None
+
+    def add(self, fid: str, probe: Future):
+        self.waiting[fid] = probe
+
+    def drop(self, fid: str):
+        """File needs no (more) transcription: finished, failed, cached or fully covered by a sidecar."""
+        self.waiting.pop(fid, None)
+        self.running.pop(fid, None)
+
+    def finish(self, fid: str):
+        """Whisper is done with `fid`; its measured time already went to the RtfStore."""
+        self.drop(fid)
+        self.last_finished_at = time.time()
+
+    def rtf(self, model: str) -> float:
+        return self.store.get(model, self.profile, self.workers)[0]
+
+    def _duration(self, probe: Future) -> Optional[float]:
+        if not probe.done() or probe.cancelled() or probe.exception():
+            return None
+        return probe.result().duration
+
+    def _waiting_audio(self, exclude: str) -> float:
+        """Audio still to transcribe for files that have not started (unprobed ones count as typical)."""
+        known, unknown = [], 0
+        for fid, probe in self.waiting.items():
+            if fid == exclude:
+                continue
+            duration = self._duration(probe)
+            if duration:
+                known.append(duration)
+            else:
+                unknown += 1
+        typical = sum(known) / len(known) if known else UNKNOWN_DURATION
+        return sum(known) + unknown * typical
+
+    def _busy_seconds(self, now: float) -> float:
+        """Transcription time still owed to files already running."""
+        return sum(max(0.0, end - now) for _, end in self.running.values())
+
+    def choose(self, fid: str, audio_seconds: Optional[float]) -> Dict[str, Any]:
+        """Picks the model for `fid`, about to be transcribed, and returns the plan behind it."""
+        now = time.time()
+        audio = audio_seconds or UNKNOWN_DURATION
+        others = self._waiting_audio(fid)
+        total_audio = audio + others
+        busy = self._busy_seconds(now)
+        self.waiting.pop(fid, None)
+
+        model = self.models[0]
+        if self.deadline_at:
+            budget = (self.deadline_at - now) * self.parallel - busy
+            reason = f"{max(0.0, self.deadline_at - now) / 60:.0f} min left for {total_audio / 60:.0f} min of audio"
+            for candidate in self.models:
+                if total_audio * self.rtf(candidate) <= budget:
+                    model = candidate
+        else:
+            reason = f"throughput target RTF {self.max_rtf:g}"
+            for candidate in self.models:
+                if self.rtf(candidate) <= self.max_rtf:
+                    model = candidate
+
+        predicted = audio * self.rtf(model)
+        # Queued behind whatever is running, shared across the parallel transcribe slots
+        start = now + busy / self.parallel
+        self.running[fid] = (model, start + predicted)
+        batch_end = start + (predicted + others * self.rtf(model)) / self.parallel
+        return {
+            "model": model,
+            "reason": reason,
+            "audioSeconds": round(audio, 1),
+            "rtf": round(self.rtf(model), 3),
+            "predictedSeconds": round(predicted, 1),
+            "predictedFinishAt": round(start + predicted, 1),
+            "batchPredictedFinishAt": round(batch_end, 1),
+            "deadlineAt": round(self.deadline_at, 1) if self.deadline_at else None
+        }
@@ -0,0 +1,210 @@
+import os
+import gc
+import time
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger("SubStudio.ModelPool")
+
+MB = 1024 * 1024
+
+# Rough resident size of each Whisper model on CPU with int8 weights, used to make room
+# before a load. The measured RSS growth replaces it once the model is actually loaded.
+MODEL_SIZE_MB = {
+    "tiny": 150, "tiny.en": 150,
+    "base": 250, "base.en": 250,
+    "small": 650, "small.en": 650,
+    "medium": 1600, "medium.en": 1600,
+    "large-v1": 3200, "large-v2": 3200, "large-v3": 3200, "large": 3200,
+    "distil-small.en": 500, "distil-medium.en": 1000,
+    "distil-large-v2": 1800, "distil-large-v3": 1800
+}
+DEFAULT_SIZE_MB = 1600
+
+def _rss_bytes() -> int:
+    """Resident set size of this process (Linux), 0 if unknown."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+class ResidentModel:
+    """One loaded model and its bookkeeping."""
+    __slots__ = ("name", "model", "bytes", "refs", "load_seconds", "loaded_at", "last_used", "uses")
+
+    def __init__(self, name: str, model: Any, size: int, load_seconds: float):
+        self.name = name
+        self.model = model
+        self.bytes = size
+        self.refs = 0
+        self.load_seconds = load_seconds
+        self.loaded_at = time.time()
+        self.last_used = time.monotonic()
+        self.uses = 0
+
+class ModelPool:
+    """
+    Keeps several Whisper models in RAM so mixed batches ('small' for cartoons,
+    'large-v3' for films) don't reload multi-GB weights on every switch.
+    - WHISPER_RAM_BUDGET_GB caps the total; the least recently used idle model goes first.
+    - Models are leased: a model someone is transcribing with is never freed. If every
+      resident model is busy, the new one loads over budget and the pool trims back on release.
+    - Concurrent requests for a model that is still loading wait for that single load.
+    """
+    def __init__(self, loader: Callable[[str], Any], budget_gb: Optional[float] = None):
+        self.loader = loader
+        budget = budget_gb if budget_gb is not None else float(os.getenv("WHISPER_RAM_BUDGET_GB", "6"))
+        self.budget = int(budget * 1024 * MB)
+        self.resident: "OrderedDict[str, ResidentModel]" = OrderedDict()
+        self.loading: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        # One load at a time, so the RSS growth we measure belongs to that model
+        self._load_lock = threading.Lock()
+
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+    @contextmanager
+    def lease(self, name: str) -> Iterator[Any]:
+        """`with pool.lease("medium") as model:` — the model stays resident until the block exits."""
+        entry = self._acquire(name)
+        try:
+            yield entry.model
+        finally:
+            self._release(entry)
+
+    def preload(self, name: str) -> threading.Thread:
+        """Loads `name` in a background thread (e.g. the default model at startup)."""
+        def run():
+            try:
+                with self.lease(name):
+                    pass
+            except Exception as e:
+                logger.warning(f"⚠️ Preloading Whisper [{name}] failed: {e}")
+
+        thread = threading.Thread(target=run, name="substudio-preload", daemon=True)
+        thread.start()
+        return thread
+
+    def _acquire(self, name: str) -> ResidentModel:
+        while True:
+            with self._lock:
+                entry = self.resident.get(name)
+                if entry is not None:
+                    self.resident.move_to_end(name)
+                    entry.refs += 1
+                    entry.uses += 1
+                    entry.last_used = time.monotonic()
+                    self.hits += 1
+                    logger.info(f"💎 Model [{name}] already in RAM. Reusing for next file.")
+                    return entry
+                pending = self.loading.get(name)
+                if pending is None:
+                    pending = self.loading[name] = Future()
+                    owner = True
+                else:
+                    owner = False
+
+            if not owner:
+                # Someone else is loading it: wait, then take a lease like any other hit
+                pending.result()
+                continue
+
+            try:
+                entry = self._load(name)
+            except BaseException as e:
+                with self._lock:
+                    del self.loading[name]
+                pending.set_exception(e)
+                raise
+            with self._lock:
+                entry.refs += 1
+                entry.uses += 1
+                self.resident[name] = entry
+                del self.loading[name]
+            pending.set_result(None)
+            return entry
+
+    def _load(self, name: str) -> ResidentModel:
+        with self._load_lock:
+            self._make_room(MODEL_SIZE_MB.get(name, DEFAULT_SIZE_MB) * MB)
+            logger.info(f"LOADING WHISPER MODEL: [{name}] (Device: CPU, Compute: int8)")
+            rss_before = _rss_bytes()
+            started = time.perf_counter()
+            model = self.loader(name)
+            elapsed = time.perf_counter() - started
+            grown = _rss_bytes() - rss_before
+
+        size = grown if grown > 16 * MB else MODEL_SIZE_MB.get(name, DEFAULT_SIZE_MB) * MB
+        with self._lock:
+            self.loads += 1
+            self.load_seconds += elapsed
+        logger.info(f"🧠 Whisper [{name}] loaded in {elapsed:.1f}s (~{size // MB} MB resident)")
+        return ResidentModel(name, model, size, elapsed)
+
+    def _make_room(self, needed: int):
+        """Frees least recently used idle models until `needed` more bytes fit in the budget."""
+        freed = []
+        with self._lock:
+            used = sum(e.bytes for e in self.resident.values())
+            for name in list(self.resident):
+                if used + needed <= self.budget:
+                    break
+                entry = self.resident[name]
+                if entry.refs > 0:
+                    continue
+                del self.resident[name]
+                used -= entry.bytes
+                freed.append(entry)
+                self.evictions += 1
+            if used + needed > self.budget:
+                busy = ", ".join(n for n, e in self.resident.items() if e.refs)
+                logger.warning(f"⚠️ Whisper RAM budget exceeded: models in use ({busy}) cannot be freed")
+        self._free(freed)
+
+    def _release(self, entry: ResidentModel):
+        with self._lock:
+            entry.refs -= 1
+            entry.last_used = time.monotonic()
+            over = sum(e.bytes for e in self.resident.values()) > self.budget
+        if over:
+            # A load went over budget while everything was busy: trim back now that something is idle
+            self._make_room(0)
+
+    def _free(self, entries):
+        for entry in entries:
+            logger.warning(f"Evicting Whisper [{entry.name}] from RAM (~{entry.bytes // MB} MB)")
+            entry.model = None
+        if entries:
+            gc.collect()  # Force RAM release
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "budgetBytes": self.budget,
+                "residentBytes": sum(e.bytes for e in self.resident.values()),
+                "models": [
+                    {
+                        "name": e.name,
+                        "bytes": e.bytes,
+                        "inUse": e.refs,
+                        "uses": e.uses,
+                        "loadSeconds": round(e.load_seconds, 2),
+                        "idleSeconds": 0 if e.refs else round(now - e.last_used, 1)
+                    }
+                    for e in self.resident.values()
+                ],
+                "loading": list(self.loading),
+                "hits": self.hits,
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "totalLoadSeconds": round(self.load_seconds, 2)
+            }
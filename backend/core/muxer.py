@@ -1,9 +1,10 @@
-import os
-import re
 import logging
 import subprocess
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+from core.cues import CueList
+from core.media_info import MediaInfo, ProbeTimeout, media_probe
 
 logger = logging.getLogger("SubStudio.Muxer")
 
@@ -16,80 +17,38 @@ class VideoMuxer:
             "ko": "kor", "zh": "zho", "ru": "rus"
         }
 
-    def get_video_duration(self, video_path: Path) -> float:
-        """Returns the duration of the video in seconds using ffprobe."""
+    def get_media_info(self, video_path: Path) -> Optional[MediaInfo]:
+        """One ffprobe for everything the muxer needs, shared with the scanner's cache."""
         try:
-            cmd = [
-                "ffprobe", "-v", "error", "-show_entries", "format=duration",
-                "-of", "default=noprint_wrappers=1:nokey=1", str(video_path)
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            return float(result.stdout.strip())
+            return media_probe.get(str(video_path))
+        except ProbeTimeout as e:
+            logger.warning(f"⏱️ Probe timed out for {video_path.name}: {e}")
         except Exception as e:
-            logger.warning(f"Could not determine video duration: {e}. Defaulting to large value.")
-            return 999999.0
+            logger.warning(f"Could not probe {video_path.name}: {e}")
+        return None
 
-    def srt_time_to_seconds(self, time_str: str) -> float:
-        """Converts SRT timestamp (00:00:00,000) to total seconds."""
-        h, m, s_ms = time_str.split(':')
-        s, ms = s_ms.split(',')
-        return int(h) * 3600 + int(m) * 60 + int(s) + int(ms) / 1000
+    def get_video_duration(self, info: Optional[MediaInfo]) -> float:
+        """Returns the duration of the video in seconds."""
+        if info and info.duration:
+            return info.duration
+        logger.warning("Could not determine video duration. Defaulting to large value.")
+        return 999999.0
 
-    def process_srt_content(self, srt_text: str, max_duration: float, max_chars: int = 55) -> str:
+    def format_track(self, cues: CueList, max_duration: float, max_chars: int = 55) -> str:
         """
-        1. Splits long lines with \n (Python 3.10 compatible).
-        2. Removes subtitle blocks that start after the video duration.
+        1. Removes cues that start after the video duration (prevents black screen issues).
+        2. Splits long lines with \n.
         """
-        processed_blocks = []
-        # Pattern for SRT blocks: Index, TimeRange, Content
-        pattern = re.compile(r"(\d+)\n(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})\n([\s\S]*?)(?:\n\n|\Z)")
-        
-        matches = pattern.finditer(srt_text)
-        
-        for match in matches:
-            index, start_time_str, end_time_str, text = match.groups()
-            
-            # Check if subtitle starts after video ends to prevent black screen issues
-            start_seconds = self.srt_time_to_seconds(start_time_str)
-            if start_seconds >= max_duration:
-                continue 
-
-            # Split long lines logic
-            lines = text.strip().split('\n')
-            new_lines = []
-            for line in lines:
-                if len(line) > max_chars:
-                    mid = len(line) // 2
-                    space_indices = [i for i, char in enumerate(line) if char == ' ']
-                    if space_indices:
-                        best_space = min(space_indices, key=lambda x: abs(x - mid))
-                        line = line[:best_space] + '\n' + line[best_space+1:]
-                new_lines.append(line)
-            
-            # Fix for Python < 3.12: Join outside the f-string to avoid backslash error
-            clean_text = '\n'.join(new_lines)
-            processed_blocks.append(f"{index}\n{start_time_str} --> {end_time_str}\n{clean_text}")
-
-        # Join blocks with double newlines and ensure a trailing newline
-        return "\n\n".join(processed_blocks) + "\n\n"
+        return cues.clip(max_duration).wrap_lines(max_chars).to_srt()
 
-    def get_existing_sub_count(self, video_path: Path) -> int:
+    def get_existing_sub_count(self, info: Optional[MediaInfo]) -> int:
         """Counts existing subtitle streams in the source file for correct metadata indexing."""
-        try:
-            cmd = [
-                "ffprobe", "-v", "error", "-select_streams", "s",
-                "-show_entries", "stream=index", "-of", "csv=p=0", str(video_path)
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            output = result.stdout.strip()
-            return len(output.split('\n')) if output else 0
-        except:
-            return 0
+        return len(info.subtitle_streams) if info else 0
 
     def mux(
         self,
         video_path: str,
-        srts: Dict[str, str],
+        tracks: Dict[str, CueList],
         current_file: int,
         total_files: int,
         strip_existing: bool = False,
@@ -100,16 +59,17 @@ class VideoMuxer:
         prefix = f"[{current_file}/{total_files} Files]"
         
         # Determine duration to clip trailing subs and count existing tracks for metadata
-        video_duration = self.get_video_duration(video_input_path)
-        existing_sub_count = 0 if strip_existing else self.get_existing_sub_count(video_input_path)
+        info = self.get_media_info(video_input_path)
+        video_duration = self.get_video_duration(info)
+        existing_sub_count = 0 if strip_existing else self.get_existing_sub_count(info)
 
         tmp_srt_paths: List[tuple] = []
 
         # ------------------------------------------------
         # 1. Process and Write temporary SRT files
         # ------------------------------------------------
-        for lang_code, content in srts.items():
-            formatted_content = self.process_srt_content(content, video_duration)
+        for lang_code, cues in tracks.items():
+            formatted_content = self.format_track(cues, video_duration)
             
             tmp_path = video_input_path.parent / f"{video_input_path.stem}.{lang_code}.tmp.srt"
             with open(tmp_path, "w", encoding="utf-8") as f:
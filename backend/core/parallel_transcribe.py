@@ -0,0 +1,269 @@
+import os
+import logging
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+logger = logging.getLogger("SubStudio.ParallelTranscribe")
+
+SAMPLE_RATE = 16000
+
+# --- WORKER PROCESS SIDE ---
+
+_worker_model = None
+
+def _init_worker(model_size: str, cpu_threads: int):
+    """Runs once per pool process: loads its own model, limited to its share of the cores."""
+    global _worker_model
+    os.environ["OMP_NUM_THREADS"] = str(cpu_threads)
+    from faster_whisper import WhisperModel
+    _worker_model = WhisperModel(model_size, device="cpu", compute_type="int8", cpu_threads=cpu_threads)
+
+def _transcribe_chunk(samples: np.ndarray, prompt: Optional[str], decoding: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Segments of one speech chunk, timed relative to the chunk start."""
+    if samples.size == 0:
+        return []
+    segments, _ = _worker_model.transcribe(samples, initial_prompt=prompt, **decoding)
+    return [
+        {"start": s.start, "end": s.end, "text": s.text.strip()}
+        for s in segments if s.text.strip()
+    ]
+
+# --- PARENT SIDE ---
+
+def _stitch_chunk(merged: List[Dict[str, Any]], offset: float, length: float, segments: List[Dict[str, Any]]):
+    """Appends one chunk's segments to `merged` (see stitch_segments); chunks must come in order."""
+    for seg in segments:
+        start = offset + min(seg["start"], length)
+        end = offset + min(seg["end"], length)
+        if merged:
+            prev = merged[-1]
+            if start < prev["end"]:
+                start = prev["end"]
+            if end <= start:
+                # Squeezed to nothing: keep the words, attach them to the previous cue
+                if seg["text"] != prev["text"]:
+                    prev["text"] = f"{prev['text']} {seg['text']}"
+                continue
+        merged.append({"start": start, "end": end, "text": seg["text"]})
+
+def stitch_segments(chunks: Iterable[Tuple[float, float, List[Dict[str, Any]]]]) -> List[Dict[str, Any]]:
+    """
+    Merges per-chunk results into one ordered list on the film's clock.
+    `chunks` are (offset, length, segments) with chunk-relative times. Chunks are cut in
+    silence and never overlap, so each word lives in exactly one chunk; we only clamp
+    Whisper's occasional timestamps past the chunk end and keep segments from overlapping.
+    """
+    merged: List[Dict[str, Any]] = []
+    for offset, length, segments in sorted(chunks, key=lambda c: c[0]):
+        _stitch_chunk(merged, offset, length, segments)
+    return merged
+
+class ChunkedTranscriber:
+    """
+    Transcribes one long file on several cores at once. Silero VAD (bundled with
+    faster-whisper) finds the speech regions of each decoded audio window; they are
+    grouped into chunks of about TRANSCRIBE_CHUNK_SECONDS, cut only in silence, and
+    transcribed in parallel by TRANSCRIBE_WORKERS processes that each own a model
+    with WHISPER_CPU_THREADS / workers threads. Every worker holds its own copy of the
+    weights, outside the in-process ModelPool budget.
+    """
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        cpu_threads: Optional[int] = None,
+        chunk_seconds: Optional[float] = None
+    ):
+        self.workers = workers or int(os.getenv("TRANSCRIBE_WORKERS", "1"))
+        self.cpu_threads = cpu_threads or int(os.getenv("WHISPER_CPU_THREADS", str(os.cpu_count() or 4)))
+        self.chunk_seconds = chunk_seconds or float(os.getenv("TRANSCRIBE_CHUNK_SECONDS", "60"))
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.pool_model: Optional[str] = None
+        # Every worker of the current pool has its model loaded
+        self.warm = False
+        self._lock = threading.Lock()
+        # Jobs using each pool; a replaced pool shuts down once its last user is done
+        self._users: Dict[ProcessPoolExecutor, int] = {}
+        self._retired: List[ProcessPoolExecutor] = []
+        self.chunks_done = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 1
+
+    @property
+    def threads_per_worker(self) -> int:
+        return max(1, self.cpu_threads // self.workers)
+
+    @contextmanager
+    def lease(self, model_size: str) -> Iterator[ProcessPoolExecutor]:
+        """
+        `with chunked.lease("medium") as pool:` — one pool per model. Switching models starts
+        a new pool; the old one keeps serving the jobs already on it and is shut down after
+        the last of them, so for a while both sets of workers are loaded.
+        """
+        pool = self._acquire(model_size)
+        try:
+            yield pool
+        finally:
+            self._release(pool)
+
+    def _acquire(self, model_size: str) -> ProcessPoolExecutor:
+        with self._lock:
+            if self.pool is None or self.pool_model != model_size:
+                if self.pool is not None:
+                    self._retire(self.pool)
+                logger.info(f"🧵 Starting {self.workers} Whisper workers [{model_size}] x {self.threads_per_worker} threads")
+                self.pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    # fork would copy the parent's threads and CTranslate2 state
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(model_size, self.threads_per_worker)
+                )
+                self.pool_model = model_size
+                self.warm = False
+            self._users[self.pool] = self._users.get(self.pool, 0) + 1
+            return self.pool
+
+    def _retire(self, pool: ProcessPoolExecutor):
+        """Called with the lock held, when `pool` stops being the current one."""
+        if self._users.get(pool):
+            self._retired.append(pool)
+        else:
+            pool.shutdown(wait=False)
+
+    def _release(self, pool: ProcessPoolExecutor):
+        with self._lock:
+            users = self._users.pop(pool, 0) - 1
+            if users > 0:
+                self._users[pool] = users
+                return
+            if pool in self._retired:
+                self._retired.remove(pool)
+                logger.info("🧵 Last job on the previous Whisper workers finished, stopping them")
+                pool.shutdown(wait=False)
+
+    def warm_up(self, model_size: str):
+        """Starts every worker and waits for its model, so timings exclude loading."""
+        silence = np.zeros(SAMPLE_RATE, dtype=np.float32)
+        with self.lease(model_size) as pool:
+            for future in [pool.submit(_transcribe_chunk, silence, None, {}) for _ in range(self.workers)]:
+                future.result()
+            with self._lock:
+                if self.pool is pool:
+                    self.warm = True
+
+    def ensure_ready(self, model_size: str):
+        """Starts the pool and loads its models unless that was already done for `model_size`."""
+        with self._lock:
+            ready = self.warm and self.pool_model == model_size
+        if not ready:
+            self.warm_up(model_size)
+
+    def split(self, windows: Iterable[Tuple[float, np.ndarray]]) -> Iterator[Tuple[float, np.ndarray]]:
+        """(offset_seconds, samples) chunks covering the speech of each window, cut in silence."""
+        target = int(self.chunk_seconds * SAMPLE_RATE)
+        options = VadOptions(
+            min_silence_duration_ms=500,
+            speech_pad_ms=200,
+            # Long monologues get split by the VAD at its best internal pause
+            max_speech_duration_s=self.chunk_seconds
+        )
+        for offset, samples in windows:
+            regions = get_speech_timestamps(samples, options)
+            start = end = None
+            for region in regions:
+                if start is not None and region["end"] - start > target:
+                    yield offset + start / SAMPLE_RATE, samples[start:end]
+                    start = None
+                if start is None:
+                    start = region["start"]
+                end = region["end"]
+            if start is not None:
+                yield offset + start / SAMPLE_RATE, samples[start:end]
+
+    def transcribe(
+        self,
+        windows: Iterable[Tuple[float, np.ndarray]],
+        model_size: str,
+        prompt: Optional[str],
+        decoding: Dict[str, Any],
+        on_chunk: Optional[Callable[[int, int, float], None]] = None,
+        on_segments: Optional[Callable[[List[Dict[str, Any]]], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Runs every chunk through the pool while decoding continues, keeping at most
+        two chunks per worker in flight. `on_chunk(done, submitted, decoded_seconds)`
+        is called as chunks finish. Chunks finish out of order: `on_segments` gets the
+        stitched segments as soon as every chunk before them is done, in film order.
+        """
+        with self.lease(model_size) as pool:
+            return self._run(pool, windows, prompt, decoding, on_chunk, on_segments)
+
+    def _run(
+        self,
+        pool: ProcessPoolExecutor,
+        windows: Iterable[Tuple[float, np.ndarray]],
+        prompt: Optional[str],
+        decoding: Dict[str, Any],
+        on_chunk: Optional[Callable[[int, int, float], None]],
+        on_segments: Optional[Callable[[List[Dict[str, Any]]], None]] = None
+    ) -> List[Dict[str, Any]]:
+        # Chunk sequence number -> (offset, length); split() yields them in film order
+        pending: Dict[Future, Tuple[int, float, float]] = {}
+        finished: Dict[int, Tuple[float, float, List[Dict[str, Any]]]] = {}
+        merged: List[Dict[str, Any]] = []
+        stitched = emitted = done_count = submitted = 0
+        decoded = 0.0
+
+        def collect(futures):
+            nonlocal stitched, emitted, done_count
+            for future in futures:
+                seq, offset, length = pending.pop(future)
+                finished[seq] = (offset, length, future.result())
+                done_count += 1
+                self.chunks_done += 1
+                if on_chunk:
+                    on_chunk(done_count, submitted, decoded)
+            while stitched in finished:
+                _stitch_chunk(merged, *finished.pop(stitched))
+                stitched += 1
+            # The last segment can still absorb words squeezed out of the next chunk: hold it back
+            if on_segments and len(merged) - 1 > emitted:
+                on_segments(merged[emitted:-1])
+                emitted = len(merged) - 1
+
+        for offset, samples in self.split(windows):
+            while len(pending) >= self.workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            length = len(samples) / SAMPLE_RATE
+            pending[pool.submit(_transcribe_chunk, samples, prompt, decoding)] = (submitted, offset, length)
+            submitted += 1
+            decoded = offset + length
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done)
+
+        if on_segments and len(merged) > emitted:
+            on_segments(merged[emitted:])
+        return merged
+
+    def shutdown(self):
+        """App shutdown: stops every pool, in use or not."""
+        with self._lock:
+            pools = self._retired + ([self.pool] if self.pool is not None else [])
+            for pool in pools:
+                pool.shutdown(wait=False, cancel_futures=True)
+            self._retired = []
+            self._users = {}
+            self.pool = None
+            self.pool_model = None
+            self.warm = False
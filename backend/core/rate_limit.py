@@ -0,0 +1,80 @@
+import os
+import time
+import asyncio
+import logging
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger("SubStudio.RateLimit")
+
+class TokenBucket:
+    """
+    Classic token bucket refilled continuously at `per_minute / 60` units per second.
+    The level may go negative when a request turns out bigger than estimated;
+    later callers simply wait for the debt to be refilled.
+    """
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        self._refill()
+        # A single request larger than the bucket only has to wait for a full bucket
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def consume(self, amount: float):
+        """Negative amounts hand back over-estimated budget."""
+        self._refill()
+        self.level = min(self.capacity, self.level - amount)
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limits for the LLM API, shared by every
+    in-flight batch. A 429 with Retry-After pauses all callers, not just the one that hit it.
+    """
+    def __init__(self, rpm: Optional[int] = None, tpm: Optional[int] = None):
+        self.requests = TokenBucket(rpm or int(os.getenv("OPENAI_RPM", "500")))
+        self.tokens = TokenBucket(tpm or int(os.getenv("OPENAI_TPM", "200000")))
+        self.paused_until = 0.0
+        self.throttled = 0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: int):
+        """Waits until one request of roughly `tokens` tokens fits in both budgets."""
+        async with self._lock:
+            while True:
+                delay = max(
+                    self.paused_until - time.monotonic(),
+                    self.requests.wait_time(1),
+                    self.tokens.wait_time(tokens)
+                )
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+
+    def settle(self, estimated: int, actual: int):
+        """Corrects the token budget once the real usage is known."""
+        if actual and actual != estimated:
+            self.tokens.consume(actual - estimated)
+
+    def pause(self, seconds: float):
+        """Server asked us to back off: nobody sends anything for `seconds`."""
+        self.throttled += 1
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        logger.warning(f"⏳ LLM rate limited, pausing all requests for {seconds:.1f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "throttled": self.throttled,
+            "requestBudget": round(self.requests.level, 1),
+            "tokenBudget": round(self.tokens.level, 1)
+        }
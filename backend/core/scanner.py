@@ -1,129 +1,320 @@
 import os
-import subprocess
 import json
-import re
+import time
+import base64
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
+
+from core.media_index import MediaIndex
+from core.media_info import MediaInfo, ProbeTimeout, media_probe
+from core.sidecars import SIDECAR_FOLDERS, SUBTITLE_EXTENSIONS, VIDEO_EXTENSIONS, SidecarIndex
 
 logger = logging.getLogger("SubStudio.Scanner")
 
 class VideoScanner:
     def __init__(self, base_path: str):
         self.base_path = base_path
-        self.supported_extensions = ('.mp4', '.mkv', '.avi', '.mov', '.wmv')
-        self.subtitle_extensions = ('.srt', '.vtt', '.ass', '.ssa')
+        self.supported_extensions = VIDEO_EXTENSIONS
+        self.subtitle_extensions = SUBTITLE_EXTENSIONS
+        # Probe results and folder listings survive restarts; see MediaIndex
+        self.index = MediaIndex()
+
+    def _dir_signature(self, dir_path: str) -> str:
+        """Changes whenever an entry is added, removed or renamed in the folder or its Subs folders."""
+        # Bumped when the shape of indexed listings changes, so old entries are re-read once
+        parts = ["v2"]
+        for d in [dir_path] + [os.path.join(dir_path, sub) for sub in SIDECAR_FOLDERS]:
+            try:
+                parts.append(str(os.stat(d).st_mtime_ns))
+            except OSError:
+                parts.append("-")
+        return ":".join(parts)
 
-    def _get_subtitle_meta(self, file_entry: os.DirEntry, all_entries: List[os.DirEntry]) -> Dict[str, Any]:
+    def _get_subtitle_meta(self, video_name: str, sidecars: SidecarIndex, embedded: List[str]) -> Dict[str, Any]:
         """
         Deep scan for subtitles to populate the frontend 'Badge'.
         Rules:
-        1. External files with matching names (Direct or /Subs folder).
-        2. Isolation rule (One video in folder takes any SRT).
-        3. Embedded stream detection via ffprobe.
+        1. External files named after the video (Direct or /Subs folder), from the folder's SidecarIndex.
+        2. Embedded streams (languages from the shared MediaInfo probe).
         """
-        video_path = file_entry.path
-        video_stem = os.path.splitext(file_entry.name)[0]
-        parent_dir = os.path.dirname(video_path)
-        
         meta = {
             "hasSubtitles": False,
             "subType": None,
             "language": "auto",
             "externalPath": None,
+            "externalTracks": [],
             "embeddedTracks": []
         }
 
-        # 1. External Search
-        search_dirs = [parent_dir, os.path.join(parent_dir, "Subs"), os.path.join(parent_dir, "Subtitles")]
-        for d in search_dirs:
-            if not os.path.isdir(d): continue
-            try:
-                for f in os.listdir(d):
-                    if f.lower().endswith(self.subtitle_extensions) and video_stem.lower() in f.lower():
-                        meta["hasSubtitles"] = True
-                        meta["subType"] = "external"
-                        meta["externalPath"] = os.path.join(d, f)
-                        # Try to extract lang from filename like "movie.en.srt"
-                        lang_match = re.search(r'\.([a-z]{2,3})\.', f.lower())
-                        if lang_match:
-                            meta["language"] = lang_match.group(1)
-                        break 
-            except Exception: continue
-
-        # 2. Embedded Probe (The "Badge" engine)
-        try:
-            cmd = [
-                'ffprobe', '-v', 'quiet', '-print_format', 'json', 
-                '-show_streams', '-select_streams', 's', video_path
+        # 1. External tracks (all of them; the preferred one is also exposed as externalPath)
+        tracks = sidecars.lookup(video_name)
+        if tracks:
+            best = sidecars.best(video_name)
+            meta["hasSubtitles"] = True
+            meta["subType"] = "external"
+            meta["externalPath"] = best["path"]
+            meta["language"] = best["language"] or "auto"
+            meta["externalTracks"] = [
+                {k: t[k] for k in ("path", "language", "format", "forced", "sdh")} for t in tracks
             ]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=3)
-            probe = json.loads(result.stdout)
-            
-            streams = probe.get('streams', [])
-            if streams:
-                meta["hasSubtitles"] = True
-                if not meta["subType"]: meta["subType"] = "embedded"
-                
-                langs = []
-                for s in streams:
-                    l = s.get('tags', {}).get('language', 'und')
-                    langs.append(l)
-                
-                meta["embeddedTracks"] = langs
-                if meta["language"] == "auto" and langs:
-                    meta["language"] = langs[0]
 
-        except Exception as e:
-            logger.debug(f"Probe skipped for {file_entry.name}: {e}")
+        # 2. Embedded streams
+        if embedded:
+            meta["hasSubtitles"] = True
+            if not meta["subType"]: meta["subType"] = "embedded"
+            meta["embeddedTracks"] = embedded
+            if meta["language"] == "auto":
+                meta["language"] = embedded[0]
 
         return meta
 
-    def scan(self, target_path: str = None, recursive: bool = True) -> List[Dict[str, Any]]:
-        scan_target = target_path if target_path else self.base_path
-        
-        # Security Guard
-        if not os.path.abspath(scan_target).startswith(os.path.abspath(self.base_path)):
-            logger.warning(f"Unauthorized scan attempt: {scan_target}")
-            scan_target = self.base_path
+    def _list_dir(self, dir_path: str, signature: str, previous: Optional[Dict[str, Any]], pending: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Reads a folder whose signature changed (or that was never indexed).
+        Videos whose size and mtime match the index keep their probe; new or changed
+        files are submitted to the shared probe pool and filled in by _finish_pending.
+        """
+        entries = list(os.scandir(dir_path))
+        dirs = [e.name for e in entries if e.is_dir() and not e.name.startswith('.')]
+        videos = [e for e in entries if e.is_file() and e.name.lower().endswith(self.supported_extensions)]
+
+        # Sidecar candidates: one listing per folder instead of one per video
+        sidecars = SidecarIndex.for_folder(dir_path, [e.name for e in entries])
+
+        indexed = self.index.get_probes(dir_path)
+        probing = []
+        items = []
+        for entry in videos:
+            st = entry.stat()
+            hit = indexed.get(entry.path)
+            embedded: List[str] = []
+            if hit and hit[0] == st.st_size and hit[1] == st.st_mtime_ns and isinstance(hit[2], dict):
+                info = MediaInfo.from_dict(entry.path, st.st_size, st.st_mtime_ns, hit[2])
+                media_probe.remember(info)
+                embedded = info.subtitle_languages
+            else:
+                logger.info(f"Scanning: {entry.name}")
+                probing.append((entry.path, media_probe.submit(entry.path, st.st_size, st.st_mtime_ns)))
 
+            sub_info = self._get_subtitle_meta(entry.name, sidecars, embedded)
+            items.append({
+                "id": entry.path,
+                "fileName": entry.name,
+                "filePath": entry.path,
+                "is_directory": False,
+                "status": "idle",
+                "progress": 0,
+                "subtitleInfo": sub_info, # Matches VideoCard.tsx expectations
+                "sourceLang": [sub_info["language"]],
+                "targetLanguages": ["fr"] # Default fallback
+            })
+
+        removed = [os.path.join(dir_path, n) for n in (previous or {}).get("dirs", []) if n not in dirs]
+        listing = {"dirs": dirs, "videos": items}
+        pending.append({
+            "dir": dir_path, "signature": signature, "listing": listing,
+            "removed": removed, "sidecars": sidecars, "probing": probing
+        })
+        self.index.count_probes(len(videos) - len(probing), len(probing))
+        return listing
+
+    def _finish_pending(self, pending: List[Dict[str, Any]]):
+        """Waits for the submitted probes, completes the video items and writes the index."""
+        for job in pending:
+            by_path = {item["filePath"]: item for item in job["listing"]["videos"]}
+            fresh = []
+            for path, future in job["probing"]:
+                item = by_path[path]
+                probe_error = None
+                embedded: List[str] = []
+                try:
+                    info = future.result()
+                    embedded = info.subtitle_languages
+                    fresh.append((path, info.size, info.mtime_ns, info.to_dict()))
+                except ProbeTimeout:
+                    probe_error = "timeout"
+                except Exception as e:
+                    logger.debug(f"Probe skipped for {item['fileName']}: {e}")
+                    probe_error = "failed"
+
+                sub_info = self._get_subtitle_meta(item["fileName"], job["sidecars"], embedded)
+                if probe_error:
+                    # Reported to the UI and not indexed, so the next rescan of this folder retries
+                    sub_info["probeError"] = probe_error
+                item["subtitleInfo"] = sub_info
+                item["sourceLang"] = [sub_info["language"]]
+
+            self.index.put_probes(job["dir"], fresh)
+            # A folder with failed probes is stored unsigned so the next scan re-reads it
+            signature = job["signature"] if len(fresh) == len(job["probing"]) else ""
+            self.index.put_dir(job["dir"], signature, job["listing"], job["removed"])
+
+    def _scan_dir(self, dir_path: str, recursive: bool, refresh: bool, known: Dict[str, Any], totals: Dict[str, int], pending: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         items = []
         try:
-            if not os.path.exists(scan_target): return []
+            # Unchanged folder: reuse the indexed listing without touching its files
+            signature = self._dir_signature(dir_path)
+            cached = known.get(dir_path)
+            if cached and cached[0] == signature and not refresh:
+                listing = cached[1]
+                self.index.count_reused_dir()
+            else:
+                listing = self._list_dir(dir_path, signature, cached[1] if cached else None, pending)
 
-            # Get directory contents once to help with isolation rules
-            entries = list(os.scandir(scan_target))
-            
-            for entry in entries:
-                if entry.is_dir() and not entry.name.startswith('.'):
-                    items.append({
-                        "id": entry.path,
-                        "fileName": entry.name,
-                        "filePath": entry.path,
-                        "is_directory": True,
-                        "status": "folder",
-                        "children": self.scan(entry.path, recursive) if recursive else []
-                    })
-                
-                elif entry.is_file() and entry.name.lower().endswith(self.supported_extensions):
-                    logger.info(f"Scanning: {entry.name}")
-                    sub_info = self._get_subtitle_meta(entry, entries)
-                    
-                    items.append({
-                        "id": entry.path,
-                        "fileName": entry.name,
-                        "filePath": entry.path,
-                        "is_directory": False,
-                        "status": "idle",
-                        "progress": 0,
-                        "subtitleInfo": sub_info, # Matches VideoCard.tsx expectations
-                        "sourceLang": [sub_info["language"]],
-                        "targetLanguages": ["fr"] # Default fallback
-                    })
+            for name in listing["dirs"]:
+                sub_path = os.path.join(dir_path, name)
+                items.append({
+                    "id": sub_path,
+                    "fileName": name,
+                    "filePath": sub_path,
+                    "is_directory": True,
+                    "status": "folder",
+                    "children": self._scan_dir(sub_path, recursive, refresh, known, totals, pending) if recursive else []
+                })
+            items.extend(listing["videos"])
+            totals["videos"] += len(listing["videos"])
 
             # Sort: Folders first, then names
             items.sort(key=lambda x: (not x.get("is_directory", False), x["fileName"].lower()))
             
         except Exception as e:
-            logger.error(f"Scan failed in {scan_target}: {e}")
+            logger.error(f"Scan failed in {dir_path}: {e}")
+
+        return items
+
+    # --- LAZY BROWSING ---
+
+    @staticmethod
+    def _encode_cursor(key: Tuple[int, str, str]) -> str:
+        return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: Optional[str]) -> Optional[Tuple[int, str, str]]:
+        if not cursor:
+            return None
+        try:
+            kind, lower, name = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return (int(kind), lower, name)
+        except Exception:
+            raise ValueError("Invalid cursor")
+
+    def _child_counts(self, dir_path: str) -> Dict[str, int]:
+        """Folders and videos directly inside a folder; one scandir, no stat, no probe."""
+        folders = videos = 0
+        try:
+            with os.scandir(dir_path) as it:
+                for e in it:
+                    if e.name.startswith('.'):
+                        continue
+                    if e.is_dir():
+                        folders += 1
+                    elif e.name.lower().endswith(self.supported_extensions):
+                        videos += 1
+        except OSError:
+            pass
+        return {"folders": folders, "videos": videos}
+
+    def browse(self, target_path: str = None, cursor: Optional[str] = None, limit: int = 200, depth: int = 0) -> Dict[str, Any]:
+        """
+        One page of one folder, built from a single os.scandir: folders first, then videos,
+        by name. Child folders come back unexpanded with their counts (or expanded up to
+        `depth` more levels, first page each). Videos carry their subtitle badge when the
+        index already knows the folder; otherwise 'metaPending' is set and the caller
+        fills it in later with a non-recursive scan.
+        """
+        dir_path = target_path if target_path else self.base_path
+        if not os.path.abspath(dir_path).startswith(os.path.abspath(self.base_path)):
+            logger.warning(f"Unauthorized browse attempt: {dir_path}")
+            dir_path = self.base_path
+
+        after = self._decode_cursor(cursor)
+        entries = []
+        with os.scandir(dir_path) as it:
+            for e in it:
+                if e.name.startswith('.'):
+                    continue
+                if e.is_dir():
+                    entries.append(((0, e.name.lower(), e.name), e))
+                elif e.is_file() and e.name.lower().endswith(self.supported_extensions):
+                    entries.append(((1, e.name.lower(), e.name), e))
+        entries.sort(key=lambda x: x[0])
+
+        page = [(k, e) for k, e in entries if after is None or k > after][:limit]
+        has_more = len(page) == limit and page[-1][0] != entries[-1][0]
+
+        # Badges straight from the index when the folder has not changed since it was listed
+        cached = self.index.load_tree(dir_path, recursive=False).get(dir_path)
+        known = {}
+        if cached and cached[0] == self._dir_signature(dir_path):
+            known = {item["filePath"]: item for item in cached[1].get("videos", [])}
+
+        items = []
+        pending: List[str] = []
+        for key, e in page:
+            if key[0] == 0:
+                item = {
+                    "id": e.path,
+                    "fileName": e.name,
+                    "filePath": e.path,
+                    "is_directory": True,
+                    "status": "folder",
+                    "childCount": self._child_counts(e.path),
+                    "children": []
+                }
+                if depth > 0:
+                    sub = self.browse(e.path, None, limit, depth - 1)
+                    item["children"] = sub["items"]
+                    item["nextCursor"] = sub["nextCursor"]
+                    pending.extend(sub["pendingFolders"])
+                items.append(item)
+            elif e.path in known:
+                items.append(known[e.path])
+            else:
+                if dir_path not in pending:
+                    pending.append(dir_path)
+                items.append({
+                    "id": e.path,
+                    "fileName": e.name,
+                    "filePath": e.path,
+                    "is_directory": False,
+                    "status": "idle",
+                    "progress": 0,
+                    "subtitleInfo": None,
+                    "metaPending": True,
+                    "sourceLang": ["auto"],
+                    "targetLanguages": ["fr"]
+                })
+
+        return {
+            "path": dir_path,
+            "items": items,
+            "total": len(entries),
+            "nextCursor": self._encode_cursor(page[-1][0]) if has_more else None,
+            # Folders whose badges the caller should fill in with scan(folder, recursive=False)
+            "pendingFolders": pending
+        }
+
+    def scan(self, target_path: str = None, recursive: bool = True, refresh: bool = False) -> List[Dict[str, Any]]:
+        """Tree of folders and videos under target_path. `refresh` re-reads every folder (unchanged videos are still not re-probed)."""
+        scan_target = target_path if target_path else self.base_path
+        
+        # Security Guard
+        if not os.path.abspath(scan_target).startswith(os.path.abspath(self.base_path)):
+            logger.warning(f"Unauthorized scan attempt: {scan_target}")
+            scan_target = self.base_path
+
+        if not os.path.exists(scan_target): return []
 
-        return items
\ No newline at end of file
+        started = time.perf_counter()
+        probes_before = self.index.probes_run
+        known = self.index.load_tree(scan_target, recursive)
+        totals = {"videos": 0}
+        # Probes of every changed folder run in parallel while the walk continues
+        pending: List[Dict[str, Any]] = []
+        items = self._scan_dir(scan_target, recursive, refresh, known, totals, pending)
+        self._finish_pending(pending)
+        logger.info(
+            f"📚 Scanned {scan_target}: {totals['videos']} videos, "
+            f"{self.index.probes_run - probes_before} probed, in {(time.perf_counter() - started) * 1000:.0f}ms"
+        )
+        return items
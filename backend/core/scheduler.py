@@ -0,0 +1,81 @@
+import os
+import asyncio
+import logging
+from contextlib import nullcontext
+from typing import Any, Awaitable, Callable, ContextManager, Iterable, List, Optional
+
+logger = logging.getLogger("SubStudio.Scheduler")
+
+class Stage:
+    """One step of the pipeline with its own concurrency limit."""
+    def __init__(self, name: str, handler: Callable[[Any], Awaitable[None]], workers: int = 1):
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+
+    @staticmethod
+    def workers_from_env(name: str, default: int) -> int:
+        """Reads PIPELINE_<NAME>_WORKERS, e.g. PIPELINE_TRANSCRIBE_WORKERS=2."""
+        return int(os.getenv(f"PIPELINE_{name.upper()}_WORKERS", str(default)))
+
+class StagedScheduler:
+    """
+    Pipelined batch runner: every stage has its own worker pool and hands jobs
+    to the next stage through a bounded queue. While Whisper works on file N,
+    file N+1 is already being extracted and file N-1 is being translated or muxed,
+    so a batch takes roughly as long as its slowest stage instead of the sum of all.
+    """
+    def __init__(
+        self,
+        stages: List[Stage],
+        on_done: Callable[[Any], Awaitable[None]],
+        on_error: Callable[[Any, Exception], Awaitable[None]],
+        queue_size: Optional[int] = None,
+        job_context: Optional[Callable[[Any], ContextManager]] = None
+    ):
+        self.stages = stages
+        self.on_done = on_done
+        self.on_error = on_error
+        # Small queues keep back-pressure: we never extract 50 WAVs ahead of Whisper
+        self.queue_size = queue_size or int(os.getenv("PIPELINE_QUEUE_SIZE", "2"))
+        # Entered around each job's turn in a worker (e.g. to attribute its logs)
+        self.job_context = job_context or (lambda job: nullcontext())
+
+    async def run(self, jobs: Iterable[Any]):
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+
+        async def feed():
+            for job in jobs:
+                await queues[0].put(job)
+            for _ in range(self.stages[0].workers):
+                await queues[0].put(None)
+
+        async def worker(i: int, stage: Stage):
+            is_last = i == len(self.stages) - 1
+            while True:
+                job = await queues[i].get()
+                if job is None:
+                    return
+                with self.job_context(job):
+                    try:
+                        await stage.handler(job)
+                    except Exception as e:
+                        logger.debug(f"Stage [{stage.name}] failed, dropping job: {e}")
+                        await self.on_error(job, e)
+                        continue
+
+                    if is_last:
+                        await self.on_done(job)
+                # Outside the job's context: waiting on the next queue is not this job's work
+                if not is_last:
+                    await queues[i + 1].put(job)
+
+        async def run_stage(i: int, stage: Stage):
+            await asyncio.gather(*(worker(i, stage) for _ in range(stage.workers)))
+            # Every worker of this stage is idle for good: release the next stage
+            if i + 1 < len(self.stages):
+                for _ in range(self.stages[i + 1].workers):
+                    await queues[i + 1].put(None)
+
+        logger.info("Pipeline stages: " + " ➔ ".join(f"{s.name}(x{s.workers})" for s in self.stages))
+        await asyncio.gather(feed(), *(run_stage(i, s) for i, s in enumerate(self.stages)))
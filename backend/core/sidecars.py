@@ -0,0 +1,157 @@
+import os
+import re
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger("SubStudio.Sidecars")
+
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.avi', '.mov', '.wmv')
+SUBTITLE_EXTENSIONS = ('.srt', '.vtt', '.ass', '.ssa')
+SIDECAR_FOLDERS = ("Subs", "Subtitles")
+
+# Tags that describe a track rather than its language
+_FLAG_TAGS = {"forced": "forced", "sdh": "sdh", "hi": "sdh", "cc": "sdh", "default": "default"}
+_LANGUAGE_NAMES = {
+    "english": "en", "french": "fr", "francais": "fr", "spanish": "es", "german": "de",
+    "italian": "it", "portuguese": "pt", "dutch": "nl", "japanese": "ja", "korean": "ko",
+    "chinese": "zh", "russian": "ru"
+}
+# Common ISO 639-2 codes, normalized to ISO 639-1
+_ISO_639_2 = {
+    "eng": "en", "fra": "fr", "fre": "fr", "spa": "es", "deu": "de", "ger": "de",
+    "ita": "it", "por": "pt", "nld": "nl", "dut": "nl", "jpn": "ja", "kor": "ko",
+    "zho": "zh", "chi": "zh", "rus": "ru", "ara": "ar", "pol": "pl", "swe": "sv",
+    "nor": "no", "dan": "da", "fin": "fi", "tur": "tr", "ces": "cs", "cze": "cs",
+    "ell": "el", "gre": "el", "heb": "he", "hin": "hi", "hun": "hu", "ron": "ro",
+    "rum": "ro", "ukr": "uk", "vie": "vi", "tha": "th", "ind": "id", "bul": "bg",
+    "cat": "ca", "hrv": "hr", "srp": "sr", "slk": "sk", "slo": "sk", "slv": "sl",
+    "est": "et", "lav": "lv", "lit": "lt", "fas": "fa", "per": "fa", "msa": "ms",
+    "may": "ms", "ben": "bn", "tam": "ta", "und": "und"
+}
+# Two-letter tags only count as a language when they are one of these ISO 639-1 codes,
+# so release tags like "hd" or "x2" are not mistaken for one
+_ISO_639_1 = frozenset(_ISO_639_2.values()) - {"und"}
+_TAG_SPLIT = re.compile(r"[._\- ]")
+
+def _language_tag(tag: str) -> Optional[str]:
+    if tag in _LANGUAGE_NAMES:
+        return _LANGUAGE_NAMES[tag]
+    if tag in _ISO_639_2:
+        return _ISO_639_2[tag]
+    if tag in _ISO_639_1:
+        return tag
+    return None
+
+def normalize_language(code: Optional[str]) -> Optional[str]:
+    """'eng', 'English', 'en' -> 'en'. Unknown codes are returned lowercased; 'und' and empty -> None."""
+    if not code:
+        return None
+    tag = code.strip().lower()
+    tag = _language_tag(tag) or tag
+    return None if tag == "und" else tag
+
+def _parse_tags(tags: List[str]) -> Dict[str, Any]:
+    """Language code and flags from the trailing tags of a subtitle name ('en', 'forced', ...)."""
+    info = {"language": None, "forced": False, "sdh": False}
+    for tag in tags:
+        if tag in _FLAG_TAGS:
+            flag = _FLAG_TAGS[tag]
+            if flag in info:
+                info[flag] = True
+        elif info["language"] is None:
+            info["language"] = _language_tag(tag)
+    return info
+
+class SidecarIndex:
+    """
+    Stem -> subtitle tracks for one folder and its Subs/Subtitles folders, built from a
+    single listing of each. "Movie.en.forced.srt" is indexed under "movie" (exact match)
+    and under every shorter prefix ending at a separator, so "Show.S01E01.1080p.srt"
+    still matches "Show.S01E01.mkv" without "Episode 1" matching "Episode 10".
+    When the folder's video names are known, a prefix match only goes to the video
+    with the longest matching stem ("Show.S01E01", not "Show").
+    """
+    def __init__(self, listings: Dict[str, List[str]], video_names: Optional[List[str]] = None):
+        self.by_stem: Dict[str, List[Dict[str, Any]]] = {}
+        for folder, names in listings.items():
+            for name in names:
+                lower = name.lower()
+                if not lower.endswith(SUBTITLE_EXTENSIONS):
+                    continue
+                self._add(folder, name, lower)
+
+        if video_names:
+            stems = {os.path.splitext(v)[0].lower() for v in video_names}
+            owner: Dict[str, str] = {}
+            for stem in sorted(stems & self.by_stem.keys(), key=len):
+                for track in self.by_stem[stem]:
+                    owner[track["path"]] = stem
+            for stem in stems & self.by_stem.keys():
+                self.by_stem[stem] = [t for t in self.by_stem[stem] if t["exact"] or owner[t["path"]] == stem]
+
+    @classmethod
+    def for_folder(cls, dir_path: str, names: Optional[List[str]] = None) -> "SidecarIndex":
+        """Lists the folder (unless `names` is given) and its sidecar folders once."""
+        names = names if names is not None else os.listdir(dir_path)
+        listings = {dir_path: names}
+        for sub in SIDECAR_FOLDERS:
+            d = os.path.join(dir_path, sub)
+            if os.path.isdir(d):
+                try:
+                    listings[d] = os.listdir(d)
+                except OSError:
+                    continue
+        videos = [n for n in names if n.lower().endswith(VIDEO_EXTENSIONS)]
+        return cls(listings, videos)
+
+    def _add(self, folder: str, name: str, lower: str):
+        stem, ext = os.path.splitext(lower)
+        parts = _TAG_SPLIT.split(stem)
+        # Cut positions in `stem` after each token, so prefixes keep their original separators
+        cuts, pos = [], 0
+        for part in parts:
+            pos += len(part)
+            cuts.append(pos)
+            pos += 1
+
+        for n in range(len(parts), 0, -1):
+            tags = parts[n:]
+            self.by_stem.setdefault(stem[:cuts[n - 1]], []).append({
+                "path": os.path.join(folder, name),
+                "format": ext.lstrip("."),
+                # Only language/flag tags follow the key: the subtitle is named after exactly this video
+                "exact": all(t in _FLAG_TAGS or _language_tag(t) for t in tags),
+                **_parse_tags(tags)
+            })
+
+    def lookup(self, video_name: str) -> List[Dict[str, Any]]:
+        """Every track for a video, exact matches first, then folder order."""
+        stem = os.path.splitext(video_name)[0].lower()
+        tracks = self.by_stem.get(stem, [])
+        return sorted(tracks, key=lambda t: not t["exact"])
+
+    def best(
+        self,
+        video_name: str,
+        language: Optional[str] = None,
+        formats: Optional[tuple] = None,
+        exclude_languages: Iterable[str] = ()
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Preferred sidecar: the requested language if present, full (not forced) tracks and SRT first.
+        Tracks in `exclude_languages` are skipped (e.g. the translations a previous run wrote).
+        """
+        excluded = {normalize_language(code) for code in exclude_languages} - {None}
+        tracks = [
+            t for t in self.lookup(video_name)
+            if (not formats or t["format"] in formats) and t["language"] not in excluded
+        ]
+        if not tracks:
+            return None
+        wanted = normalize_language(language) if language and language != "auto" else None
+        return min(tracks, key=lambda t: (
+            bool(wanted) and t["language"] != wanted,
+            not t["exact"],
+            t["forced"],
+            t["format"] != "srt"
+        ))
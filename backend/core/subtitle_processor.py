@@ -1,111 +1,121 @@
 import os
 import subprocess
+import threading
 import logging
-import re
-from datetime import timedelta
-from typing import Any, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from core.cues import CueList
+from core.media_info import MediaInfo
+from core.sidecars import normalize_language
+from core.transcript_cache import TranscriptCache
 
 logger = logging.getLogger("SubStudio.Processor")
 
 class SubtitleProcessor:
-    def __init__(self):
-        # Regex for SRT timestamps: 00:00:20,000 --> 00:00:24,400
-        self.timestamp_regex = re.compile(r'(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})')
+    def __init__(self, cache: Optional[TranscriptCache] = None):
+        # Extracted embedded tracks are stored next to the Whisper transcripts
+        self.cache = cache
+        self.extractions = 0
 
-    def apply_offset(self, srt_content: str, offset_seconds: float) -> str:
+    def apply_offset(self, cues: CueList, offset_seconds: float) -> CueList:
         """
-        Calculates and applies the temporal shift to every subtitle block.
-        Offset can be positive or negative.
+        Applies the temporal shift to every cue in one array operation.
+        Offset can be positive or negative; timestamps are clamped at zero.
         """
         if offset_seconds == 0:
-            return srt_content
+            return cues
 
         logger.info(f"⏱️ Adjusting timing by {offset_seconds}s")
-        
-        def shift_timestamp(match):
-            start_val = self._add_offset(match.group(1), offset_seconds)
-            end_val = self._add_offset(match.group(2), offset_seconds)
-            return f"{start_val} --> {end_val}"
-
-        return self.timestamp_regex.sub(shift_timestamp, srt_content)
-
-    def _add_offset(self, timestamp_str: str, offset_sec: float) -> str:
-        """Helper to convert SRT string to delta, add offset, and convert back."""
-        try:
-            # Parse SRT format: HH:MM:SS,mmm
-            h, m, s_ms = timestamp_str.split(':')
-            s, ms = s_ms.split(',')
-            
-            td = timedelta(
-                hours=int(h), 
-                minutes=int(m), 
-                seconds=int(s), 
-                milliseconds=int(ms)
-            )
-            
-            # Apply offset
-            new_td = td + timedelta(seconds=offset_sec)
-            
-            # Prevent negative timestamps (clamp to 0)
-            if new_td.total_seconds() < 0:
-                new_td = timedelta(0)
-            
-            # Format back to SRT
-            total_seconds = int(new_td.total_seconds())
-            hours = total_seconds // 3600
-            minutes = (total_seconds % 3600) // 60
-            seconds = total_seconds % 60
-            milliseconds = int(new_td.microseconds / 1000)
-            
-            return f"{hours:02}:{minutes:02}:{seconds:02},{milliseconds:03}"
-        except Exception as e:
-            logger.error(f"Timestamp shift error: {e}")
-            return timestamp_str
+        return cues.shift(offset_seconds)
 
-    def load_existing_subtitles(self, video_info: dict, task_manager: Any) -> str:
-        """Loads from sidecar or extracts via ffmpeg."""
-        sub_info = video_info.get('subtitleInfo', {})
-        file_path = video_info.get('filePath')
+    # --- EMBEDDED TRACKS ---
 
-        # External SRT
-        if sub_info.get('subType') == 'external':
-            path = sub_info.get('externalPath') or (os.path.splitext(file_path)[0] + ".srt")
-            if os.path.exists(path):
-                logger.info(f"📄 Reading external SRT: {os.path.basename(path)}")
-                with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-                    return f.read()
+    @staticmethod
+    def best_embedded_track(
+        media: MediaInfo, language: Optional[str] = None, exclude_languages: Iterable[str] = ()
+    ) -> Optional[Dict[str, Any]]:
+        """Preferred text track: the requested language if present, full (not forced) tracks and SubRip first."""
+        excluded = {normalize_language(code) for code in exclude_languages} - {None}
+        tracks = [s for s in media.text_subtitle_streams if normalize_language(s.get("language")) not in excluded]
+        if not tracks:
+            return None
+        wanted = normalize_language(language) if language and language != "auto" else None
+        return min(tracks, key=lambda s: (
+            bool(wanted) and normalize_language(s.get("language")) != wanted,
+            bool(s.get("forced")),
+            s.get("codec") != "subrip"
+        ))
 
-        # Embedded Track
-        if sub_info.get('subType') == 'embedded':
-            return self.extract_embedded_subs(file_path, task_manager)
+    def _cache_key(self, fingerprint: str, stream_index: int) -> str:
+        return self.cache.make_key(fingerprint, "embedded", {"stream": stream_index}, None)
 
-        return ""
+    def embedded_cues(self, media: MediaInfo, stream: Dict[str, Any], fingerprint: Optional[str] = None) -> CueList:
+        """
+        Cues of one embedded text track. On a cache miss every text track of the file is
+        extracted in the same ffmpeg pass and cached, so picking another language later is free.
+        """
+        if self.cache and fingerprint:
+            segments = self.cache.get(self._cache_key(fingerprint, stream["index"]))
+            if segments is not None:
+                logger.info(f"💎 Embedded track #{stream['index']} served from cache")
+                return CueList.from_segments(segments)
 
-    def extract_embedded_subs(self, video_path: str, task_manager: Any, track_index: int = 0) -> str:
-        """Extracts an internal subtitle stream to a string using ffmpeg."""
-        temp_srt = f"{os.path.splitext(video_path)[0]}.tmp_extract.srt"
-        
-        cmd = [
-            'ffmpeg', '-y', '-i', video_path,
-            '-map', f'0:s:{track_index}',
-            '-f', 'srt', temp_srt
-        ]
+        tracks = self.extract_text_tracks(media.path, media.text_subtitle_streams)
+        if self.cache and fingerprint:
+            for index, cues in tracks.items():
+                self.cache.put(self._cache_key(fingerprint, index), cues.to_segments(), "embedded")
+        return tracks.get(stream["index"], CueList())
 
+    def extract_text_tracks(self, video_path: str, streams: List[Dict[str, Any]]) -> Dict[int, CueList]:
+        """
+        Demuxes every given text track in ONE ffmpeg pass, each converted to SRT and written
+        to its own pipe (no temp files). Returns {stream index: CueList}; failed tracks are left out.
+        """
+        if not streams:
+            return {}
+        logger.info(f"⚙️ Extracting {len(streams)} embedded text track(s) in one pass...")
+        pipes: List[Tuple[int, int]] = []
         try:
-            logger.info(f"⚙️ Extracting embedded track {track_index}...")
+            for _ in streams:
+                pipes.append(os.pipe())
+            cmd = ["ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-i", video_path]
+            for stream, (_, write_fd) in zip(streams, pipes):
+                cmd += ["-map", f"0:{stream['index']}", "-c:s", "srt", "-f", "srt", f"pipe:{write_fd}"]
             process = subprocess.Popen(
-                cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+                cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, pass_fds=[w for _, w in pipes]
             )
-            task_manager.active_pid = process.pid
-            process.communicate()
-            task_manager.active_pid = None
+        except BaseException:
+            # No ffmpeg (or out of fds): nobody will read these either
+            for read_fd, _ in pipes:
+                os.close(read_fd)
+            raise
+        finally:
+            # Only ffmpeg writes now; our copies must go so readers see EOF
+            for _, write_fd in pipes:
+                os.close(write_fd)
+
+        # One reader per pipe: ffmpeg interleaves the tracks and would block on any full pipe
+        outputs: List[bytes] = [b""] * len(streams)
+
+        def read(i: int, read_fd: int):
+            with os.fdopen(read_fd, "rb") as f:
+                outputs[i] = f.read()
+
+        readers = [threading.Thread(target=read, args=(i, r), daemon=True) for i, (r, _) in enumerate(pipes)]
+        for reader in readers:
+            reader.start()
+        err = process.stderr.read().decode(errors="ignore").strip()
+        process.stderr.close()
+        returncode = process.wait()
+        for reader in readers:
+            reader.join()
+        self.extractions += 1
 
-            if os.path.exists(temp_srt):
-                with open(temp_srt, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                os.remove(temp_srt)
-                return content
-        except Exception as e:
-            logger.error(f"Extraction failed: {e}")
-            
-        return ""
\ No newline at end of file
+        if returncode != 0:
+            logger.error(f"❌ Embedded track extraction failed: {err}")
+        tracks: Dict[int, CueList] = {}
+        for stream, raw in zip(streams, outputs):
+            cues = CueList.parse_srt(raw.decode("utf-8", errors="ignore"))
+            if len(cues):
+                tracks[stream["index"]] = cues
+        return tracks
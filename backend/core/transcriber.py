@@ -1,43 +1,93 @@
 import os
 import logging
+import queue
+import subprocess
+import threading
+import time
+import contextvars
 import ffmpeg
-import gc
+import numpy as np
 from faster_whisper import WhisperModel
-from typing import Callable, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from pathlib import Path
 
+from core.cues import CueList
+from core.media_info import media_probe
+from core.model_pool import ModelPool
+from core.parallel_transcribe import ChunkedTranscriber
+from core.transcript_cache import TranscriptCache, fingerprint_file
+
 logger = logging.getLogger("SubStudio.Transcriber")
 
+SAMPLE_RATE = 16000
+# Segments handed to on_segments at a time while transcribing
+SEGMENT_BATCH = 10
+
+# Named faster-whisper decoding settings, picked per job (GlobalOptions.decodingProfile).
+# They are part of the transcript cache key: change one and its old entries stop matching.
+# Segment times come from Whisper's own timestamps; word-level alignment is only paid for
+# in 'accurate', which also keeps every silent stretch (the pre-profile behaviour).
+_FALLBACK_TEMPERATURES = [0.0, 0.2, 0.4, 0.6, 0.8, 1.0]
+DECODING_PROFILES: Dict[str, Dict[str, Any]] = {
+    "fast": {
+        "beam_size": 1,
+        "best_of": 1,
+        "temperature": [0.0],
+        "vad_filter": True,
+        "vad_parameters": {"min_silence_duration_ms": 500},
+        "word_timestamps": False,
+        "condition_on_previous_text": False
+    },
+    "balanced": {
+        "beam_size": 5,
+        "temperature": _FALLBACK_TEMPERATURES,
+        "vad_filter": True,
+        "vad_parameters": {"min_silence_duration_ms": 1000},
+        "word_timestamps": False,
+        "condition_on_previous_text": False
+    },
+    "accurate": {
+        "beam_size": 5,
+        "best_of": 5,
+        "temperature": _FALLBACK_TEMPERATURES,
+        "vad_filter": False,
+        "word_timestamps": True,
+        "condition_on_previous_text": False
+    }
+}
+
 class VideoTranscriber:
     def __init__(self, model_size: str = "base"):
         """
         Initializes the state. 
-        The actual model is NOT loaded here to prevent pinning RAM at boot.
+        Models live in a shared pool; nothing is loaded here unless preload() is called.
         """
-        self.model = None
-        self.current_model_size = None
         self.default_model_size = model_size
+        self.models = ModelPool(self._load_model)
 
-    def _get_model(self, model_size: str):
-        """
-        Ensures the correct model is in memory.
-        If a different model is already loaded, it clears it first.
-        """
-        if self.model is None or self.current_model_size != model_size:
-            if self.model is not None:
-                logger.warning(f"Model mismatch. Clearing [{self.current_model_size}] to load [{model_size}]...")
-                self.model = None
-                gc.collect()  # Force RAM release
-            
-            logger.info(f"LOADING WHISPER MODEL: [{model_size}] (Device: CPU, Compute: int8)")
-            self.model = WhisperModel(model_size, device="cpu", compute_type="int8")
-            self.current_model_size = model_size
-        else:
-            logger.info(f"💎 Model [{self.current_model_size}] already in RAM. Reusing for next file.")
-        
-        return self.model
+        # 'stream' pipes PCM from ffmpeg straight into Whisper, 'wav' keeps the legacy .tmp.wav
+        self.audio_mode = os.getenv("AUDIO_MODE", "stream")
+        # Streamed audio is decoded in windows so RAM stays flat on 3-hour films
+        self.window_seconds = float(os.getenv("AUDIO_WINDOW_SECONDS", "600"))
+        self.prefetch_windows = 1
+
+        # Profile used when a job does not pick one (see DECODING_PROFILES)
+        self.default_profile = os.getenv("DECODING_PROFILE", "balanced")
+        self.cache = TranscriptCache()
+        # TRANSCRIBE_WORKERS > 1: long files are split at silences and transcribed on several cores
+        self.chunked = ChunkedTranscriber()
+
+    @staticmethod
+    def _load_model(model_size: str) -> WhisperModel:
+        return WhisperModel(model_size, device="cpu", compute_type="int8")
+
+    def preload(self):
+        """Warms the default model in the background (WHISPER_PRELOAD=0 to skip)."""
+        if os.getenv("WHISPER_PRELOAD", "1") != "0":
+            self.models.preload(self.default_model_size)
 
     def extract_audio(self, video_path: str) -> str:
+        """Writes the legacy 16 kHz mono .tmp.wav next to the video. Raises if ffmpeg fails."""
         audio_path = str(Path(video_path).with_suffix(".tmp.wav"))
         logger.info(f"Extracting audio for analysis...")
         try:
@@ -57,20 +107,184 @@ class VideoTranscriber:
             )
             return audio_path
         except ffmpeg.Error as e:
-            err = e.stderr.decode() if e.stderr else str(e)
+            err = e.stderr.decode(errors="ignore").strip() if e.stderr else str(e)
             logger.error(f"❌ Audio extraction failed: {err}")
-            return ""
-
-    def format_timestamp(self, seconds: float) -> str:
-        seconds = max(0, seconds)
-        milliseconds = int(round(seconds * 1000))
-        hours = milliseconds // 3600000
-        milliseconds %= 3600000
-        minutes = milliseconds // 60000
-        milliseconds %= 60000
-        secs = milliseconds // 1000
-        ms = milliseconds % 1000
-        return f"{hours:02}:{minutes:02}:{secs:02},{ms:03}"
+            # A half-written WAV must not be mistaken for the audio track
+            self.cleanup_audio(audio_path)
+            reason = err.splitlines()[-1] if err else "ffmpeg error"
+            raise Exception(f"Audio extraction failed: {reason}") from e
+
+    def iter_audio_windows(self, video_path: str) -> Iterator[Tuple[float, np.ndarray]]:
+        """
+        Decodes the audio track to 16 kHz mono float32 through ffmpeg's stdout, without touching disk.
+        Yields (offset_seconds, samples) windows. A background thread decodes the next window while
+        Whisper works on the current one; the hand-off queue keeps at most `prefetch_windows` waiting.
+        """
+        windows: queue.Queue = queue.Queue(maxsize=self.prefetch_windows)
+        stop = threading.Event()
+        done = object()
+
+        def hand_over(item) -> bool:
+            while not stop.is_set():
+                try:
+                    windows.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce():
+            try:
+                for window in self._decode_windows(video_path, stop):
+                    if not hand_over(window):
+                        return
+                hand_over(done)
+            except Exception as e:
+                hand_over(e)
+
+        # The reader thread logs on behalf of the same job
+        reader = threading.Thread(target=contextvars.copy_context().run, args=(produce,), name="substudio-audio", daemon=True)
+        reader.start()
+        try:
+            while True:
+                item = windows.get()
+                if item is done:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            reader.join(timeout=5)
+
+    def _decode_windows(self, video_path: str, stop: threading.Event) -> Iterator[Tuple[float, np.ndarray]]:
+        """Producer side of iter_audio_windows: reads ffmpeg PCM and cuts it at quiet points."""
+        window = int(self.window_seconds * SAMPLE_RATE)
+        # Look for a quiet spot in the last part of each window so we don't cut through a word
+        search = min(window // 4, 10 * SAMPLE_RATE)
+        read_bytes = 10 * SAMPLE_RATE * 2
+
+        cmd = [
+            "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error",
+            "-i", video_path, "-vn", "-sn", "-dn",
+            "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "pipe:1"
+        ]
+        logger.info(f"Streaming audio for analysis (no temp file)...")
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+        parts = []
+        buffered = 0
+        offset = 0
+        eof = False
+        try:
+            while not stop.is_set():
+                raw = process.stdout.read(read_bytes)
+                if raw:
+                    chunk = np.frombuffer(raw[: len(raw) - len(raw) % 2], dtype=np.int16)
+                    parts.append(chunk)
+                    buffered += len(chunk)
+                if buffered >= window or (not raw and buffered):
+                    pcm = np.concatenate(parts)
+                    cut = self._quiet_cut(pcm, window, search) if raw else len(pcm)
+                    yield offset / SAMPLE_RATE, pcm[:cut].astype(np.float32) / 32768.0
+                    offset += cut
+                    parts = [pcm[cut:]] if cut < len(pcm) else []
+                    buffered = len(pcm) - cut
+                if not raw:
+                    eof = True
+                    break
+        finally:
+            # At EOF ffmpeg has closed its pipe but may still be exiting: let it finish.
+            # Only a consumer that stopped early (or an error) leaves a running decoder to kill.
+            if not eof and process.poll() is None:
+                process.kill()
+            process.stdout.close()
+            err = process.stderr.read().decode(errors="ignore").strip()
+            process.stderr.close()
+            returncode = process.wait()
+
+        if not stop.is_set() and (returncode != 0 or offset == 0):
+            logger.error(f"❌ Audio streaming failed: {err or 'no audio decoded'}")
+            raise Exception("Could not prepare audio for transcription.")
+
+    def iter_audio_ranges(self, video_path: str, ranges: List[Tuple[float, float]]) -> Iterator[Tuple[float, np.ndarray]]:
+        """
+        Decodes only the given (start, end) second ranges, each with its own input-seeking
+        ffmpeg call, as (offset_seconds, samples) windows of at most AUDIO_WINDOW_SECONDS.
+        """
+        for range_start, range_end in ranges:
+            start = range_start
+            while start < range_end:
+                length = min(self.window_seconds, range_end - start)
+                cmd = [
+                    "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error",
+                    "-ss", f"{start:.3f}", "-t", f"{length:.3f}", "-i", video_path,
+                    "-vn", "-sn", "-dn", "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "pipe:1"
+                ]
+                result = subprocess.run(cmd, capture_output=True)
+                if result.returncode != 0:
+                    err = result.stderr.decode(errors="ignore").strip()
+                    logger.error(f"❌ Audio range decode failed at {start:.1f}s: {err}")
+                    raise Exception("Could not prepare audio for transcription.")
+                raw = result.stdout
+                pcm = np.frombuffer(raw[: len(raw) - len(raw) % 2], dtype=np.int16)
+                if len(pcm):
+                    yield start, pcm.astype(np.float32) / 32768.0
+                start += length
+
+    @staticmethod
+    def _quiet_cut(pcm: np.ndarray, window: int, search: int) -> int:
+        """Index of the quietest 100 ms frame in [window - search, window)."""
+        frame = SAMPLE_RATE // 10
+        start = window - search
+        frames = search // frame
+        if frames == 0:
+            return window
+        energy = np.abs(pcm[start:start + frames * frame].astype(np.int32)).reshape(frames, frame).mean(axis=1)
+        return start + int(np.argmin(energy)) * frame + frame // 2
+
+    def decoding_for(self, profile: Optional[str] = None) -> Dict[str, Any]:
+        """faster-whisper keyword arguments of a decoding profile (unknown names fall back to 'balanced')."""
+        name = profile or self.default_profile
+        if name not in DECODING_PROFILES:
+            logger.warning(f"⚠️ Unknown decoding profile [{name}], using [balanced]")
+            name = "balanced"
+        return DECODING_PROFILES[name]
+
+    @property
+    def decoding(self) -> Dict[str, Any]:
+        return self.decoding_for()
+
+    def fingerprint(self, video_path: str) -> str:
+        return fingerprint_file(video_path)
+
+    def cache_key(
+        self,
+        fingerprint: str,
+        model_size: Optional[str],
+        context_prompt: Optional[str],
+        ranges: Optional[List[Tuple[float, float]]] = None,
+        profile: Optional[str] = None
+    ) -> str:
+        """`ranges` set for a gap-only transcription: the same file with other gaps is another entry."""
+        decoding = self.decoding_for(profile)
+        if ranges is not None:
+            return self.cache.make_key(
+                fingerprint, model_size or self.default_model_size,
+                {**decoding, "ranges": [[round(a, 3), round(b, 3)] for a, b in ranges]}, context_prompt
+            )
+        if self.chunked.enabled and self.audio_mode == "stream":
+            # Chunks are decoded independently, which changes the output slightly
+            decoding = {**decoding, "chunk_seconds": self.chunked.chunk_seconds}
+        return self.cache.make_key(fingerprint, model_size or self.default_model_size, decoding, context_prompt)
+
+    def cached_transcript(self, cache_key: str) -> Optional[CueList]:
+        """Cues rebuilt from cached segments, or None on a miss."""
+        segments = self.cache.get(cache_key)
+        if segments is None:
+            return None
+        logger.info(f"💎 Transcript cache hit ({len(segments)} segments). Skipping Whisper.")
+        return CueList.from_segments(segments)
 
     def transcribe(
         self, 
@@ -80,78 +294,282 @@ class VideoTranscriber:
         current_file: int,
         total_files: int,
         model_size: Optional[str] = None,
-        context_prompt: Optional[str] = None
-    ) -> str:
+        context_prompt: Optional[str] = None,
+        cache_key: Optional[str] = None,
+        on_segments: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+        profile: Optional[str] = None,
+        timing: Optional[Dict[str, float]] = None
+    ) -> CueList:
+        """
+        Decodes the audio track (streamed or via temp WAV, see AUDIO_MODE) and transcribes it.
+        `on_segments` receives finished segments in batches while Whisper is still running.
+        `timing`, if given, gets "inference_seconds": the run without model loading.
+        """
+        file_prefix = f"[{current_file}/{total_files} Files]"
+
+        if self.audio_mode == "stream" and self.chunked.enabled:
+            on_progress(file_id, "transcribing", 5, f"{file_prefix} Step 2/5: Streaming audio...")
+            return self.transcribe_chunked(
+                video_path, file_id, on_progress, file_prefix,
+                model_size or self.default_model_size, context_prompt, cache_key, on_segments, profile, timing
+            )
+
+        if self.audio_mode == "stream":
+            on_progress(file_id, "transcribing", 5, f"{file_prefix} Step 2/5: Streaming audio...")
+            return self.transcribe_audio(
+                audio=self.iter_audio_windows(video_path),
+                file_id=file_id,
+                on_progress=on_progress,
+                current_file=current_file,
+                total_files=total_files,
+                model_size=model_size,
+                context_prompt=context_prompt,
+                total_duration=self.probe_duration(video_path),
+                cache_key=cache_key,
+                on_segments=on_segments,
+                profile=profile,
+                timing=timing
+            )
+
         audio_file = ""
+        try:
+            on_progress(file_id, "transcribing", 5, f"{file_prefix} Step 2/5: Extracting audio...")
+            audio_file = self.extract_audio(video_path)
+
+            return self.transcribe_audio(
+                audio=audio_file,
+                file_id=file_id,
+                on_progress=on_progress,
+                current_file=current_file,
+                total_files=total_files,
+                model_size=model_size,
+                context_prompt=context_prompt,
+                cache_key=cache_key,
+                on_segments=on_segments,
+                profile=profile,
+                timing=timing
+            )
+        finally:
+            self.cleanup_audio(audio_file)
+
+    def transcribe_chunked(
+        self,
+        video_path: str,
+        file_id: str,
+        on_progress: Callable,
+        file_prefix: str,
+        model_size: str,
+        context_prompt: Optional[str],
+        cache_key: Optional[str],
+        on_segments: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+        profile: Optional[str] = None,
+        timing: Optional[Dict[str, float]] = None
+    ) -> CueList:
+        """
+        Speech regions transcribed in parallel by the ChunkedTranscriber pool, stitched back in order.
+        `on_segments` gets the stitched prefix each time the finished chunks extend it.
+        """
+        total_duration = self.probe_duration(video_path)
+        last_pct = -1
+
+        def on_chunk(done: int, submitted: int, decoded: float):
+            nonlocal last_pct
+            # Share of the audio decoded so far, scaled by the share of its chunks already transcribed
+            ratio = (done / submitted) * (min(decoded / total_duration, 1.0) if total_duration else 1.0)
+            pct = int(ratio * 100)
+            if pct > last_pct:
+                last_pct = pct
+                on_progress(file_id, "transcribing", 10 + int(ratio * 80), f"{file_prefix} Step 2/5: AI Transcribing ({pct}%)")
+
+        try:
+            logger.info(
+                f"Faster-Whisper chunked inference on [{model_size}]: "
+                f"{self.chunked.workers} workers x {self.chunked.threads_per_worker} threads"
+            )
+            # Worker start-up and model loading are not part of the inference time
+            self.chunked.ensure_ready(model_size)
+            started = time.perf_counter()
+            collected = self.chunked.transcribe(
+                self.iter_audio_windows(video_path), model_size, context_prompt, self.decoding_for(profile),
+                on_chunk, on_segments
+            )
+            if timing is not None:
+                timing["inference_seconds"] = time.perf_counter() - started
+            on_progress(file_id, "transcribing", 95, f"{file_prefix} Step 2/5: Finalizing subtitles...")
+            if cache_key:
+                self.cache.put(cache_key, collected, model_size)
+            return CueList.from_segments(collected)
+        except Exception as e:
+            logger.error(f"❌ {file_prefix} Transcription error: {str(e)}")
+            raise e
+
+    def transcribe_ranges(
+        self,
+        video_path: str,
+        ranges: List[Tuple[float, float]],
+        file_id: str,
+        on_progress: Callable,
+        current_file: int,
+        total_files: int,
+        model_size: Optional[str] = None,
+        context_prompt: Optional[str] = None,
+        cache_key: Optional[str] = None,
+        on_segments: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+        profile: Optional[str] = None,
+        timing: Optional[Dict[str, float]] = None
+    ) -> CueList:
+        """
+        Transcribes only the (start, end) second ranges (the gaps of a partial subtitle),
+        returning cues on the film's clock. Progress is measured over the ranges, not the film.
+        """
+        file_prefix = f"[{current_file}/{total_files} Files]"
+        total = sum(end - start for start, end in ranges)
+        # Seconds of range audio that lie before each range
+        before = np.cumsum([0.0] + [end - start for start, end in ranges]).tolist()
+        starts = np.array([start for start, _ in ranges])
+
+        def ratio(position: float) -> float:
+            i = max(0, int(np.searchsorted(starts, position, side="right")) - 1)
+            done = before[i] + min(max(position - ranges[i][0], 0.0), ranges[i][1] - ranges[i][0])
+            return min(done / total, 1.0) if total else 1.0
+
+        on_progress(file_id, "transcribing", 5, f"{file_prefix} Step 2/5: Decoding {len(ranges)} uncovered range(s)...")
+        return self.transcribe_audio(
+            audio=self.iter_audio_ranges(video_path, ranges),
+            file_id=file_id,
+            on_progress=on_progress,
+            current_file=current_file,
+            total_files=total_files,
+            model_size=model_size,
+            context_prompt=context_prompt,
+            cache_key=cache_key,
+            on_segments=on_segments,
+            position_ratio=ratio,
+            profile=profile,
+            timing=timing
+        )
+
+    def probe_duration(self, video_path: str) -> Optional[float]:
+        """Container duration in seconds (shared MediaInfo cache), used for progress when audio is streamed."""
+        try:
+            return media_probe.get(video_path).duration
+        except Exception as e:
+            logger.debug(f"Duration probe failed for {video_path}: {e}")
+            return None
+
+    def cleanup_audio(self, audio_file: str):
+        if audio_file and os.path.exists(audio_file):
+            try:
+                os.remove(audio_file)
+                logger.info(f"Cleaned up temporary audio: {os.path.basename(audio_file)}")
+            except:
+                pass
+
+    def transcribe_audio(
+        self, 
+        audio: Union[str, Iterable[Tuple[float, np.ndarray]]], 
+        file_id: str, 
+        on_progress: Callable,
+        current_file: int,
+        total_files: int,
+        model_size: Optional[str] = None,
+        context_prompt: Optional[str] = None,
+        total_duration: Optional[float] = None,
+        cache_key: Optional[str] = None,
+        on_segments: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+        position_ratio: Optional[Callable[[float], float]] = None,
+        profile: Optional[str] = None,
+        timing: Optional[Dict[str, float]] = None
+    ) -> CueList:
+        """
+        Runs Whisper on either an extracted audio file path (the caller owns the file)
+        or an iterable of (offset_seconds, samples) windows from iter_audio_windows.
+        `position_ratio` maps a position in seconds to the share of the work done, when
+        the windows don't cover the whole film (see transcribe_ranges).
+        When a cache_key is given, the resulting segments are stored in the transcript cache.
+        `on_segments` gets every SEGMENT_BATCH new segments (and the rest at the end), in order.
+        """
         file_prefix = f"[{current_file}/{total_files} Files]"
         
         # Use provided model size or fall back to class default
         target_size = model_size or self.default_model_size
+        decoding = self.decoding_for(profile)
 
         try:
-            # 1. Prepare Audio
-            on_progress(file_id, "transcribing", 5, f"{file_prefix} Step 2/5: Extracting audio...")
-            audio_file = self.extract_audio(video_path)
-            
-            if not audio_file or not os.path.exists(audio_file):
-                raise Exception("Could not prepare audio for transcription.")
+            # 1. Check Audio
+            if isinstance(audio, str):
+                if not audio or not os.path.exists(audio):
+                    raise Exception("Could not prepare audio for transcription.")
+                windows = [(0.0, audio)]
+            else:
+                windows = audio
 
-            # 2. Get/Load Model (Caching logic)
-            whisper = self._get_model(target_size)
+            # 2. Lease the model from the pool (loaded once, kept while RAM budget allows)
+            with self.models.lease(target_size) as whisper:
+                # 3. Context Logging
+                if context_prompt:
+                    logger.info(f"CONTEXT BIASING: Providing initial prompt ({len(context_prompt)} chars)")
+                    # logger.debug(f"Prompt content: {context_prompt}")
+                else:
+                    logger.warning("⚠️ No context profile provided for this transcription.")
 
-            # 3. Context Logging
-            if context_prompt:
-                logger.info(f"CONTEXT BIASING: Providing initial prompt ({len(context_prompt)} chars)")
-                # logger.debug(f"Prompt content: {context_prompt}")
-            else:
-                logger.warning("⚠️ No context profile provided for this transcription.")
-
-            # 4. AI Inference
-            logger.info(f"Faster-Whisper inference starting on [{target_size}]...")
-            segments, info = whisper.transcribe(
-                audio_file, 
-                beam_size=5, 
-                word_timestamps=True,
-                initial_prompt=context_prompt, # Injecting your "Thor/Viking" context here
-                condition_on_previous_text=False
-            )
-            
-            total_duration = info.duration
-            srt_blocks = []
-            last_logged_pct = -1
-
-            for segment in segments:
-                progress_val = 10 + int((segment.end / total_duration) * 80)
-                on_progress(
-                    file_id, 
-                    "transcribing", 
-                    progress_val, 
-                    f"{file_prefix} Step 2/5: AI Transcribing ({int((segment.end / total_duration) * 100)}%)"
-                )
+                # 4. AI Inference (timed from here: the lease may have waited for a load)
+                started = time.perf_counter()
+                logger.info(f"Faster-Whisper inference starting on [{target_size}] ({profile or self.default_profile} profile)...")
+                collected: List[Dict[str, Any]] = []
+                last_logged_pct = -1
+                last_emitted_pct = -1
+                fed = 0
+
+                for offset, window in windows:
+                    segments, info = whisper.transcribe(
+                        window, 
+                        initial_prompt=context_prompt, # Injecting your "Thor/Viking" context here
+                        **decoding
+                    )
+                    # Without a probed duration, progress is relative to what we have decoded so far
+                    duration = total_duration or (offset + info.duration)
+
+                    for segment in segments:
+                        seg_end = offset + segment.end
+                        if position_ratio:
+                            ratio = position_ratio(seg_end)
+                        else:
+                            ratio = min(seg_end / duration, 1.0) if duration else 0.0
+                        progress_val = 10 + int(ratio * 80)
+                        current_pct = int(ratio * 100)
+                        # One event per visible percent, not per segment
+                        if current_pct != last_emitted_pct:
+                            last_emitted_pct = current_pct
+                            on_progress(
+                                file_id, 
+                                "transcribing", 
+                                progress_val, 
+                                f"{file_prefix} Step 2/5: AI Transcribing ({current_pct}%)"
+                            )
 
-                # Terminal log every 10%
-                current_pct = int((segment.end / total_duration) * 100)
-                if current_pct >= last_logged_pct + 10:
-                    logger.info(f"Transcription Progress: {current_pct}%")
-                    last_logged_pct = (current_pct // 10) * 10
+                        # Terminal log every 10%
+                        if current_pct >= last_logged_pct + 10:
+                            logger.info(f"Transcription Progress: {current_pct}%")
+                            last_logged_pct = (current_pct // 10) * 10
 
-                start = self.format_timestamp(segment.start)
-                end = self.format_timestamp(segment.end)
-                text = segment.text.strip()
-                
-                if text:
-                    srt_blocks.append(f"{len(srt_blocks) + 1}\n{start} --> {end}\n{text}\n")
+                        text = segment.text.strip()
+                        if text:
+                            collected.append({"start": offset + segment.start, "end": seg_end, "text": text})
+                        if on_segments and len(collected) - fed >= SEGMENT_BATCH:
+                            on_segments(collected[fed:])
+                            fed = len(collected)
+
+                if on_segments and fed < len(collected):
+                    on_segments(collected[fed:])
+                if timing is not None:
+                    timing["inference_seconds"] = time.perf_counter() - started
 
             on_progress(file_id, "transcribing", 95, f"{file_prefix} Step 2/5: Finalizing subtitles...")
-            return "\n".join(srt_blocks)
+            if cache_key:
+                self.cache.put(cache_key, collected, target_size)
+            return CueList.from_segments(collected)
 
         except Exception as e:
             logger.error(f"❌ {file_prefix} Transcription error: {str(e)}")
             raise e
-        finally:
-            if audio_file and os.path.exists(audio_file):
-                try:
-                    os.remove(audio_file)
-                    logger.info(f"Cleaned up temporary audio: {os.path.basename(audio_file)}")
-                except:
-                    pass
\ No newline at end of file
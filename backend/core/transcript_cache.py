@@ -0,0 +1,148 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("SubStudio.TranscriptCache")
+
+CACHE_ROOT = os.getenv("SUBSTUDIO_CACHE_DIR", "/root/.cache/substudio")
+
+# Bytes hashed at each sample point (head, middle, tail) for the content fingerprint
+SAMPLE_BYTES = 1024 * 1024
+
+def fingerprint_file(path: str) -> str:
+    """
+    Fast content fingerprint: file size + three 1 MiB samples.
+    Depends only on the bytes, so a renamed or moved file keeps its fingerprint.
+    """
+    size = os.path.getsize(path)
+    digest = hashlib.sha256(str(size).encode())
+    with open(path, "rb") as f:
+        for pos in (0, max(0, size // 2 - SAMPLE_BYTES // 2), max(0, size - SAMPLE_BYTES)):
+            f.seek(pos)
+            digest.update(f.read(SAMPLE_BYTES))
+    return digest.hexdigest()
+
+class TranscriptCache:
+    """
+    Persistent, content-addressed store of Whisper results (segments, not SRT text).
+    Entries are JSON files named by key; mtime doubles as the LRU clock and the
+    oldest entries are evicted once the directory grows past `max_bytes`.
+    """
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        self.cache_dir = cache_dir or os.path.join(CACHE_ROOT, "transcripts")
+        self.context_dir = os.path.join(self.cache_dir, "contexts")
+        self.max_bytes = max_bytes or int(os.getenv("TRANSCRIPT_CACHE_MB", "512")) * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(self.context_dir, exist_ok=True)
+        self._sizes: Dict[str, int] = {}
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and entry.name.endswith(".json"):
+                self._sizes[entry.path] = entry.stat().st_size
+
+    def make_key(self, fingerprint: str, model_size: str, decoding: Dict[str, Any], prompt: Optional[str]) -> str:
+        payload = json.dumps(
+            {"fp": fingerprint, "model": model_size, "decoding": decoding, "prompt": prompt or ""},
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Returns the cached segments ({start, end, text}) or None."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+            os.utime(path)  # LRU touch
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return [{"start": s, "end": e, "text": t} for s, e, t in payload["segments"]]
+
+    def put(self, key: str, segments: List[Dict[str, Any]], model_size: str):
+        payload = {
+            "model": model_size,
+            "created": time.time(),
+            "segments": [[s["start"], s["end"], s["text"]] for s in segments]
+        }
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not write transcript cache entry: {e}")
+            return
+
+        with self._lock:
+            self._sizes[path] = os.path.getsize(path)
+            self._evict()
+
+    def _evict(self):
+        """Drops least recently used entries until we are under budget. Caller holds the lock."""
+        total = sum(self._sizes.values())
+        if total <= self.max_bytes:
+            return
+
+        def last_used(path: str) -> float:
+            try:
+                return os.path.getmtime(path)
+            except OSError:
+                return 0.0
+
+        for path in sorted(self._sizes, key=last_used):
+            if total <= self.max_bytes:
+                break
+            total -= self._sizes.pop(path)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            self.evictions += 1
+            logger.debug(f"Evicted transcript cache entry {os.path.basename(path)}")
+
+    def get_context(self, fingerprint: str) -> Optional[str]:
+        """
+        The story-bible prompt used the first time this content was transcribed.
+        Reusing it keeps the transcript key stable across re-runs and renames.
+        """
+        try:
+            with open(os.path.join(self.context_dir, f"{fingerprint}.txt"), "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put_context(self, fingerprint: str, context: str):
+        try:
+            with open(os.path.join(self.context_dir, f"{fingerprint}.txt"), "w", encoding="utf-8") as f:
+                f.write(context)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not store context profile: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._sizes),
+                "bytes": sum(self._sizes.values()),
+                "maxBytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hitRate": round(self.hits / lookups, 3) if lookups else 0.0
+            }
@@ -0,0 +1,132 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from core.transcript_cache import CACHE_ROOT
+
+logger = logging.getLogger("SubStudio.TranslationMemory")
+
+def normalize_cue(text: str) -> str:
+    """Collapses whitespace and line breaks so re-wrapped lines still match."""
+    return " ".join(text.split())
+
+def profile_hash(*parts: Any) -> str:
+    """Short hash of everything that shapes a translation besides the text (story bible, source type)."""
+    return hashlib.sha1("\x1f".join(str(p) for p in parts).encode()).hexdigest()[:16]
+
+def estimate_tokens(text: str) -> int:
+    """Rough GPT tokenizer estimate (~4 chars per token), good enough for savings reports."""
+    return max(1, len(text) // 4)
+
+class TranslationMemory:
+    """
+    Persistent per-cue translation memory in SQLite.
+    Rows are keyed by (normalized source hash, target language, context profile hash)
+    and evicted least-recently-used once `max_entries` is exceeded.
+    """
+    def __init__(self, db_path: Optional[str] = None, max_entries: Optional[int] = None):
+        self.db_path = db_path or os.path.join(CACHE_ROOT, "translation_memory.sqlite3")
+        self.max_entries = max_entries or int(os.getenv("TRANSLATION_MEMORY_MAX_ENTRIES", "500000"))
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS tm (
+                src_hash TEXT NOT NULL,
+                lang TEXT NOT NULL,
+                profile TEXT NOT NULL,
+                translation TEXT NOT NULL,
+                last_used REAL NOT NULL,
+                uses INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (src_hash, lang, profile)
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS tm_last_used ON tm (last_used)")
+        self.db.commit()
+
+    @staticmethod
+    def _hash(normalized: str) -> str:
+        return hashlib.sha1(normalized.encode()).hexdigest()
+
+    def lookup_many(self, sources: Iterable[str], lang: str, profile: str) -> Dict[str, str]:
+        """Maps each normalized source found in memory to its stored translation."""
+        by_hash = {self._hash(s): s for s in sources}
+        found: Dict[str, str] = {}
+        if not by_hash:
+            return found
+
+        hashes = list(by_hash)
+        with self._lock:
+            # Chunked to stay under SQLite's bound-parameter limit
+            for i in range(0, len(hashes), 500):
+                chunk = hashes[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self.db.execute(
+                    f"SELECT src_hash, translation FROM tm WHERE lang = ? AND profile = ? AND src_hash IN ({marks})",
+                    (lang, profile, *chunk)
+                ).fetchall()
+                for src_hash, translation in rows:
+                    found[by_hash[src_hash]] = translation
+
+            if found:
+                now = time.time()
+                self.db.executemany(
+                    "UPDATE tm SET last_used = ?, uses = uses + 1 WHERE src_hash = ? AND lang = ? AND profile = ?",
+                    [(now, self._hash(s), lang, profile) for s in found]
+                )
+                self.db.commit()
+
+            self.hits += len(found)
+            self.misses += len(by_hash) - len(found)
+        return found
+
+    def store_many(self, pairs: Iterable[Tuple[str, str]], lang: str, profile: str):
+        """Saves (normalized source, translation) pairs."""
+        now = time.time()
+        rows = [(self._hash(src), lang, profile, dst, now) for src, dst in pairs]
+        if not rows:
+            return
+        with self._lock:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO tm (src_hash, lang, profile, translation, last_used) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self._evict()
+            self.db.commit()
+
+    def _evict(self):
+        """Caller holds the lock."""
+        count = self.db.execute("SELECT COUNT(*) FROM tm").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self.db.execute(
+                "DELETE FROM tm WHERE rowid IN (SELECT rowid FROM tm ORDER BY last_used ASC LIMIT ?)",
+                (overflow,)
+            )
+            logger.debug(f"Evicted {overflow} translation memory entries")
+
+    def record_savings(self, tokens: int):
+        with self._lock:
+            self.tokens_saved += tokens
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = self.db.execute("SELECT COUNT(*) FROM tm").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "maxEntries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "estimatedTokensSaved": self.tokens_saved
+            }
@@ -1,20 +1,107 @@
 import os
+import json
+import bisect
+import random
+import asyncio
 import logging
 import time
-from openai import OpenAI
-from typing import Callable, Any, List
+import httpx
+from collections import OrderedDict, deque
+from openai import AsyncOpenAI, APIConnectionError, APIStatusError
+from typing import Callable, Any, Dict, List, Optional, Tuple
+
+from core.cue_stream import CueStream
+from core.cues import CueList
+from core.rate_limit import RateLimiter
+from core.translation_memory import TranslationMemory, estimate_tokens, normalize_cue, profile_hash
 
 logger = logging.getLogger("SubStudio.Translator")
 
+# Story bible used when the context research fails
+NEUTRAL_CONTEXT = "Neutral media content. No specific character data."
+
+class BatchTelemetry:
+    """
+    Rolling record of LLM batches (size, tokens, latency) so operators can tune
+    TRANSLATOR_BATCH_INPUT_TOKENS / TRANSLATOR_BATCH_OUTPUT_TOKENS for throughput.
+    """
+    def __init__(self, keep: int = 500):
+        self.recent = deque(maxlen=keep)
+        self.batches = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latency_ms = 0.0
+
+    def record(self, entry: Dict[str, Any]):
+        self.recent.append(entry)
+        self.batches += 1
+        self.prompt_tokens += entry["promptTokens"]
+        self.completion_tokens += entry["completionTokens"]
+        self.latency_ms += entry["latencyMs"]
+
+    def stats(self, last: int = 50) -> Dict[str, Any]:
+        n = max(1, self.batches)
+        seconds = self.latency_ms / 1000
+        return {
+            "batches": self.batches,
+            "promptTokens": self.prompt_tokens,
+            "completionTokens": self.completion_tokens,
+            "avgLatencyMs": round(self.latency_ms / n, 1),
+            "avgCuesPerBatch": round(sum(e["cues"] for e in self.recent) / max(1, len(self.recent)), 1),
+            # Sequential-equivalent throughput; in-flight concurrency multiplies it
+            "completionTokensPerSecond": round(self.completion_tokens / seconds, 1) if seconds else 0.0,
+            "recent": list(self.recent)[-last:]
+        }
+
 class SubtitleTranslator:
     def __init__(self, api_key: str = None):
-        self.client = OpenAI(api_key=api_key or os.getenv("OPENAI_API_KEY"))
+        self.max_in_flight = int(os.getenv("TRANSLATOR_MAX_IN_FLIGHT", "4"))
+        # One pooled HTTP client for every batch; retries are handled here, not by the SDK.
+        # OPENAI_BASE_URL points this at any OpenAI-compatible server (e.g. a local fake for tests).
+        self.client = AsyncOpenAI(
+            api_key=api_key or os.getenv("OPENAI_API_KEY"),
+            max_retries=0,
+            timeout=120.0,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=self.max_in_flight * 2, max_keepalive_connections=self.max_in_flight)
+            )
+        )
         self.model = "gpt-4o-mini"  # High intelligence, low latency
+        self.limiter = RateLimiter()
+        self.max_retries = int(os.getenv("TRANSLATOR_MAX_RETRIES", "4"))
+        # One request per batch for all target languages instead of one per language
+        self.multi_target = os.getenv("TRANSLATOR_MULTI_TARGET", "1") == "1"
+        # How many times broken cues of a batch are re-requested before keeping the source text
+        self.repair_rounds = int(os.getenv("TRANSLATOR_REPAIR_ROUNDS", "2"))
+        self.repaired_cues = 0
+
+        # Batches are sized by estimated tokens rather than a fixed cue count
+        self.batch_input_tokens = int(os.getenv("TRANSLATOR_BATCH_INPUT_TOKENS", "1200"))
+        self.batch_output_tokens = int(os.getenv("TRANSLATOR_BATCH_OUTPUT_TOKENS", "3000"))
+        self.batch_max_cues = int(os.getenv("TRANSLATOR_BATCH_MAX_CUES", "120"))
+        # Neighbouring cues sent (read-only) on each side of a batch for narrative continuity
+        self.context_cues = int(os.getenv("TRANSLATOR_CONTEXT_CUES", "3"))
+        self.telemetry = BatchTelemetry()
+        self.memory = TranslationMemory()
+        # TRANSLATOR_MAX_IN_FLIGHT is global: every file, language pass and early stream shares it
+        self._in_flight: Optional[asyncio.Semaphore] = None
+        self._in_flight_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Per file/language savings, most recent last
+        self.file_reports: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+
+    def in_flight_limit(self) -> asyncio.Semaphore:
+        """The translator-wide request semaphore, created on (and bound to) the running loop."""
+        loop = asyncio.get_running_loop()
+        if self._in_flight is None or self._in_flight_loop is not loop:
+            self._in_flight = asyncio.Semaphore(self.max_in_flight)
+            self._in_flight_loop = loop
+        return self._in_flight
 
-    def get_context_profile(self, filename: str) -> str:
+    async def get_context_profile(self, filename: str) -> Optional[str]:
         """
         Research Phase: Identifies the show/movie to ensure character names 
         and gender-specific grammar are correct.
+        Returns None if the research failed; callers fall back to NEUTRAL_CONTEXT.
         """
         logger.info(f"AI searching filename context: {filename}")
         
@@ -27,19 +114,18 @@ class SubtitleTranslator:
         If unknown, infer from keywords."""
 
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            return await self._call_llm(
                 messages=[{"role": "user", "content": prompt}],
-                temperature=0.3
+                temperature=0.3,
+                expected_output=400
             )
-            return response.choices[0].message.content.strip()
         except Exception as e:
             logger.error(f"   ❌ Context Research failed: {e}")
-            return "Neutral media content. No specific character data."
+            return None
 
-    def refine_and_translate(
+    async def refine_and_translate(
         self, 
-        srt_content: str, 
+        cues: CueList, 
         target_lang: str, 
         file_id: str, 
         on_progress: Callable, 
@@ -48,90 +134,522 @@ class SubtitleTranslator:
         current_file: int,
         total_files: int,
         is_whisper_source: bool = False
-    ) -> str:
+    ) -> Optional[CueList]:
+        """Single-language convenience wrapper around translate_targets."""
+        translations = await self.translate_targets(
+            cues=cues,
+            target_langs=[target_lang],
+            file_id=file_id,
+            on_progress=on_progress,
+            task_manager=task_manager,
+            context_profile=context_profile,
+            current_file=current_file,
+            total_files=total_files,
+            is_whisper_source=is_whisper_source
+        )
+        return translations.get(target_lang)
+
+    async def translate_targets(
+        self, 
+        cues: CueList, 
+        target_langs: List[str], 
+        file_id: str, 
+        on_progress: Callable, 
+        task_manager: Any,
+        context_profile: str,
+        current_file: int,
+        total_files: int,
+        is_whisper_source: bool = False,
+        prefetched: Optional[Dict[str, Dict[str, str]]] = None
+    ) -> Dict[str, CueList]:
         """
-        Processes the SRT in batches to avoid token limits and maintain format.
+        Processes the cues in batches to avoid token limits and maintain format.
+        Only texts travel through here; timings stay in the CueList and every translation
+        shares them. Cues already in the translation memory (or repeated within the file)
+        are served locally; each remaining batch is sent ONCE and asks for all missing
+        languages in a single structured reply (TRANSLATOR_MULTI_TARGET=1). Cues that fail
+        validation in any language are re-requested on their own. Up to
+        TRANSLATOR_MAX_IN_FLIGHT batches run at once and results are reassembled in cue order.
+        `prefetched` ({lang: {normalized cue: translation}}, see translate_stream) holds
+        cues already translated while Whisper was still running; only the rest is sent.
+        Returns {lang: CueList}, empty if aborted.
         Includes terminal logging for every 20% of progress.
         """
-        blocks = srt_content.strip().split('\n\n')
-        batch_size = 30 
-        results = []
-        total_batches = (len(blocks) + batch_size - 1) // batch_size
+        prefetched = prefetched or {}
+        texts = cues.texts
+        langs_label = ", ".join(l.upper() for l in target_langs)
         
         prefix = f"[{current_file}/{total_files} Files]"
-        logger.info(f"Translating {len(blocks)} blocks into {target_lang.upper()}...")
+        logger.info(f"Translating {len(texts)} blocks into {langs_label}...")
+
+        # 1. Collapse duplicates and serve what the memory already knows
+        profile = profile_hash(self.model, context_profile, is_whisper_source)
+        norms = [normalize_cue(t) for t in texts]
+        unique: Dict[str, Tuple[int, str]] = {}
+        for pos, (norm, text) in enumerate(zip(norms, texts)):
+            if norm:
+                unique.setdefault(norm, (pos, text))
+
+        known: Dict[str, Dict[str, str]] = {}
+        missing: Dict[str, set] = {}
+        for lang in target_langs:
+            streamed = {norm: text for norm, text in prefetched.get(lang, {}).items() if norm in unique}
+            lookup = [norm for norm in unique if norm not in streamed]
+            known[lang] = await asyncio.to_thread(self.memory.lookup_many, lookup, lang, profile)
+            known[lang].update(streamed)
+            missing[lang] = {norm for norm in unique if norm not in known[lang]}
+            self._report_savings(file_id, lang, prefix, norms, missing[lang], set(streamed))
 
-        last_logged_pct = -1
+        # Every cue that at least one language still needs, in file order
+        pending = [item for norm, item in unique.items() if any(norm in missing[l] for l in target_langs)]
 
-        for i in range(0, len(blocks), batch_size):
-            if task_manager.is_aborted:
-                logger.warning(f"   🛑 {prefix} Translation aborted by user.")
-                return ""
+        # 2. Send the misses to the LLM, several batches at a time
+        batches = self._plan_batches(pending, len(target_langs))
+        total_batches = max(1, len(batches))
+        in_flight = self.in_flight_limit()
+        progress = {"done": 0, "logged": -1}
+
+        async def run_batch(batch_idx: int, batch: List[Tuple[int, str]]) -> Dict[str, Dict[int, str]]:
+            langs = [l for l in target_langs if any(norms[pos] in missing[l] for pos, _ in batch)]
+            first, last = batch[0][0], batch[-1][0]
+            neighbours = {
+                "before": [t for t in texts[max(0, first - self.context_cues):first] if t.strip()],
+                "after": [t for t in texts[last + 1:last + 1 + self.context_cues] if t.strip()]
+            }
+            async with in_flight:
+                if task_manager.is_aborted:
+                    return {}
+                translated = await self._translate_batch(
+                    batch, langs, context_profile, is_whisper_source,
+                    f"{prefix} Batch {batch_idx + 1}", neighbours, file_id
+                )
 
-            batch = blocks[i : i + batch_size]
-            batch_text = "\n\n".join(batch)
-            current_batch_idx = (i // batch_size) + 1
-            
             # Progress calculation for Frontend (stays within Step 4 range)
-            progress_pct = 40 + int((current_batch_idx / total_batches) * 40)
+            progress["done"] += 1
+            done = progress["done"]
+            progress_pct = 40 + int((done / total_batches) * 40)
             on_progress(file_id, "translating", progress_pct, 
-                        f"{prefix} Step 4/5: Translating {target_lang.upper()} ({current_batch_idx}/{total_batches})")
+                        f"{prefix} Step 4/5: Translating {langs_label} ({done}/{total_batches})")
 
             # Terminal logging every 20%
-            completion_pct = int((current_batch_idx / total_batches) * 100)
-            if completion_pct >= last_logged_pct + 20:
-                logger.info(f"Translation Progress ({target_lang.upper()}): {completion_pct}%")
-                last_logged_pct = (completion_pct // 20) * 20
+            completion_pct = int((done / total_batches) * 100)
+            if completion_pct >= progress["logged"] + 20:
+                logger.info(f"Translation Progress ({langs_label}): {completion_pct}%")
+                progress["logged"] = (completion_pct // 20) * 20
+            return translated
+
+        replies = await asyncio.gather(*(run_batch(i, batch) for i, batch in enumerate(batches)))
+        if task_manager.is_aborted:
+            logger.warning(f"   🛑 {prefix} Translation aborted by user.")
+            return {}
+
+        results: Dict[str, CueList] = {}
+        for lang in target_langs:
+            fresh: Dict[str, str] = {}
+            for batch, translated in zip(batches, replies):
+                by_pos = translated.get(lang, {})
+                for pos, _ in batch:
+                    if by_pos.get(pos):
+                        fresh[norms[pos]] = by_pos[pos]
+
+            await asyncio.to_thread(self.memory.store_many, list(fresh.items()), lang, profile)
 
-            system_prompt = self._build_system_prompt(target_lang, context_profile, is_whisper_source)
+            # 3. Same timings, translated texts; the source text stays where nothing came back
+            results[lang] = cues.with_texts([
+                known[lang].get(norm) or fresh.get(norm) or text
+                for norm, text in zip(norms, texts)
+            ])
 
+        return results
+
+    async def translate_stream(
+        self,
+        stream: CueStream,
+        target_langs: List[str],
+        file_id: str,
+        context_profile: str,
+        current_file: int,
+        total_files: int,
+        is_whisper_source: bool = False,
+        ranges: Optional[List[Tuple[float, float]]] = None
+    ) -> Dict[str, Dict[str, str]]:
+        """
+        Translates cues while they are still being transcribed. A cue is sent once
+        TRANSLATOR_CONTEXT_CUES later cues exist (its look-ahead context); a batch goes
+        out once it is full by the usual token budget, the tail when the stream closes.
+        Results are stored in the translation memory as they arrive and returned as
+        {lang: {normalized cue: translation}} for translate_targets(prefetched=...),
+        which assembles the final tracks on the finished CueList's timings.
+        With `ranges` (hybrid gaps, sorted (start, end) seconds) only cues starting inside
+        one are sent: the rest is dropped when the gap cues are merged (CueList.within).
+        Best effort: failed batches and a failed transcription just leave more for that pass.
+        """
+        prefix = f"[{current_file}/{total_files} Files]"
+        profile = profile_hash(self.model, context_profile, is_whisper_source)
+        prefetched: Dict[str, Dict[str, str]] = {lang: {} for lang in target_langs}
+        in_flight = self.in_flight_limit()
+        range_starts = [start for start, _ in ranges] if ranges is not None else None
+        norms: List[str] = []
+        handled: set = set()
+        tasks: List[asyncio.Task] = []
+        consumed = 0
+        # Memory lookups are done once per cue text, as cues become ready
+        known: Dict[str, Dict[str, str]] = {lang: {} for lang in target_langs}
+        looked_up: set = set()
+        looked_upto = 0
+
+        def wanted(pos: int) -> bool:
+            if not norms[pos]:
+                return False
+            if range_starts is None:
+                return True
+            start = stream.starts[pos]
+            i = bisect.bisect_right(range_starts, start) - 1
+            return i >= 0 and start < ranges[i][1]
+
+        async def run_batch(batch: List[Tuple[int, str]], langs: List[str], label: str):
+            texts = stream.texts
+            first, last = batch[0][0], batch[-1][0]
+            neighbours = {
+                "before": [t for t in texts[max(0, first - self.context_cues):first] if t.strip()],
+                "after": [t for t in texts[last + 1:last + 1 + self.context_cues] if t.strip()]
+            }
             try:
-                translated_batch = self._call_llm(system_prompt, batch_text)
-                results.append(translated_batch)
+                async with in_flight:
+                    translated = await self._translate_batch(
+                        batch, langs, context_profile, is_whisper_source, label, neighbours, file_id
+                    )
             except Exception as e:
-                logger.error(f"   ❌ {prefix} Batch {current_batch_idx} failed: {e}")
-                results.append(batch_text) # Fallback to original
+                logger.warning(f"⚠️ {label}: early translation failed, retrying after transcription ({e})")
+                return
+            for lang in langs:
+                fresh = {norms[pos]: text for pos, text in translated.get(lang, {}).items() if text}
+                prefetched[lang].update(fresh)
+                await asyncio.to_thread(self.memory.store_many, list(fresh.items()), lang, profile)
+
+        try:
+            while True:
+                finished = stream.closed
+                if stream.error is not None:
+                    break
+                texts = stream.texts
+                norms.extend(normalize_cue(t) for t in texts[len(norms):])
+                # Cues with their look-ahead already transcribed
+                ready = len(texts) if finished else max(consumed, len(texts) - self.context_cues)
+
+                fresh = list({norms[pos] for pos in range(looked_upto, ready) if wanted(pos)} - looked_up)
+                looked_upto = max(looked_upto, ready)
+                if fresh:
+                    looked_up.update(fresh)
+                    for lang in target_langs:
+                        known[lang].update(await asyncio.to_thread(self.memory.lookup_many, fresh, lang, profile))
+
+                items: List[Tuple[int, str]] = []
+                seen = set(handled)
+                for pos in range(consumed, ready):
+                    if wanted(pos) and norms[pos] not in seen:
+                        seen.add(norms[pos])
+                        if any(norms[pos] not in known[l] for l in target_langs):
+                            items.append((pos, texts[pos]))
+
+                batches = self._plan_batches(items, len(target_langs))
+                if batches and not finished:
+                    # The last batch may still grow: keep it (and what follows) for the next round
+                    consumed = batches.pop()[0][0]
+                else:
+                    consumed = ready
+                for batch in batches:
+                    langs = [l for l in target_langs if any(norms[pos] not in known[l] for pos, _ in batch)]
+                    handled.update(norms[pos] for pos, _ in batch)
+                    label = f"{prefix} Early batch {len(tasks) + 1}"
+                    tasks.append(asyncio.create_task(run_batch(batch, langs, label)))
 
-        return "\n\n".join(results)
+                if finished:
+                    break
+                await stream.wait()
 
-    def _call_llm(self, system_prompt: str, user_content: str, retries=2) -> str:
-        """Wrapper for OpenAI call with specific SRT formatting enforcement."""
-        for attempt in range(retries + 1):
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        early = len(prefetched[target_langs[0]]) if target_langs else 0
+        if early:
+            logger.info(f"⚡ {prefix} {early} cue(s) translated while transcribing ({len(tasks)} batches)")
+        return prefetched
+
+    async def _translate_batch(
+        self,
+        batch: List[Tuple[int, str]],
+        langs: List[str],
+        context_profile: str,
+        is_whisper_source: bool,
+        label: str,
+        neighbours: Optional[Dict[str, List[str]]] = None,
+        file_id: str = ""
+    ) -> Dict[str, Dict[int, str]]:
+        """
+        Translates one batch of (cue position, text) into `langs`, returning {lang: {cue position: text}}.
+        `neighbours` are the surrounding cues, sent read-only for continuity.
+        Only batch-local cue IDs and text go over the wire; timings stay here and are
+        re-attached by the caller. Every reply is validated per cue, and only the cues
+        that came back missing, merged or out of order are re-requested (up to
+        TRANSLATOR_REPAIR_ROUNDS times) instead of the whole batch.
+        """
+        sources = {str(n + 1): text for n, (_, text) in enumerate(batch)}
+        usage = {"promptTokens": 0, "completionTokens": 0, "latencyMs": 0.0, "requests": 0}
+        results: Dict[str, Dict[str, str]] = {lang: {} for lang in langs}
+        todo: Dict[str, List[str]] = {lang: list(sources) for lang in langs}
+
+        for attempt in range(self.repair_rounds + 1):
+            asks = {lang: ids for lang, ids in todo.items() if ids}
+            if not asks:
+                break
+            if attempt:
+                self.repaired_cues += sum(len(ids) for ids in asks.values())
+                logger.info(f"🔧 {label}: re-requesting {sum(len(ids) for ids in asks.values())} broken cue(s)")
+
+            # Several languages share one structured request unless multi-target is disabled
+            groups = [list(asks)] if self.multi_target else [[lang] for lang in asks]
+            replies = await asyncio.gather(*(
+                self._request_cues(
+                    {i: sources[i] for i in sources if any(i in asks[l] for l in group)},
+                    group, context_profile, is_whisper_source, label, neighbours, usage
+                )
+                for group in groups
+            ))
+
+            for group, reply in zip(groups, replies):
+                for lang in group:
+                    good, broken = self._validate_cues(sources, asks[lang], reply.get(lang))
+                    results[lang].update(good)
+                    todo[lang] = broken
+
+        for lang, ids in todo.items():
+            if ids:
+                logger.error(f"   ❌ {label} ({lang.upper()}): {len(ids)} cue(s) kept in source language")
+
+        self.telemetry.record({
+            "fileId": file_id,
+            "langs": langs,
+            "cues": len(batch),
+            "estimatedInputTokens": sum(estimate_tokens(t) for t in sources.values()),
+            "requests": usage["requests"],
+            "promptTokens": usage["promptTokens"],
+            "completionTokens": usage["completionTokens"],
+            "latencyMs": round(usage["latencyMs"], 1),
+            "brokenCues": sum(len(ids) for ids in todo.values())
+        })
+
+        # Batch-local IDs back to SRT indexes
+        return {
+            lang: {batch[int(i) - 1][0]: text for i, text in by_id.items()}
+            for lang, by_id in results.items()
+        }
+
+    async def _request_cues(
+        self,
+        cues: Dict[str, str],
+        langs: List[str],
+        context_profile: str,
+        is_whisper_source: bool,
+        label: str,
+        neighbours: Optional[Dict[str, List[str]]] = None,
+        usage: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        One LLM round-trip in the compact wire format: {"cues": {"id": "text"}} in
+        (plus optional read-only "before"/"after" context), {lang: {"id": "text"}} out.
+        """
+        request: Dict[str, Any] = {"cues": cues}
+        if neighbours:
+            request.update({k: v for k, v in neighbours.items() if v})
+        payload = json.dumps(request, ensure_ascii=False, separators=(",", ":"))
+        expected_output = estimate_tokens(json.dumps(cues, ensure_ascii=False)) * len(langs)
+        try:
+            reply = await self._call_llm(
+                messages=[
+                    {"role": "system", "content": self._build_system_prompt(langs, context_profile, is_whisper_source)},
+                    {"role": "user", "content": payload}
+                ],
+                temperature=0.2,
+                expected_output=expected_output,
+                json_mode=True,
+                usage=usage
+            )
+            parsed = json.loads(reply)
+            # A single-language reply may come back without the language wrapper
+            if len(langs) == 1 and langs[0] not in parsed:
+                parsed = {langs[0]: parsed}
+            return parsed if isinstance(parsed, dict) else {}
+        except Exception as e:
+            logger.error(f"   ❌ {label} request failed: {e}")
+            return {}
+
+    @staticmethod
+    def _validate_cues(sources: Dict[str, str], asked: List[str], reply: Any) -> Tuple[Dict[str, str], List[str]]:
+        """
+        Splits one language's reply into accepted cues and cue IDs to re-request.
+        Flags missing or empty cues, suspiciously long ones (neighbours merged into one)
+        and cues returned out of order.
+        """
+        if not isinstance(reply, dict):
+            return {}, list(asked)
+
+        reply = {str(k): v for k, v in reply.items()}
+        good: Dict[str, str] = {}
+        for i in asked:
+            text = reply.get(i)
+            if not isinstance(text, str) or not text.strip():
+                continue
+            if len(text) > 4 * len(sources[i]) + 40:
+                continue
+            good[i] = text.strip()
+
+        position = {i: n for n, i in enumerate(asked)}
+        last = -1
+        for key in reply:
+            if key not in position:
+                continue
+            if position[key] < last:
+                good.pop(key, None)
+            else:
+                last = position[key]
+
+        return good, [i for i in asked if i not in good]
+
+    def _plan_batches(self, pending: List[Tuple[int, str]], n_langs: int) -> List[List[Tuple[int, str]]]:
+        """
+        Greedy token-budget batching: cues are added while the estimated input stays under
+        TRANSLATOR_BATCH_INPUT_TOKENS and the expected output (input x languages) under
+        TRANSLATOR_BATCH_OUTPUT_TOKENS. Dense dialogue gets smaller batches, sparse scenes bigger ones.
+        """
+        batches: List[List[Tuple[int, str]]] = []
+        current: List[Tuple[int, str]] = []
+        tokens = 0
+        for cue in pending:
+            # JSON key, quotes and separators cost a few tokens per cue
+            cost = estimate_tokens(cue[1]) + 3
+            over_input = tokens + cost > self.batch_input_tokens
+            over_output = (tokens + cost) * max(1, n_langs) > self.batch_output_tokens
+            if current and (over_input or over_output or len(current) >= self.batch_max_cues):
+                batches.append(current)
+                current, tokens = [], 0
+            current.append(cue)
+            tokens += cost
+        if current:
+            batches.append(current)
+        return batches
+
+    def _report_savings(self, file_id: str, target_lang: str, prefix: str, norms: List[str], missing: set, streamed: Optional[set] = None):
+        """Logs and records how many cues (and roughly how many tokens) skipped the LLM."""
+        streamed = streamed or set()
+        valid = [n for n in norms if n]
+        served_cues = [n for n in valid if n not in missing and n not in streamed]
+        served = len(served_cues)
+        # Served cues cost nothing on either side of the round-trip
+        saved_tokens = 2 * sum(estimate_tokens(n) for n in served_cues)
+        self.memory.record_savings(saved_tokens)
+        self.file_reports[f"{file_id}|{target_lang}"] = {
+            "cues": len(valid),
+            "sentToLlm": len(missing),
+            "translatedWhileTranscribing": sum(1 for n in valid if n in streamed),
+            "servedLocally": served,
+            "estimatedTokensSaved": saved_tokens
+        }
+        while len(self.file_reports) > 200:
+            self.file_reports.popitem(last=False)
+        if served:
+            logger.info(f"💎 {prefix} Translation memory: {served}/{len(valid)} cues served locally (~{saved_tokens} tokens saved)")
+
+    async def _call_llm(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        expected_output: int,
+        json_mode: bool = False,
+        usage: Optional[Dict[str, Any]] = None
+    ) -> str:
+        """
+        Rate-limited OpenAI call. 429s honour Retry-After and pause every in-flight batch;
+        5xx and connection errors back off exponentially with jitter.
+        When `usage` is given, token counts and latency are added to it.
+        """
+        estimated = sum(estimate_tokens(m["content"]) for m in messages) + expected_output
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(estimated)
             try:
-                response = self.client.chat.completions.create(
+                extra = {"response_format": {"type": "json_object"}} if json_mode else {}
+                started = time.perf_counter()
+                response = await self.client.chat.completions.create(
                     model=self.model,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_content}
-                    ],
-                    temperature=0.2 
+                    messages=messages,
+                    temperature=temperature,
+                    **extra
                 )
-                content = response.choices[0].message.content.strip()
-                # Clean up AI formatting artifacts
-                return content.replace("```srt", "").replace("```", "").strip()
-            except Exception as e:
-                if attempt == retries: raise e
-                time.sleep(2)
-        return user_content
+                if usage is not None:
+                    usage["requests"] += 1
+                    usage["latencyMs"] += (time.perf_counter() - started) * 1000
+                    if response.usage:
+                        usage["promptTokens"] += response.usage.prompt_tokens
+                        usage["completionTokens"] += response.usage.completion_tokens
+                if response.usage:
+                    self.limiter.settle(estimated, response.usage.total_tokens)
+                return response.choices[0].message.content.strip()
+            except APIStatusError as e:
+                if attempt == self.max_retries or (e.status_code != 429 and e.status_code < 500):
+                    raise e
+                delay = self._retry_after(e.response) or self._backoff(attempt)
+                if e.status_code == 429:
+                    self.limiter.pause(delay)
+                else:
+                    await asyncio.sleep(delay)
+            except APIConnectionError as e:
+                if attempt == self.max_retries: raise e
+                await asyncio.sleep(self._backoff(attempt))
+        raise RuntimeError("LLM retries exhausted")
 
-    def _build_system_prompt(self, lang: str, context: str, is_whisper: bool) -> str:
+    @staticmethod
+    def _retry_after(response: Optional[httpx.Response]) -> Optional[float]:
+        """Seconds requested by the server through retry-after-ms / Retry-After, if any."""
+        if response is None:
+            return None
+        headers = response.headers
+        try:
+            if "retry-after-ms" in headers:
+                return float(headers["retry-after-ms"]) / 1000
+            if "retry-after" in headers:
+                return float(headers["retry-after"])
+        except ValueError:
+            pass
+        return None
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        return min(30.0, (2 ** attempt) + random.uniform(0, 1))
+
+    def _build_system_prompt(self, langs: List[str], context: str, is_whisper: bool) -> str:
         whisper_instruction = ""
         if is_whisper:
             whisper_instruction = """
             NOTE: Source is AI-transcribed and may have phonetic errors. 
             Use the provided context bible to fix character names and terms in the speech.
-            No other information than the translation.
             """
 
-        return f"""You are an expert subtitle translator ({lang}).
+        lang_names = ", ".join(langs)
+        lang_keys = ", ".join(f'"{l}"' for l in langs)
+        return f"""You are an expert subtitle translator ({lang_names}).
         {whisper_instruction}
         
         STORY BIBLE FOR CONTEXT:
         {context}
 
         RULES:
-        1. Keep TIMESTAMPS and INDEX NUMBERS exactly as provided.
-        2. Preserve SRT structure: [Index]\\n[Time] --> [Time]\\n[Text]\\n\\n
-        3. Translate only the text content. Don't add the name of the people talking... focus only on the translation.
-        4. Do not include any explanations or markdown.
-        """
\ No newline at end of file
+        1. The input is a JSON object. "cues" maps cue IDs to subtitle text, in playback order.
+           "before" / "after" (if present) are the neighbouring lines: use them for context only, never translate them.
+        2. Reply with ONE JSON object whose keys are the language codes {lang_keys}.
+           Each value maps every cue ID to its translated text: {{"<lang>": {{"<id>": "<text>"}}}}
+        3. Keep every ID exactly once, in the same order. Never merge, split or skip cues.
+        4. Translate only the text content. Don't add the name of the people talking... focus only on the translation.
+        5. Do not include any explanations or markdown.
+        """
@@ -0,0 +1,164 @@
+import os
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from watchfiles import awatch
+
+from core.events import event_manager
+from core.sidecars import SIDECAR_FOLDERS
+
+logger = logging.getLogger("SubStudio.Watcher")
+
+# inotify does not see changes made by other hosts on these, so they are polled instead
+NETWORK_FILESYSTEMS = {
+    "nfs", "nfs4", "cifs", "smb", "smb3", "smbfs", "afs", "9p", "davfs",
+    "fuse.sshfs", "fuse.rclone", "fuse.s3fs", "fuse.gcsfuse", "fuse.mergerfs"
+}
+
+def mount_fstype(path: str) -> str:
+    """Filesystem type of the mount holding `path` (longest matching mount point in /proc/mounts)."""
+    path = os.path.realpath(path)
+    best, fstype = "", ""
+    try:
+        with open("/proc/mounts", "r") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) < 3:
+                    continue
+                mount_point = parts[1].replace("\\040", " ")
+                inside = path == mount_point or path.startswith(mount_point.rstrip("/") + "/")
+                if inside and len(mount_point) > len(best):
+                    best, fstype = mount_point, parts[2]
+    except OSError:
+        pass
+    return fstype
+
+class LibraryWatcher:
+    """
+    Keeps the library view current without full rescans.
+    Filesystem events (inotify, or polling on network mounts) mark their folder dirty;
+    once a folder has been quiet for WATCH_SETTLE_SECONDS (so a copy in progress is
+    only picked up when it finishes) it is re-listed through the scanner and the
+    add/remove/change deltas are pushed on the 'library' SSE channel.
+    """
+    def __init__(self, scanner: Any, executor: Any, on_change: Optional[Callable[[], None]] = None):
+        self.scanner = scanner
+        self.executor = executor
+        self.on_change = on_change
+        self.root = scanner.base_path
+        # auto | inotify | poll | off
+        self.mode = os.getenv("WATCH_MODE", "auto").lower()
+        self.settle = float(os.getenv("WATCH_SETTLE_SECONDS", "2"))
+        self.poll_ms = int(float(os.getenv("WATCH_POLL_SECONDS", "5")) * 1000)
+        self.polling = False
+        self.dirty: Dict[str, float] = {}
+        self.stop_event = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.deltas_sent = 0
+
+    def start(self):
+        if self.mode == "off" or not os.path.isdir(self.root):
+            logger.info(f"Library watcher disabled ({self.root})")
+            return
+        fstype = mount_fstype(self.root)
+        self.polling = self.mode == "poll" or (self.mode == "auto" and fstype in NETWORK_FILESYSTEMS)
+        self.task = asyncio.create_task(self._run())
+        logger.info(f"👀 Watching {self.root} ({'polling' if self.polling else 'inotify'}, fs={fstype or '?'})")
+
+    async def stop(self):
+        self.stop_event.set()
+        if self.task:
+            await asyncio.gather(self.task, return_exceptions=True)
+
+    def _is_relevant(self, path: str) -> bool:
+        name = os.path.basename(path)
+        if name.startswith('.') or name.endswith((".tmp.wav", ".tmp.srt", ".tmp_extract.srt")):
+            return False
+        ext = os.path.splitext(name)[1].lower()
+        # No extension: most likely a folder (a deleted one can no longer be stat'ed)
+        return not ext or ext in self.scanner.supported_extensions or ext in self.scanner.subtitle_extensions or os.path.isdir(path)
+
+    def _mark(self, path: str, now: float):
+        """Records the folder whose listing `path` belongs to."""
+        if not self._is_relevant(path):
+            return
+        folder = os.path.dirname(path)
+        # Subs/Subtitles content is part of the parent folder's sidecar matching
+        if os.path.basename(folder) in SIDECAR_FOLDERS:
+            folder = os.path.dirname(folder)
+        if folder == self.root or folder.startswith(self.root.rstrip(os.sep) + os.sep):
+            self.dirty[folder] = now
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        try:
+            async for changes in awatch(
+                self.root,
+                stop_event=self.stop_event,
+                force_polling=self.polling,
+                poll_delay_ms=self.poll_ms,
+                rust_timeout=500,
+                yield_on_timeout=True,
+                ignore_permission_denied=True
+            ):
+                now = loop.time()
+                for _, path in changes:
+                    self._mark(path, now)
+                await self._flush(now)
+        except Exception as e:
+            logger.error(f"❌ Library watcher stopped: {e}")
+
+    async def _flush(self, now: float):
+        due = [d for d, t in self.dirty.items() if now - t >= self.settle]
+        for folder in due:
+            del self.dirty[folder]
+            try:
+                deltas = await self.executor.run("io", self._refresh_dir, folder)
+            except Exception as e:
+                logger.warning(f"⚠️ Could not refresh {folder}: {e}")
+                continue
+            self.flushes += 1
+            if not deltas:
+                continue
+            self.deltas_sent += len(deltas)
+            if self.on_change:
+                self.on_change()
+            event_manager.publish("library", {"type": "library", "folder": folder, "changes": deltas})
+            logger.debug(f"📂 {len(deltas)} library change(s) in {folder}")
+
+    def _refresh_dir(self, folder: str) -> List[Dict[str, Any]]:
+        """Re-lists one folder and diffs it against the indexed listing."""
+        if not os.path.isdir(folder):
+            # The folder itself is gone; its parent reports the removal
+            return []
+        previous = self.scanner.index.load_tree(folder, recursive=False).get(folder)
+        before = {}
+        if previous:
+            listing = previous[1]
+            before = {os.path.join(folder, n): None for n in listing.get("dirs", [])}
+            before.update({item["filePath"]: item for item in listing.get("videos", [])})
+
+        items = self.scanner.scan(folder, recursive=False, refresh=True)
+        after = {item["filePath"]: (None if item.get("is_directory") else item) for item in items}
+
+        deltas = []
+        for item in items:
+            path = item["filePath"]
+            if path not in before:
+                deltas.append({"op": "add", "path": path, "item": item})
+            elif after[path] is not None and after[path] != before[path]:
+                deltas.append({"op": "change", "path": path, "item": item})
+        for path in before:
+            if path not in after:
+                deltas.append({"op": "remove", "path": path})
+        return deltas
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": "off" if not self.task else ("polling" if self.polling else "inotify"),
+            "pendingFolders": len(self.dirty),
+            "flushes": self.flushes,
+            "deltasSent": self.deltas_sent
+        }
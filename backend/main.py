@@ -2,23 +2,29 @@ import logging
 import os
 import time
 import asyncio
-import json
-import re
 from contextlib import asynccontextmanager
 from pathlib import Path
-from fastapi import FastAPI, BackgroundTasks, Query, Request
+from fastapi import FastAPI, BackgroundTasks, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Any, Set
+from typing import Dict, List, Optional, Any, Set, Tuple
 
 # Core Imports
+from core.cue_stream import CueStream
+from core.cues import CueList
+from core.media_info import MediaInfo, ProbeTimeout, media_probe
+from core.model_planner import BatchPlanner, RtfStore
 from core.scanner import VideoScanner
+from core.sidecars import SidecarIndex, normalize_language
 from core.subtitle_processor import SubtitleProcessor
 from core.transcriber import VideoTranscriber
-from core.translator import SubtitleTranslator
+from core.translator import NEUTRAL_CONTEXT, SubtitleTranslator
 from core.muxer import VideoMuxer
-from core.events import event_manager, setup_logging_bridge
+from core.executor import StageExecutor
+from core.scheduler import Stage, StagedScheduler
+from core.events import event_manager, job_context, setup_logging_bridge
+from core.watcher import LibraryWatcher
 
 # --- LOGGING CONFIGURATION ---
 logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
@@ -29,6 +35,8 @@ logging.basicConfig(
     format="%(asctime)s | %(levelname)s | %(message)s"
 )
 logger = logging.getLogger("SubStudio.Main")
+# One handler for every job; records are routed to the file whose job_context is active
+setup_logging_bridge()
 
 # --- DATA MODELS ---
 
@@ -43,7 +51,13 @@ class VideoJob(BaseModel):
     stripExistingSubs: bool = False
 
 class GlobalOptions(BaseModel):
+    # A Whisper model name, or 'auto' to pick one per file (see BatchPlanner)
     transcriptionEngine: str = "medium"
+    # 'auto' only: finish the batch's transcriptions within this many minutes
+    # (None = AUTO_DEADLINE_MINUTES, 0 = no deadline, keep up with AUTO_MAX_RTF instead)
+    deadlineMinutes: Optional[float] = None
+    # fast | balanced | accurate (see DECODING_PROFILES); empty = DECODING_PROFILE
+    decodingProfile: str = ""
     generateSRT: bool = True
     muxIntoMkv: bool = True
     cleanUp: bool = False
@@ -52,170 +66,595 @@ class ProcessRequest(BaseModel):
     videos: List[VideoJob]
     globalOptions: GlobalOptions
 
+class PipelineJob:
+    """Working state of one video while it travels through the pipeline stages."""
+    def __init__(self, video: VideoJob, opts: GlobalOptions, index: int, total: int):
+        self.video = video
+        self.opts = opts
+        self.index = index
+        self.total = total
+        self.fid = video.path
+        self.prefix = f"[{index + 1}/{total} Files]"
+
+        self.context = ""
+        self.cues: Optional[CueList] = None
+        self.is_whisper = True
+        self.media: Optional[MediaInfo] = None
+        self.fingerprint: Optional[str] = None
+        self.cache_key: Optional[str] = None
+        self.audio_file = ""
+        self.translated_map: Dict[str, CueList] = {}
+        # Translation running alongside Whisper (translate_stream), awaited by the translate stage
+        self.early_translation: Optional[asyncio.Task] = None
+        # Hybrid mode: (start, end) seconds the sidecar leaves uncovered, still to transcribe
+        self.gaps: List[Tuple[float, float]] = []
+        self.synced = False
+        # Whisper model for this file; the 'auto' engine resolves it when transcription starts
+        self.model = opts.transcriptionEngine
+        self.planner: Optional[BatchPlanner] = None
+        self.plan: Optional[Dict[str, Any]] = None
+
 # --- ORCHESTRATOR ---
 
 class PipelineOrchestrator:
     def __init__(self):
         self.scanner = VideoScanner(base_path="/data")
-        self.processor = SubtitleProcessor()
         self.transcriber = VideoTranscriber(model_size="medium")
+        self.processor = SubtitleProcessor(cache=self.transcriber.cache)
         self.translator = SubtitleTranslator()
         self.muxer = VideoMuxer()
+        # Blocking stages run here so the event loop stays free for the API and SSE
+        self.executor = StageExecutor()
+        # Pushes folder-level library deltas to the UI instead of full rescans
+        self.watcher = LibraryWatcher(self.scanner, self.executor, on_change=self.invalidate_scan_cache)
         
         self.active_jobs: Set[str] = set()
         self._last_scan_time = 0
+        self._last_scan_path = None
+        # Folders whose badges are being filled in after a browse
+        self._filling: Set[str] = set()
         self._cached_files = []
+        # Hybrid mode: only sidecar gaps at least this long are sent to Whisper
+        self.hybrid_min_gap = float(os.getenv("HYBRID_MIN_GAP_SECONDS", "8"))
+        self.hybrid_gap_pad = float(os.getenv("HYBRID_GAP_PAD_SECONDS", "0.5"))
+        # Real-time factors of this host, updated after every Whisper run, for the 'auto' engine
+        self.rtf = RtfStore()
 
-    def split_long_lines(self, srt_text: str, max_chars: int = 50) -> str:
-        """Adds \n to subtitle lines that are too long."""
-        def process_block(match):
-            index, times, text = match.groups()
-            lines = text.strip().split('\n')
-            new_lines = []
-            
-            for line in lines:
-                if len(line) > max_chars:
-                    mid = len(line) // 2
-                    space_indices = [i for i, char in enumerate(line) if char == ' ']
-                    if space_indices:
-                        best_space = min(space_indices, key=lambda x: abs(x - mid))
-                        line = line[:best_space] + '\n' + line[best_space+1:]
-                new_lines.append(line)
-            
-            joined_content = '\n'.join(new_lines)
-            return f"{index}\n{times}\n{joined_content}\n\n"
+    @staticmethod
+    def _read_text(path: Path) -> str:
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            return f.read()
+
+    @classmethod
+    def _read_cues(cls, path: Path) -> CueList:
+        return CueList.parse_srt(cls._read_text(path))
 
-        pattern = re.compile(r"(\d+)\n(\d{2}:\d{2}:\d{2},\d{3} --> \d{2}:\d{2}:\d{2},\d{3})\n([\s\S]*?)(?:\n\n|\Z)")
-        return pattern.sub(process_block, srt_text)
+    @staticmethod
+    def _find_sidecar(video_path: str, language: Optional[str], exclude_languages: List[str]) -> Optional[Dict[str, Any]]:
+        folder, name = os.path.split(video_path)
+        try:
+            return SidecarIndex.for_folder(folder).best(
+                name, language, formats=("srt", "vtt"), exclude_languages=exclude_languages
+            )
+        except OSError:
+            return None
+
+    @staticmethod
+    def _write_text(path: Path, content: str):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    def invalidate_scan_cache(self):
+        self._last_scan_time = 0
 
-    def get_files(self, target_path: str):
+    def get_files(self, target_path: str, refresh: bool = False):
         now = time.time()
-        if now - self._last_scan_time < 2.0:
+        if not refresh and target_path == self._last_scan_path and now - self._last_scan_time < 2.0:
             return self._cached_files
         
-        self._cached_files = self.scanner.scan(target_path)
+        # Cheap on a warm index: unchanged folders are not re-read and unchanged videos not re-probed
+        self._cached_files = self.scanner.scan(target_path, refresh=refresh)
         self._last_scan_time = now
+        self._last_scan_path = target_path
         return self._cached_files
 
+    async def browse(self, target_path: str, cursor: Optional[str], limit: int, depth: int) -> Dict[str, Any]:
+        """One folder page now; missing subtitle badges follow as 'library' change events."""
+        page = await self.executor.run("io", self.scanner.browse, target_path, cursor, limit, depth)
+        for folder in page.pop("pendingFolders"):
+            if folder not in self._filling:
+                self._filling.add(folder)
+                asyncio.create_task(self.fill_badges(folder))
+        return page
+
+    async def fill_badges(self, folder: str):
+        try:
+            items = await self.executor.run("io", self.scanner.scan, folder, False)
+            changes = [
+                {"op": "change", "path": item["filePath"], "item": item}
+                for item in items if not item.get("is_directory")
+            ]
+            if changes:
+                event_manager.publish("library", {"type": "library", "folder": folder, "changes": changes})
+        except Exception as e:
+            logger.warning(f"⚠️ Could not fill subtitle badges for {folder}: {e}")
+        finally:
+            self._filling.discard(folder)
+
+    def build_stages(self):
+        """Pipeline layout. Each stage's concurrency comes from PIPELINE_<NAME>_WORKERS."""
+        return [
+            Stage("context", self.stage_context, Stage.workers_from_env("context", 2)),
+            Stage("extract", self.stage_extract, Stage.workers_from_env("extract", 1)),
+            Stage("transcribe", self.stage_transcribe, Stage.workers_from_env("transcribe", 1)),
+            Stage("translate", self.stage_translate, Stage.workers_from_env("translate", 2)),
+            Stage("mux", self.stage_mux, Stage.workers_from_env("mux", 1)),
+        ]
+
     async def run_batch(self, videos: List[VideoJob], opts: GlobalOptions):
         total = len(videos)
         try:
             # We no longer re-init self.transcriber here.
             # The lazy-loader inside transcriber.py handles the swap.
+            jobs = []
             for idx, video in enumerate(videos):
                 if video.path in self.active_jobs:
                     logger.warning(f"⚠️ [Skip] {video.name} is already in the pipeline.")
                     continue
-                await self.execute_pipeline(video, opts, idx, total)
+                jobs.append(self.begin_job(video, opts, idx, total))
+            self.plan_batch(jobs, opts)
+
+            scheduler = StagedScheduler(
+                self.build_stages(),
+                on_done=self.finish_job,
+                on_error=self.fail_job,
+                job_context=lambda job: job_context(job.fid)
+            )
+            await scheduler.run(jobs)
+            self.report_batch_plan(jobs)
         finally:
             logger.info("🏁 BATCH PROCESSING FINISHED")
             event_manager.emit("system_events", "batch_done", 100, "All tasks completed")
 
     async def execute_pipeline(self, video: VideoJob, opts: GlobalOptions, index: int, total: int):
-        fid = video.path
-        self.active_jobs.add(fid) 
-        
-        log_handler = setup_logging_bridge(fid)
-        temp_audio = Path(video.path).with_suffix(".tmp.wav")
-        p = f"[{index + 1}/{total} Files]"
-        
+        """Runs a single video through every stage, one after the other."""
+        job = self.begin_job(video, opts, index, total)
+        self.plan_batch([job], opts)
+        with job_context(job.fid):
+            try:
+                for stage in self.build_stages():
+                    await stage.handler(job)
+            except Exception as e:
+                await self.fail_job(job, e)
+            else:
+                await self.finish_job(job)
+
+    # --- JOB LIFECYCLE ---
+
+    def begin_job(self, video: VideoJob, opts: GlobalOptions, index: int, total: int) -> PipelineJob:
+        job = PipelineJob(video, opts, index, total)
+        self.active_jobs.add(job.fid)
+        event_manager.emit(job.fid, "queued", 0, f"{job.prefix} Waiting in pipeline...")
+        return job
+
+    async def finish_job(self, job: PipelineJob):
+        event_manager.emit(job.fid, "done", 100, "Processing Complete")
+        logger.info(f"✅ {job.prefix} COMPLETED: {job.video.name}")
+        self.release_job(job)
+
+    async def fail_job(self, job: PipelineJob, error: Exception):
+        logger.error(f"❌ {job.prefix} ERROR: {str(error)}")
+        event_manager.emit(job.fid, "error", 0, str(error))
+        self.release_job(job)
+
+    def release_job(self, job: PipelineJob):
+        self.active_jobs.discard(job.fid)
+        if job.planner:
+            job.planner.drop(job.fid)
+        if job.early_translation and not job.early_translation.done():
+            job.early_translation.cancel()
+        if job.audio_file:
+            self.transcriber.cleanup_audio(job.audio_file)
+            job.audio_file = ""
+
+    # --- AUTO ENGINE ---
+
+    def chunk_workers(self, job: PipelineJob) -> int:
+        """Processes a full-file transcription of this job runs on (gap-only runs always use one)."""
+        if not job.gaps and self.transcriber.chunked.enabled and self.transcriber.audio_mode == "stream":
+            return self.transcriber.chunked.workers
+        return 1
+
+    def plan_batch(self, jobs: List[PipelineJob], opts: GlobalOptions):
+        """'auto' engine: one planner per batch, fed with every file's probe so it knows what is coming."""
+        if opts.transcriptionEngine != "auto" or not jobs:
+            return
+        deadline = opts.deadlineMinutes
+        if deadline is None:
+            deadline = float(os.getenv("AUTO_DEADLINE_MINUTES", "0"))
+        planner = BatchPlanner(
+            self.rtf,
+            profile=opts.decodingProfile or self.transcriber.default_profile,
+            deadline_seconds=deadline * 60 if deadline else None,
+            parallel=min(Stage.workers_from_env("transcribe", 1), int(os.getenv("CPU_WORKERS", "1"))),
+            workers=self.chunk_workers(jobs[0])
+        )
+        for job in jobs:
+            job.planner = planner
+            planner.add(job.fid, media_probe.submit(job.video.path))
+        if planner.deadline_at:
+            logger.info(f"🎯 Auto engine: {len(jobs)} file(s) to transcribe within {deadline:g} min")
+
+    def pick_model(self, job: PipelineJob):
+        """Resolves 'auto' to a model for this file against the time left, and tells the UI what to expect."""
+        if not job.planner:
+            return
+        if job.gaps:
+            audio_seconds = sum(end - start for start, end in job.gaps)
+        else:
+            audio_seconds = job.media.duration if job.media else None
+        job.plan = job.planner.choose(job.fid, audio_seconds)
+        job.model = job.plan["model"]
+
+        plan = job.plan
+        logger.info(
+            f"🎯 {job.prefix} Auto engine picked [{job.model}] ({plan['reason']}): "
+            f"~{plan['predictedSeconds'] / 60:.1f} min at RTF {plan['rtf']:g}"
+        )
+        if plan["deadlineAt"] and plan["batchPredictedFinishAt"] > plan["deadlineAt"]:
+            late = (plan["batchPredictedFinishAt"] - plan["deadlineAt"]) / 60
+            logger.warning(f"⚠️ {job.prefix} Even [{job.model}] is predicted to miss the deadline by {late:.0f} min")
+        event_manager.publish(job.fid, {"type": "plan", "fileId": job.fid, **plan})
+
+    async def record_transcription(self, job: PipelineJob, audio_seconds: Optional[float], timing: Dict[str, float], workers: int):
+        """
+        Every Whisper run, 'auto' or not, refines this host's real-time factor for its model.
+        Only inference time counts (`timing` from the transcriber): a model load is not the model being slow.
+        """
+        elapsed = timing.get("inference_seconds")
+        profile = job.opts.decodingProfile or self.transcriber.default_profile
+        rtf = None
+        if audio_seconds and elapsed is not None:
+            rtf = await self.executor.run("io", self.rtf.record, job.model, profile, audio_seconds, elapsed, workers)
+        if not job.planner:
+            return
+        job.planner.finish(job.fid)
+        event_manager.publish(job.fid, {
+            "type": "plan",
+            "fileId": job.fid,
+            "model": job.model,
+            "audioSeconds": round(audio_seconds, 1) if audio_seconds else None,
+            "predictedSeconds": job.plan["predictedSeconds"] if job.plan else None,
+            "actualSeconds": round(elapsed, 1) if elapsed is not None else None,
+            "actualRtf": round(rtf, 3) if rtf is not None else None,
+            "finishedAt": round(time.time(), 1)
+        })
+
+    def report_batch_plan(self, jobs: List[PipelineJob]):
+        """Predicted vs actual for the whole 'auto' batch, on the system channel."""
+        planner = jobs[0].planner if jobs else None
+        if not planner:
+            return
+        models = [job.model for job in jobs if job.plan]
+        transcribed_at = planner.last_finished_at
+        event_manager.publish("system_events", {
+            "type": "plan",
+            "fileId": "system_events",
+            "models": models,
+            "startedAt": round(planner.started_at, 1),
+            "transcribedAt": round(transcribed_at, 1) if transcribed_at else None,
+            "finishedAt": round(time.time(), 1),
+            "deadlineAt": round(planner.deadline_at, 1) if planner.deadline_at else None
+        })
+        if planner.deadline_at and transcribed_at:
+            verdict = "met" if transcribed_at <= planner.deadline_at else "missed"
+            minutes = (transcribed_at - planner.started_at) / 60
+            logger.info(f"🎯 Auto engine {verdict} the deadline: transcriptions took {minutes:.1f} min ({', '.join(models)})")
+
+    # --- STAGES ---
+
+    async def stage_context(self, job: PipelineJob):
+        """STEP 1: CONTEXT, plus existing subtitles (sidecar or embedded text track) for the srt/hybrid workflows."""
+        video, fid, p = job.video, job.fid, job.prefix
         logger.info(f"{p} STARTING: {video.name}")
 
+        event_manager.emit(fid, "processing", 5, f"{p} Step 1/5: Analyzing context...")
+        # Probed alongside the context; the transcriber and muxer read the same cached MediaInfo
+        probe = asyncio.wrap_future(media_probe.submit(video.path))
         try:
-            # STEP 1: CONTEXT
-            event_manager.emit(fid, "processing", 5, f"{p} Step 1/5: Analyzing context...")
-            context = self.translator.get_context_profile(video.name)
+            job.fingerprint = await self.executor.run("io", self.transcriber.fingerprint, video.path)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not fingerprint {video.name}: {e}")
 
-            # STEP 2: SOURCE (Transcription or SRT Import)
-            srt_content = ""
-            is_whisper = True
-            
-            if video.workflowMode in ["srt", "hybrid"]:
-                potential_paths = []
-                if video.selectedSrtPath:
-                    potential_paths.append(Path(video.selectedSrtPath))
-                
-                video_path = Path(video.path)
-                potential_paths.append(video_path.with_suffix(".srt"))
-                
-                found_path = next((p for p in potential_paths if p.exists() and p.is_file()), None)
-
-                if found_path:
-                    logger.info(f"🔍 Found SRT at: {found_path}")
-                    event_manager.emit(fid, "processing", 10, f"{p} Found SRT {found_path.name}")
-                    with open(found_path, "r", encoding="utf-8", errors="ignore") as f:
-                        srt_content = f.read()
-                    is_whisper = False
-
-            # If no SRT found or mode is 'pure', run transcription
-            if not srt_content:
-                event_manager.emit(fid, "processing", 15, f"{p} Transcribing with Whisper...")
-                
-                # UPDATED: We pass both the model_size and the context.
-                # The transcriber will check if 'opts.transcriptionEngine' is already loaded.
-                srt_content = self.transcriber.transcribe(
-                    video_path=video.path, 
-                    file_id=fid, 
-                    on_progress=event_manager.emit,
-                    current_file=index + 1,
-                    total_files=total,
-                    model_size=opts.transcriptionEngine,
-                    context_prompt=context 
+        # A file we already know keeps its story bible, so its transcript cache key stays stable
+        cached_context = None
+        if job.fingerprint:
+            cached_context = await self.executor.run("io", self.transcriber.cache.get_context, job.fingerprint)
+        if cached_context:
+            job.context = cached_context
+        else:
+            profile = await self.translator.get_context_profile(video.name)
+            if profile is None:
+                # Not stored: a transient LLM error must not pin the fallback to this file for good
+                job.context = NEUTRAL_CONTEXT
+            else:
+                job.context = profile
+                if job.fingerprint:
+                    await self.executor.run("io", self.transcriber.cache.put_context, job.fingerprint, job.context)
+
+        try:
+            job.media = await probe
+        except ProbeTimeout as e:
+            logger.warning(f"⏱️ {p} Media probe timed out for {video.name}: {e}")
+        except Exception as e:
+            logger.warning(f"⚠️ {p} Media probe failed for {video.name}: {e}")
+
+        if video.workflowMode in ["srt", "hybrid"]:
+            await self.find_existing_subtitles(job)
+
+        if video.workflowMode == "hybrid" and job.cues is not None:
+            self.plan_gaps(job)
+
+    async def find_existing_subtitles(self, job: PipelineJob):
+        """
+        Subtitles we can use instead of Whisper, best first: the SRT picked in the UI, a sidecar
+        in the source language, an embedded text track in the source language, then any
+        sidecar, then any embedded text track.
+        """
+        video, fid, p = job.video, job.fid, job.prefix
+        source_lang = video.src[0] if isinstance(video.src, list) and video.src else video.src
+        wanted = normalize_language(source_lang) if source_lang and source_lang != "auto" else None
+
+        # The folder's sidecar index and the probed streams, each preferring the source language.
+        # Tracks in a target language are what earlier runs wrote (.<lang>.srt, muxed tracks): never a source.
+        sidecar = await self.executor.run("io", self._find_sidecar, video.path, source_lang, video.out)
+        embedded = self.processor.best_embedded_track(job.media, source_lang, video.out) if job.media else None
+        sidecar_matches = sidecar is not None and (not wanted or sidecar.get("language") == wanted)
+        embedded_matches = embedded is not None and (not wanted or normalize_language(embedded.get("language")) == wanted)
+
+        candidates = []
+        if video.selectedSrtPath:
+            candidates.append(("file", Path(video.selectedSrtPath)))
+        if sidecar_matches:
+            candidates.append(("file", Path(sidecar["path"])))
+        if embedded_matches:
+            candidates.append(("embedded", embedded))
+        if sidecar and not sidecar_matches:
+            candidates.append(("file", Path(sidecar["path"])))
+        if embedded and not embedded_matches:
+            candidates.append(("embedded", embedded))
+
+        for kind, source in candidates:
+            if kind == "file":
+                if not (source.exists() and source.is_file()):
+                    continue
+                logger.info(f"🔍 Found SRT at: {source}")
+                event_manager.emit(fid, "processing", 10, f"{p} Found SRT {source.name}")
+                cues = await self.executor.run("io", self._read_cues, source)
+                if not len(cues):
+                    logger.warning(f"⚠️ {p} {source.name} has no readable cues, skipping it")
+                    continue
+            else:
+                event_manager.emit(fid, "processing", 10, f"{p} Reading embedded {source.get('language', 'und')} subtitles...")
+                cues = await self.executor.run("io", self.processor.embedded_cues, job.media, source, job.fingerprint)
+                if not len(cues):
+                    logger.warning(f"⚠️ {p} Embedded track #{source['index']} is empty or unreadable")
+                    continue
+                logger.info(f"🔍 Using embedded {source.get('codec')} track #{source['index']} ({source.get('language')}), {len(cues)} cues")
+            job.cues = cues
+            job.is_whisper = False
+            return
+
+    def plan_gaps(self, job: PipelineJob):
+        """Hybrid mode: finds the stretches the sidecar does not cover (songs, foreign scenes, a missing reel)."""
+        video, p = job.video, job.prefix
+        if not len(job.cues):
+            # An empty sidecar is no sidecar: transcribe everything
+            job.cues, job.is_whisper = None, True
+            return
+
+        # The sync offset aligns the sidecar with the audio, so gaps are measured on the shifted track
+        if video.syncOffset != 0:
+            job.cues = self.processor.apply_offset(job.cues, video.syncOffset)
+        job.synced = True
+
+        duration = job.media.duration if job.media else None
+        if not duration:
+            logger.warning(f"⚠️ {p} Unknown duration: only gaps before the last sidecar cue are checked")
+        duration_ms = int(duration * 1000) if duration else int(job.cues.ends.max())
+        gaps = job.cues.uncovered(duration_ms, int(self.hybrid_min_gap * 1000), int(self.hybrid_gap_pad * 1000))
+        job.gaps = [(start / 1000, end / 1000) for start, end in gaps]
+
+        uncovered = sum(end - start for start, end in job.gaps)
+        if job.gaps:
+            logger.info(f"🧩 {p} Sidecar leaves {len(job.gaps)} gap(s) uncovered: {uncovered:.0f}s of {duration_ms / 1000:.0f}s go to Whisper")
+        else:
+            logger.info(f"🧩 {p} Sidecar covers the whole film, no transcription needed")
+
+    def merge_gap_cues(self, job: PipelineJob, gap_cues: CueList):
+        """Adds Whisper's cues for the gaps to the sidecar track, keeping only what falls inside a gap."""
+        added = gap_cues.within([(int(start * 1000), int(end * 1000)) for start, end in job.gaps])
+        job.cues = job.cues.merge(added)
+        logger.info(f"🧩 {job.prefix} Merged {len(added)} transcribed cue(s) into the sidecar track")
+        job.gaps = []
+
+    async def stage_extract(self, job: PipelineJob):
+        """STEP 2a: AUDIO EXTRACTION to a temp WAV (AUDIO_MODE=wav only; 'stream' decodes inside transcribe)."""
+        if job.gaps or not job.cues:
+            # The model is part of the cache key, so 'auto' decides here
+            self.pick_model(job)
+        elif job.planner:
+            job.planner.drop(job.fid)
+
+        if job.gaps:
+            # Gap-only runs decode their ranges themselves; the cache is keyed by the gaps too
+            if job.fingerprint:
+                job.cache_key = self.transcriber.cache_key(
+                    job.fingerprint, job.model, job.context, job.gaps, job.opts.decodingProfile or None
                 )
+                cached = await self.executor.run("io", self.transcriber.cached_transcript, job.cache_key)
+                if cached is not None:
+                    event_manager.emit(job.fid, "transcribing", 90, f"{job.prefix} Step 2/5: Reusing cached gap transcript")
+                    self.merge_gap_cues(job, cached)
+                    if job.planner:
+                        job.planner.drop(job.fid)
+            return
+        if job.cues:
+            return
 
-            # STEP 3: SYNC
-            if video.syncOffset != 0:
-                srt_content = self.processor.apply_offset(srt_content, video.syncOffset)
-
-            # STEP 4: TRANSLATION & REFINING
-            translated_map = {}
-            for lang_code in video.out:
-                event_manager.emit(fid, "processing", 50, f"{p} Translating to {lang_code}...")
-                translation = self.translator.refine_and_translate(
-                    srt_content=srt_content,
-                    target_lang=lang_code,
+        # Transcript cache: a hit skips extraction and Whisper entirely
+        if job.fingerprint:
+            job.cache_key = self.transcriber.cache_key(
+                job.fingerprint, job.model, job.context, profile=job.opts.decodingProfile or None
+            )
+            cached = await self.executor.run("io", self.transcriber.cached_transcript, job.cache_key)
+            if cached is not None:
+                event_manager.emit(job.fid, "transcribing", 90, f"{job.prefix} Step 2/5: Reusing cached transcript")
+                job.cues = cached
+                if job.planner:
+                    job.planner.drop(job.fid)
+                return
+
+        if self.transcriber.audio_mode == "stream":
+            return
+        event_manager.emit(job.fid, "transcribing", 5, f"{job.prefix} Step 2/5: Extracting audio...")
+        job.audio_file = await self.executor.run("io", self.transcriber.extract_audio, job.video.path)
+
+    async def stage_transcribe(self, job: PipelineJob):
+        """STEP 2b: TRANSCRIPTION, then STEP 3: SYNC."""
+        video, fid, p = job.video, job.fid, job.prefix
+
+        if job.gaps:
+            event_manager.emit(fid, "processing", 15, f"{p} Transcribing sidecar gaps with Whisper...")
+            stream = self.start_early_translation(job)
+            audio_seconds = sum(end - start for start, end in job.gaps)
+            timing: Dict[str, float] = {}
+            try:
+                gap_cues = await self.executor.run(
+                    "cpu",
+                    self.transcriber.transcribe_ranges,
+                    video.path,
+                    job.gaps,
                     file_id=fid,
                     on_progress=event_manager.emit,
-                    task_manager=type('Task', (object,), {'is_aborted': False}),
-                    context_profile=context,
-                    current_file=index + 1,
-                    total_files=total,
-                    is_whisper_source=is_whisper
+                    current_file=job.index + 1,
+                    total_files=job.total,
+                    model_size=job.model,
+                    context_prompt=job.context,
+                    cache_key=job.cache_key,
+                    on_segments=stream.feed if stream else None,
+                    profile=job.opts.decodingProfile or None,
+                    timing=timing
                 )
-                
-                translation = self.split_long_lines(translation)
-                translated_map[lang_code] = translation
-                
-                if opts.generateSRT:
-                    out_srt = Path(video.path).with_suffix(f".{lang_code}.srt")
-                    with open(out_srt, "w", encoding="utf-8") as f:
-                        f.write(translation)
-
-            # STEP 5: MUXING
-            if opts.muxIntoMkv:
-                event_manager.emit(fid, "processing", 90, f"{p} Muxing into MKV...")
-                self.muxer.mux(
-                    video_path=video.path,
-                    srts=translated_map,
-                    current_file=index + 1,
-                    total_files=total,
-                    strip_existing=video.stripExistingSubs,
-                    cleanup_original=opts.cleanUp
+            except Exception as e:
+                if stream:
+                    stream.close(e)
+                raise
+            if stream:
+                stream.close()
+            await self.record_transcription(job, audio_seconds, timing, workers=1)
+            self.merge_gap_cues(job, gap_cues)
+
+        elif not job.cues:
+            event_manager.emit(fid, "processing", 15, f"{p} Transcribing with Whisper...")
+            stream = self.start_early_translation(job)
+            timing = {}
+            try:
+                # The model pool keeps 'job.model' resident between files.
+                # Without a pre-extracted WAV, audio is piped from ffmpeg straight into Whisper.
+                job.cues = await self.executor.run(
+                    "cpu",
+                    self.transcriber.transcribe_audio if job.audio_file else self.transcriber.transcribe,
+                    job.audio_file or video.path,
+                    file_id=fid,
+                    on_progress=event_manager.emit,
+                    current_file=job.index + 1,
+                    total_files=job.total,
+                    model_size=job.model,
+                    context_prompt=job.context,
+                    cache_key=job.cache_key,
+                    on_segments=stream.feed if stream else None,
+                    profile=job.opts.decodingProfile or None,
+                    timing=timing
                 )
+            except Exception as e:
+                if stream:
+                    stream.close(e)
+                raise
+            finally:
+                self.transcriber.cleanup_audio(job.audio_file)
+                job.audio_file = ""
+            if stream:
+                stream.close()
+            await self.record_transcription(
+                job, job.media.duration if job.media else None, timing, workers=self.chunk_workers(job)
+            )
 
-            event_manager.emit(fid, "done", 100, "Processing Complete")
-            logger.info(f"✅ {p} COMPLETED: {video.name}")
+        if video.syncOffset != 0 and not job.synced:
+            job.cues = self.processor.apply_offset(job.cues, video.syncOffset)
 
-        except Exception as e:
-            logger.error(f"❌ {p} ERROR: {str(e)}")
-            event_manager.emit(fid, "error", 0, str(e))
-        finally:
-            self.active_jobs.discard(fid)
-            # Audio cleanup is handled inside the transcriber now, but safe to keep here
-            if temp_audio.exists():
-                try: temp_audio.unlink()
-                except: pass
-            logging.getLogger().removeHandler(log_handler)
+    def start_early_translation(self, job: PipelineJob) -> Optional[CueStream]:
+        """Starts translating Whisper's segments as they come (TRANSLATE_WHILE_TRANSCRIBING=0 to wait instead)."""
+        if not job.video.out or os.getenv("TRANSLATE_WHILE_TRANSCRIBING", "1") == "0":
+            return None
+        stream = CueStream(asyncio.get_running_loop())
+        job.early_translation = asyncio.create_task(self.translator.translate_stream(
+            stream,
+            target_langs=job.video.out,
+            file_id=job.fid,
+            context_profile=job.context,
+            current_file=job.index + 1,
+            total_files=job.total,
+            is_whisper_source=job.is_whisper,
+            ranges=job.gaps or None
+        ))
+        return stream
+
+    async def stage_translate(self, job: PipelineJob):
+        """STEP 4: TRANSLATION & REFINING (all target languages from one parsed cue list)."""
+        video, fid, p = job.video, job.fid, job.prefix
+        if not video.out:
+            return
+
+        event_manager.emit(fid, "processing", 50, f"{p} Translating to {', '.join(video.out)}...")
+        # Whatever was translated while Whisper ran is reused; the rest is sent now
+        prefetched = await job.early_translation if job.early_translation else None
+        translations = await self.translator.translate_targets(
+            cues=job.cues,
+            target_langs=video.out,
+            file_id=fid,
+            on_progress=event_manager.emit,
+            task_manager=type('Task', (object,), {'is_aborted': False}),
+            context_profile=job.context,
+            current_file=job.index + 1,
+            total_files=job.total,
+            is_whisper_source=job.is_whisper,
+            prefetched=prefetched
+        )
+
+        for lang_code in video.out:
+            translation = translations.get(lang_code, CueList()).wrap_lines(50)
+            job.translated_map[lang_code] = translation
+            
+            if job.opts.generateSRT:
+                out_srt = Path(video.path).with_suffix(f".{lang_code}.srt")
+                await self.executor.run("io", self._write_text, out_srt, translation.to_srt())
+
+    async def stage_mux(self, job: PipelineJob):
+        """STEP 5: MUXING."""
+        if not job.opts.muxIntoMkv:
+            return
+        event_manager.emit(job.fid, "processing", 90, f"{job.prefix} Muxing into MKV...")
+        await self.executor.run(
+            "io",
+            self.muxer.mux,
+            video_path=job.video.path,
+            tracks=job.translated_map,
+            current_file=job.index + 1,
+            total_files=job.total,
+            strip_existing=job.video.stripExistingSubs,
+            cleanup_original=job.opts.cleanUp
+        )
 
 # --- LIFESPAN ---
 orchestrator = None
@@ -223,8 +662,15 @@ orchestrator = None
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     global orchestrator
+    event_manager.bind_loop(asyncio.get_running_loop())
     orchestrator = PipelineOrchestrator()
+    orchestrator.watcher.start()
+    orchestrator.transcriber.preload()
     yield
+    await orchestrator.watcher.stop()
+    orchestrator.executor.shutdown()
+    orchestrator.transcriber.chunked.shutdown()
+    media_probe.shutdown()
 
 # --- API ---
 app = FastAPI(title="SubStudio Pro", lifespan=lifespan)
@@ -237,17 +683,65 @@ app.add_middleware(
 )
 
 @app.get("/api/scan")
-async def scan(target_path: str = Query("/data")):
-    return {"files": orchestrator.get_files(target_path)}
+async def scan(target_path: str = Query("/data"), refresh: bool = Query(False)):
+    files = await orchestrator.executor.run("io", orchestrator.get_files, target_path, refresh)
+    return {"files": files}
+
+@app.get("/api/browse")
+async def browse(
+    path: str = Query("/data"),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(200, ge=1, le=2000),
+    depth: int = Query(0, ge=0, le=3)
+):
+    try:
+        return await orchestrator.browse(path, cursor, limit, depth)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except (FileNotFoundError, NotADirectoryError):
+        raise HTTPException(status_code=404, detail=f"Folder not found: {path}")
 
 @app.post("/api/process")
 async def process(request: ProcessRequest, background_tasks: BackgroundTasks):
     background_tasks.add_task(orchestrator.run_batch, request.videos, request.globalOptions)
     return {"status": "accepted", "count": len(request.videos)}
 
+def _resume_id(request: Request, since: Optional[int]) -> Optional[int]:
+    """Last-Event-ID header (sent by EventSource on reconnect), or ?since= for a fresh connection."""
+    header = request.headers.get("last-event-id")
+    if header and header.strip().isdigit():
+        return int(header)
+    return since
+
+@app.get("/api/events")
+async def events_stream(request: Request, topic: Optional[List[str]] = Query(None), since: Optional[int] = Query(None, ge=0)):
+    """One multiplexed stream for any number of file ids / channels (?topic=a&topic=b; default: all)."""
+    return StreamingResponse(event_manager.subscribe(topic, _resume_id(request, since)), media_type="text/event-stream")
+
 @app.get("/api/events/{file_id:path}")
-async def events(file_id: str):
-    return StreamingResponse(event_manager.subscribe(file_id), media_type="text/event-stream")
+async def events(file_id: str, request: Request, since: Optional[int] = Query(None, ge=0)):
+    return StreamingResponse(event_manager.subscribe([file_id], _resume_id(request, since)), media_type="text/event-stream")
+
+@app.get("/api/stats")
+async def stats():
+    return {
+        "mediaIndex": orchestrator.scanner.index.stats(),
+        "mediaProbe": media_probe.stats(),
+        "libraryWatcher": orchestrator.watcher.stats(),
+        "events": event_manager.stats(),
+        "transcriptCache": orchestrator.transcriber.cache.stats(),
+        "whisperModels": orchestrator.transcriber.models.stats(),
+        "realtimeFactors": orchestrator.rtf.stats(),
+        "translationMemory": {
+            **orchestrator.translator.memory.stats(),
+            "files": orchestrator.translator.file_reports
+        },
+        "llmRateLimit": orchestrator.translator.limiter.stats(),
+        "translatorBatches": {
+            **orchestrator.translator.telemetry.stats(),
+            "repairedCues": orchestrator.translator.repaired_cues
+        }
+    }
 
 @app.get("/health")
 async def health():
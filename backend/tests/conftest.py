@@ -0,0 +1,13 @@
+"""
+Shared test setup: configure the app before anything from core/ or main is imported
+(no watcher, no model preload, caches in a temp dir) and make backend/ importable.
+"""
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ["WATCH_MODE"] = "off"
+os.environ["WHISPER_PRELOAD"] = "0"
+os.environ.setdefault("SUBSTUDIO_CACHE_DIR", tempfile.mkdtemp(prefix="substudio-test-"))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
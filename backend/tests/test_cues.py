@@ -0,0 +1,103 @@
+"""CueList: SRT/WebVTT parsing and the array operations the pipeline relies on."""
+import numpy as np
+
+from core.cues import CueList
+
+SRT = """1
+00:00:01,000 --> 00:00:02,500
+Hello there.
+
+2
+00:00:03,000 --> 00:00:04,000
+General Kenobi!
+Two lines.
+
+3
+01:02:03,004 --> 01:02:05,000
+Late one.
+"""
+
+def cues(*triples):
+    starts, ends, texts = zip(*triples) if triples else ((), (), ())
+    return CueList(np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64), list(texts))
+
+def test_parse_srt():
+    parsed = CueList.parse_srt(SRT)
+    assert parsed.starts.tolist() == [1000, 3000, 3723004]
+    assert parsed.ends.tolist() == [2500, 4000, 3725000]
+    assert parsed.texts == ["Hello there.", "General Kenobi!\nTwo lines.", "Late one."]
+
+def test_srt_round_trip():
+    parsed = CueList.parse_srt(SRT)
+    again = CueList.parse_srt(parsed.to_srt())
+    assert again.starts.tolist() == parsed.starts.tolist()
+    assert again.ends.tolist() == parsed.ends.tolist()
+    assert again.texts == parsed.texts
+
+def test_parse_crlf_and_bom():
+    parsed = CueList.parse_srt("﻿" + SRT.replace("\n", "\r\n"))
+    assert len(parsed) == 3
+    assert parsed.texts[1] == "General Kenobi!\nTwo lines."
+
+def test_parse_webvtt_without_hours():
+    vtt = (
+        "WEBVTT\n\n"
+        "intro\n"
+        "00:01.000 --> 00:02.000 align:start\n"
+        "First\n\n"
+        "01:00:00.500 --> 01:00:01.000\n"
+        "Second\n"
+    )
+    parsed = CueList.parse_srt(vtt)
+    assert parsed.starts.tolist() == [1000, 3600500]
+    assert parsed.ends.tolist() == [2000, 3601000]
+    assert parsed.texts == ["First", "Second"]
+
+def test_numeric_text_does_not_swallow_next_block():
+    srt = (
+        "1\n00:00:01,000 --> 00:00:02,000\n42\n"
+        "2\n00:00:03,000 --> 00:00:04,000\nNext\n"
+    )
+    parsed = CueList.parse_srt(srt)
+    assert parsed.texts == ["42", "Next"]
+    assert parsed.starts.tolist() == [1000, 3000]
+
+def test_empty_cues_are_dropped():
+    srt = (
+        "1\n00:00:01,000 --> 00:00:02,000\n\n"
+        "2\n00:00:03,000 --> 00:00:04,000\nKept\n"
+    )
+    parsed = CueList.parse_srt(srt)
+    assert parsed.texts == ["Kept"]
+
+def test_uncovered_with_overlaps_and_padding():
+    track = cues((1000, 5000, "a"), (2000, 3000, "inside a"), (10000, 12000, "b"))
+    assert track.uncovered(20000, min_gap_ms=1000) == [(0, 1000), (5000, 10000), (12000, 20000)]
+    # Padding eats into each side next to a cue; the 1 s lead-in is now too short
+    assert track.uncovered(20000, min_gap_ms=1000, pad_ms=500) == [(5500, 9500), (12500, 20000)]
+    assert CueList().uncovered(5000, min_gap_ms=1000) == [(0, 5000)]
+    assert CueList().uncovered(500, min_gap_ms=1000) == []
+
+def test_within_clamps_ends():
+    track = cues((500, 1500, "before"), (1000, 4000, "inside"), (6000, 7000, "between"), (8000, 9500, "second"))
+    kept = track.within([(1000, 3000), (7500, 9000)])
+    assert kept.texts == ["inside", "second"]
+    assert kept.starts.tolist() == [1000, 8000]
+    assert kept.ends.tolist() == [3000, 9000]
+    assert len(track.within([])) == 0
+
+def test_merge_orders_by_start():
+    merged = cues((1000, 2000, "a"), (5000, 6000, "c")).merge(cues((3000, 4000, "b")))
+    assert merged.texts == ["a", "b", "c"]
+    assert merged.starts.tolist() == [1000, 3000, 5000]
+
+def test_shift_negative_clamps_at_zero():
+    shifted = cues((500, 1500, "a"), (3000, 4000, "b")).shift(-1.0)
+    assert shifted.starts.tolist() == [0, 2000]
+    assert shifted.ends.tolist() == [500, 3000]
+
+def test_clip_after_negative_shift():
+    track = cues((1000, 2000, "a"), (9000, 10000, "b"), (13000, 14000, "c")).shift(-2.5)
+    clipped = track.clip(10)
+    assert clipped.texts == ["a", "b"]
+    assert clipped.starts.tolist() == [0, 6500]
@@ -0,0 +1,112 @@
+"""EventManager: per-topic journals, Last-Event-ID replay, gap markers and the journal budget."""
+import asyncio
+import json
+import logging
+
+from core.events import EventManager, LogFrame, SSELogHandler, job_context
+
+def data(frame):
+    line = next(l for l in str(frame).splitlines() if l.startswith("data: "))
+    return json.loads(line[len("data: "):])
+
+def replay(manager, topics, last_event_id, count):
+    """The first `count` frames a client reconnecting with Last-Event-ID receives."""
+    async def run():
+        stream = manager.subscribe(topics, last_event_id)
+        try:
+            return [await stream.__anext__() for _ in range(count)]
+        finally:
+            await stream.aclose()
+    return asyncio.run(run())
+
+def test_every_event_gets_an_increasing_id_and_a_journal_entry():
+    manager = EventManager()
+    manager.publish("library", {"type": "library", "n": 1})
+    manager.emit_log("a", "hello")
+    manager.publish("library", {"type": "library", "n": 2})
+    assert manager.last_event_id == 3
+    assert [e[0] for e in manager.journals["library"].events] == [1, 3]
+    assert [e[0] for e in manager.journals["a"].events] == [2]
+    assert manager.journal_bytes == sum(j.bytes for j in manager.journals.values())
+
+def test_replay_after_last_event_id_only_for_subscribed_topics():
+    manager = EventManager()
+    for n in range(3):
+        manager.emit_log("a", f"a{n}")
+        manager.emit_log("b", f"b{n}")
+    frames = replay(manager, ["a"], 1, 2)
+    assert [data(f)["message"] for f in frames] == ["a1", "a2"]
+    assert frames[0].startswith("id: 3\n")
+
+def test_trimmed_events_are_reported_as_a_gap():
+    manager = EventManager()
+    manager.journal_events = 2
+    for n in range(4):
+        manager.emit_log("a", f"line {n}")
+    gap, third, fourth = (data(f) for f in replay(manager, ["a"], 0, 3))
+    assert gap == {"type": "gap", "fileId": "a", "fromId": 1, "toId": 2}
+    assert [third["message"], fourth["message"]] == ["line 2", "line 3"]
+    assert manager.gaps_reported == 1
+
+def test_budget_evicts_finished_jobs_first():
+    manager = EventManager()
+    manager.emit("done-job", "processing", 50, "x" * 200)
+    manager.emit("done-job", "done", 100, "finished")
+    manager.emit("live-job", "processing", 10, "y" * 200)
+    manager.journal_budget = manager.journal_bytes
+    manager.emit("live-job", "processing", 20, "still going")
+
+    assert "done-job" not in manager.journals
+    assert len(manager.journals["live-job"].events) == 2
+    assert manager.journal_bytes <= manager.journal_budget
+    # The evicted job is still accounted for: a client that missed it gets a gap
+    (gap,) = (data(f) for f in replay(manager, ["done-job"], 0, 1))
+    assert gap["type"] == "gap" and gap["toId"] == 2
+
+def test_budget_trims_the_largest_active_journal():
+    manager = EventManager()
+    for n in range(5):
+        manager.emit_log("big", "z" * 300)
+    manager.emit_log("small", "tiny")
+    manager.journal_budget = manager.journal_bytes - 1
+    manager.emit_log("small", "tiny again")
+    assert manager.journal_bytes <= manager.journal_budget
+    assert manager.journals["big"].trimmed_upto > 0
+    assert len(manager.journals["small"].events) == 2
+
+def test_log_records_are_formatted_only_when_sent():
+    manager = EventManager()
+    calls = []
+
+    def formatter(record):
+        calls.append(record.getMessage())
+        return f"INFO: {record.getMessage()}"
+
+    record = logging.LogRecord("SubStudio.Test", logging.INFO, __file__, 1, "step %d", (7,), None)
+    manager.emit_log_record("a", record, formatter)
+    (event_id, frame), = manager.journals["a"].events
+    assert isinstance(frame, LogFrame) and calls == []
+    size = len(frame)
+
+    assert data(frame) == {"type": "log", "fileId": "a", "level": "INFO", "message": "INFO: step 7"}
+    str(frame)
+    assert calls == ["step 7"]
+    # The byte estimate does not move once rendered
+    assert len(frame) == size
+
+def test_log_handler_routes_by_job_context():
+    manager = EventManager()
+    handler = SSELogHandler(manager)
+    handler.setFormatter(logging.Formatter("%(levelname)s: %(message)s"))
+    logger = logging.getLogger("SubStudio.TestJob")
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    try:
+        logger.info("outside any job")
+        with job_context("file-1"):
+            logger.info("inside")
+    finally:
+        logger.removeHandler(handler)
+    assert list(manager.journals) == ["file-1"]
+    (_, frame), = manager.journals["file-1"].events
+    assert data(frame)["message"] == "INFO: inside"
@@ -0,0 +1,75 @@
+"""
+/health must keep answering while a file is being transcribed: Whisper runs on the
+'cpu' executor pool, never on the event loop (see StageExecutor).
+Run from backend/: python -m pytest -q
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Configure before main is imported: no watcher, no model preload, caches in a temp dir
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ["WATCH_MODE"] = "off"
+os.environ["WHISPER_PRELOAD"] = "0"
+os.environ["SUBSTUDIO_CACHE_DIR"] = tempfile.mkdtemp(prefix="substudio-test-")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+import main
+from core.cues import CueList
+
+TRANSCRIBE_SECONDS = 3.0
+# Generous for a loaded CI box, yet far below the transcription time
+HEALTH_BUDGET_SECONDS = 0.25
+
+def test_health_answers_during_transcription(tmp_path, monkeypatch):
+    video = tmp_path / "episode.mkv"
+    video.write_bytes(b"\0" * 4096)
+    started = threading.Event()
+    finished = threading.Event()
+
+    def slow_transcribe(*args, **kwargs):
+        # Stands in for Whisper: a long, blocking, CPU-bound call
+        started.set()
+        time.sleep(TRANSCRIBE_SECONDS)
+        finished.set()
+        return CueList()
+
+    async def no_context(filename):
+        return None
+
+    with TestClient(main.app) as client:
+        orchestrator = main.orchestrator
+        monkeypatch.setattr(orchestrator.transcriber, "transcribe", slow_transcribe)
+        monkeypatch.setattr(orchestrator.transcriber, "audio_mode", "stream")
+        monkeypatch.setattr(orchestrator.translator, "get_context_profile", no_context)
+
+        responses = []
+
+        def submit():
+            # TestClient only returns once the request's background tasks (the batch) are done
+            responses.append(client.post("/api/process", json={
+                "videos": [{"name": video.name, "path": str(video), "out": []}],
+                "globalOptions": {"transcriptionEngine": "tiny", "generateSRT": False, "muxIntoMkv": False}
+            }))
+
+        batch = threading.Thread(target=submit)
+        batch.start()
+        assert started.wait(10), "transcription never started"
+
+        latencies = []
+        while not finished.is_set():
+            t0 = time.perf_counter()
+            health = client.get("/health")
+            latencies.append(time.perf_counter() - t0)
+            assert health.status_code == 200
+            assert health.json() == {"status": "online"}
+            time.sleep(0.05)
+
+        batch.join(10)
+        assert responses and responses[0].status_code == 200
+        assert len(latencies) >= 10, "/health was not polled while transcription ran"
+        assert max(latencies) < HEALTH_BUDGET_SECONDS, f"slowest /health took {max(latencies) * 1000:.0f} ms"
@@ -0,0 +1,115 @@
+"""MediaIndex and the scanner on top of it: folder signatures decide what is re-read and re-probed."""
+import os
+from concurrent.futures import Future
+
+from core import scanner as scanner_module
+from core.media_index import MediaIndex
+from core.media_info import MediaInfo, ProbeError
+from core.scanner import VideoScanner
+
+class FakeProbe:
+    """Stands in for ffprobe: one English subtitle stream per video, or a failure."""
+    def __init__(self):
+        self.calls = []
+        self.fail = False
+
+    def submit(self, path, size=None, mtime_ns=None):
+        self.calls.append(path)
+        future = Future()
+        if self.fail:
+            future.set_exception(ProbeError("unreadable"))
+        else:
+            future.set_result(MediaInfo(path, size, mtime_ns, 60.0, [
+                {"index": 2, "type": "subtitle", "codec": "subrip", "language": "eng", "forced": False}
+            ]))
+        return future
+
+    def remember(self, info):
+        pass
+
+def bump_mtime(path):
+    """Directory mtimes can be coarser than the test: move them on explicitly."""
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+def make_scanner(tmp_path, monkeypatch):
+    probe = FakeProbe()
+    monkeypatch.setattr(scanner_module, "media_probe", probe)
+    library = tmp_path / "library"
+    library.mkdir()
+    scanner = VideoScanner(str(library))
+    scanner.index = MediaIndex(str(tmp_path / "index.sqlite3"))
+    return scanner, probe, library
+
+def videos(items):
+    return {i["fileName"]: i for i in items if not i["is_directory"]}
+
+def test_unchanged_folder_is_reused_without_probing(tmp_path, monkeypatch):
+    scanner, probe, library = make_scanner(tmp_path, monkeypatch)
+    (library / "Movie.mkv").write_bytes(b"\0" * 100)
+
+    first = scanner.scan()
+    again = scanner.scan()
+    assert probe.calls == [str(library / "Movie.mkv")]
+    assert again == first
+    assert scanner.index.dirs_reused == 1
+    assert videos(again)["Movie.mkv"]["subtitleInfo"]["embeddedTracks"] == ["eng"]
+
+def test_new_sidecar_changes_the_signature_but_keeps_the_probe(tmp_path, monkeypatch):
+    scanner, probe, library = make_scanner(tmp_path, monkeypatch)
+    (library / "Movie.mkv").write_bytes(b"\0" * 100)
+    scanner.scan()
+
+    subs = library / "Subs"
+    subs.mkdir()
+    (subs / "Movie.fr.srt").write_text("1\n00:00:01,000 --> 00:00:02,000\nSalut\n")
+    bump_mtime(library)
+    bump_mtime(subs)
+
+    info = videos(scanner.scan())["Movie.mkv"]["subtitleInfo"]
+    assert info["subType"] == "external"
+    assert info["externalPath"] == str(subs / "Movie.fr.srt")
+    assert scanner.index.dirs_reused == 0
+    # The video itself did not change: still probed once
+    assert len(probe.calls) == 1
+
+def test_changed_video_is_re_probed_on_refresh(tmp_path, monkeypatch):
+    scanner, probe, library = make_scanner(tmp_path, monkeypatch)
+    video = library / "Movie.mkv"
+    video.write_bytes(b"\0" * 100)
+    scanner.scan()
+    video.write_bytes(b"\0" * 200)
+    scanner.scan(refresh=True)
+    assert len(probe.calls) == 2
+    assert scanner.index.get_probes(str(library))[str(video)][0] == 200
+
+def test_failed_probe_leaves_the_folder_unsigned(tmp_path, monkeypatch):
+    scanner, probe, library = make_scanner(tmp_path, monkeypatch)
+    (library / "Movie.mkv").write_bytes(b"\0" * 100)
+    probe.fail = True
+    assert videos(scanner.scan())["Movie.mkv"]["subtitleInfo"]["probeError"] == "failed"
+
+    probe.fail = False
+    item = videos(scanner.scan())["Movie.mkv"]
+    assert "probeError" not in item["subtitleInfo"]
+    assert len(probe.calls) == 2
+
+def test_removed_folders_are_forgotten(tmp_path):
+    index = MediaIndex(str(tmp_path / "index.sqlite3"))
+    root, child = "/lib", os.path.join("/lib", "Show")
+    index.put_dir(root, "sig-root", {"dirs": ["Show"], "videos": []}, [])
+    index.put_dir(child, "sig-child", {"dirs": [], "videos": [{"filePath": os.path.join(child, "e1.mkv")}]}, [])
+    index.put_probes(child, [(os.path.join(child, "e1.mkv"), 10, 1, {"duration": 1.0, "streams": []})])
+    assert set(index.load_tree(root)) == {root, child}
+    assert set(index.load_tree(root, recursive=False)) == {root}
+
+    index.put_dir(root, "sig-root-2", {"dirs": [], "videos": []}, [child])
+    assert set(index.load_tree(root)) == {root}
+    assert index.get_probes(child) == {}
+
+def test_videos_missing_from_a_listing_lose_their_probe(tmp_path):
+    index = MediaIndex(str(tmp_path / "index.sqlite3"))
+    a, b = "/lib/a.mkv", "/lib/b.mkv"
+    index.put_probes("/lib", [(a, 1, 1, {}), (b, 2, 2, {})])
+    index.put_dir("/lib", "sig", {"dirs": [], "videos": [{"filePath": a}]}, [])
+    assert list(index.get_probes("/lib")) == [a]
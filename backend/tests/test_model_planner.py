@@ -0,0 +1,97 @@
+"""'auto' engine: measured real-time factors and the per-file model choice."""
+from concurrent.futures import Future
+
+import pytest
+
+from core import model_planner
+from core.model_planner import PRIOR_RTF, BatchPlanner, RtfStore
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(model_planner.time, "time", clock.time)
+    return clock
+
+def probed(duration):
+    future = Future()
+    future.set_result(type("Media", (), {"duration": duration})())
+    return future
+
+def test_short_runs_are_not_recorded(tmp_path):
+    store = RtfStore(str(tmp_path / "rtf.json"))
+    assert store.record("small", "accurate", audio_seconds=29, elapsed=10) is None
+    assert store.record("small", "accurate", audio_seconds=600, elapsed=0) is None
+    assert store.stats() == {}
+
+def test_rtf_is_an_exponential_moving_average(tmp_path):
+    store = RtfStore(str(tmp_path / "rtf.json"), alpha=0.3)
+    assert store.record("small", "accurate", 100, 20) == 0.2
+    store.record("small", "accurate", 100, 40)
+    rtf, measured = store.get("small", "accurate")
+    assert measured and rtf == pytest.approx(0.2 + 0.3 * (0.4 - 0.2))
+    assert store.stats()["small|accurate"]["samples"] == 2
+    # Persisted and read back by the next process
+    assert RtfStore(str(tmp_path / "rtf.json")).get("small", "accurate") == (rtf, True)
+
+def test_unmeasured_models_use_priors_scaled_to_this_host(tmp_path):
+    store = RtfStore(str(tmp_path / "rtf.json"))
+    assert store.get("medium", "accurate") == (PRIOR_RTF["medium"], False)
+    # This host ran 'small' at half the prior: everything else is expected twice as fast too
+    store.record("small", "accurate", 1000, 1000 * PRIOR_RTF["small"] / 2)
+    rtf, measured = store.get("medium", "accurate")
+    assert not measured and rtf == pytest.approx(PRIOR_RTF["medium"] / 2)
+    # Worker count and profile have their own keys
+    assert store.get("small", "accurate", workers=4)[1] is False
+    assert store.get("small", "fast")[1] is False
+
+def store_with(tmp_path, rtfs):
+    store = RtfStore(str(tmp_path / "rtf.json"))
+    for model, rtf in rtfs.items():
+        store.record(model, "accurate", 1000, 1000 * rtf)
+    return store
+
+RTFS = {"tiny": 0.05, "base": 0.1, "small": 0.2, "medium": 0.5, "large-v3": 1.0}
+
+def test_without_deadline_the_largest_model_under_the_target(tmp_path, clock):
+    planner = BatchPlanner(store_with(tmp_path, RTFS), "accurate", max_rtf=0.3)
+    plan = planner.choose("a", 600)
+    assert plan["model"] == "small"
+    assert plan["predictedSeconds"] == 120
+    assert plan["deadlineAt"] is None
+
+def test_deadline_picks_the_largest_model_that_fits(tmp_path, clock):
+    planner = BatchPlanner(store_with(tmp_path, RTFS), "accurate", deadline_seconds=3600)
+    for fid in ("a", "b", "c"):
+        planner.add(fid, probed(3600))
+    # 3 h of audio in 1 h: only RTF <= 0.33 fits
+    assert planner.choose("a", 3600)["model"] == "small"
+
+def test_replans_as_the_batch_gets_ahead_or_behind(tmp_path, clock):
+    planner = BatchPlanner(store_with(tmp_path, RTFS), "accurate", deadline_seconds=3600)
+    for fid in ("a", "b", "c"):
+        planner.add(fid, probed(1800))
+    # 90 min of audio in 60 min
+    first = planner.choose("a", 1800)
+    assert first["model"] == "medium"
+
+    # 'a' took far longer than predicted: 10 min left for the remaining hour of audio
+    clock.now += 50 * 60
+    planner.finish("a")
+    assert planner.choose("b", 1800)["model"] == "base"
+
+def test_unprobed_files_count_as_typical(tmp_path, clock):
+    planner = BatchPlanner(store_with(tmp_path, RTFS), "accurate", deadline_seconds=3600)
+    planner.add("a", probed(600))
+    planner.add("b", Future())
+    planner.add("c", probed(1200))
+    # 'b' counts as the mean of the probed ones (15 min): 10 + 15 + 20 = 45 min in 60
+    assert planner.choose("a", 600)["model"] == "large-v3"
+    planner.drop("c")
+    assert "c" not in planner.waiting
@@ -0,0 +1,102 @@
+"""ChunkedTranscriber: stitching chunk results, and pool hand-over between models."""
+from concurrent.futures import Future
+
+import numpy as np
+
+from core import parallel_transcribe
+from core.parallel_transcribe import SAMPLE_RATE, ChunkedTranscriber, stitch_segments
+
+def seg(start, end, text):
+    return {"start": start, "end": end, "text": text}
+
+def test_stitch_orders_chunks_and_offsets_times():
+    merged = stitch_segments([
+        (60.0, 30.0, [seg(1.0, 2.0, "second")]),
+        (0.0, 30.0, [seg(0.5, 1.5, "first")]),
+    ])
+    assert merged == [seg(0.5, 1.5, "first"), seg(61.0, 62.0, "second")]
+
+def test_stitch_clamps_past_chunk_end():
+    merged = stitch_segments([(10.0, 5.0, [seg(4.0, 9.0, "runs over")])])
+    assert merged == [seg(14.0, 15.0, "runs over")]
+
+def test_stitch_squeezes_overlaps():
+    merged = stitch_segments([(0.0, 10.0, [seg(0.0, 3.0, "a"), seg(2.0, 5.0, "b")])])
+    assert merged == [seg(0.0, 3.0, "a"), seg(3.0, 5.0, "b")]
+
+def test_stitch_folds_squeezed_segments_into_previous():
+    merged = stitch_segments([(0.0, 10.0, [seg(0.0, 4.0, "hello"), seg(1.0, 3.0, "hello"), seg(2.0, 4.0, "there")])])
+    # A repeat of the same text is dropped; other words join the cue that swallowed them
+    assert merged == [seg(0.0, 4.0, "hello there")]
+
+class FakePool:
+    def __init__(self, **kwargs):
+        self.model = kwargs["initargs"][0]
+        self.stopped = False
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.stopped = True
+
+def test_switching_models_waits_for_the_last_user(monkeypatch):
+    monkeypatch.setattr(parallel_transcribe, "ProcessPoolExecutor", FakePool)
+    chunked = ChunkedTranscriber(workers=2, cpu_threads=2, chunk_seconds=30)
+
+    with chunked.lease("small") as small:
+        with chunked.lease("medium") as medium:
+            # The job on "small" is still running: its pool must stay up
+            assert not small.stopped
+            assert chunked.pool is medium
+        assert not medium.stopped
+        assert not small.stopped
+    assert small.stopped
+    assert not medium.stopped
+
+    chunked.shutdown()
+    assert medium.stopped and chunked.pool is None
+
+def test_unused_pool_stops_on_switch(monkeypatch):
+    monkeypatch.setattr(parallel_transcribe, "ProcessPoolExecutor", FakePool)
+    chunked = ChunkedTranscriber(workers=2, cpu_threads=2, chunk_seconds=30)
+    with chunked.lease("small") as small:
+        pass
+    with chunked.lease("small") as same:
+        assert same is small
+    with chunked.lease("base"):
+        assert small.stopped
+
+class OutOfOrderPool:
+    """Each odd chunk finishes as it is submitted, then the even one before it: 1, 0, 3, 2..."""
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, fn, samples, prompt, decoding):
+        future = Future()
+        self.futures.append((future, fn(samples, prompt, decoding)))
+        if len(self.futures) % 2 == 0:
+            for done, result in reversed(self.futures[-2:]):
+                done.set_result(result)
+        return future
+
+def test_segments_are_emitted_in_order_as_the_prefix_completes(monkeypatch):
+    # Each chunk is one second of audio and yields one segment naming it
+    monkeypatch.setattr(parallel_transcribe, "_transcribe_chunk", lambda samples, prompt, decoding: [
+        {"start": 0.1, "end": 0.9, "text": f"chunk {int(samples[0])}"}
+    ])
+    chunked = ChunkedTranscriber(workers=1, cpu_threads=1, chunk_seconds=30)
+    chunked.split = lambda windows: iter(windows)
+    windows = [(n * 10.0, np.full(SAMPLE_RATE, n, dtype=np.float32)) for n in range(6)]
+    pool = OutOfOrderPool()
+    chunks_done = []
+    emitted = []
+
+    def on_chunk(done, submitted, decoded):
+        chunks_done.append(done)
+
+    merged = chunked._run(pool, windows, None, {}, on_chunk, emitted.append)
+
+    assert [s["text"] for s in merged] == [f"chunk {n}" for n in range(6)]
+    assert merged[1]["start"] == 10.1
+    # Several emissions, each continuing the previous one, together the whole result
+    assert len(emitted) > 1
+    assert [s for batch in emitted for s in batch] == merged
+    assert chunks_done == list(range(1, 7))
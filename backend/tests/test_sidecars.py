@@ -0,0 +1,64 @@
+"""SidecarIndex: matching subtitle files to videos, and picking the best one."""
+from core.sidecars import SidecarIndex, normalize_language
+
+def index(*names, subs=()):
+    listings = {"/films": list(names)}
+    if subs:
+        listings["/films/Subs"] = list(subs)
+    videos = [n for n in names if n.endswith((".mkv", ".mp4"))]
+    return SidecarIndex(listings, videos)
+
+def paths(tracks):
+    return [t["path"] for t in tracks]
+
+def test_episode_1_does_not_match_episode_10():
+    idx = index("Episode 1.mkv", "Episode 10.mkv", "Episode 1.en.srt", "Episode 10.fr.srt")
+    assert paths(idx.lookup("Episode 1.mkv")) == ["/films/Episode 1.en.srt"]
+    assert paths(idx.lookup("Episode 10.mkv")) == ["/films/Episode 10.fr.srt"]
+
+def test_prefix_match_goes_to_longest_video_stem():
+    idx = index("Show.mkv", "Show.S01E01.mkv", "Show.S01E01.1080p.srt")
+    assert paths(idx.lookup("Show.S01E01.mkv")) == ["/films/Show.S01E01.1080p.srt"]
+    assert idx.lookup("Show.mkv") == []
+
+def test_sidecar_folder_is_indexed():
+    idx = index("Movie.mkv", subs=["Movie.eng.srt"])
+    (track,) = idx.lookup("Movie.mkv")
+    assert track["path"] == "/films/Subs/Movie.eng.srt"
+    assert track["language"] == "en"
+
+def test_flag_tags():
+    idx = index("Movie.mkv", "Movie.en.forced.srt", "Movie.fr.sdh.srt", "Movie.hi.srt")
+    tracks = {t["path"]: t for t in idx.lookup("Movie.mkv")}
+    forced = tracks["/films/Movie.en.forced.srt"]
+    assert (forced["language"], forced["forced"], forced["sdh"], forced["exact"]) == ("en", True, False, True)
+    assert tracks["/films/Movie.fr.sdh.srt"]["sdh"]
+    # 'hi' is read as hearing-impaired, not Hindi
+    hearing = tracks["/films/Movie.hi.srt"]
+    assert hearing["sdh"] and hearing["language"] is None
+
+def test_unknown_two_letter_tags_are_not_languages():
+    idx = index("Movie.mkv", "Movie.hd.srt", "Movie.x2.srt")
+    tracks = idx.lookup("Movie.mkv")
+    assert [t["language"] for t in tracks] == [None, None]
+    # Not language or flag tags: the names carry extra release info
+    assert not any(t["exact"] for t in tracks)
+
+def test_best_prefers_language_then_full_srt():
+    idx = index("Movie.mkv", "Movie.en.forced.srt", "Movie.en.vtt", "Movie.en.srt", "Movie.fr.srt")
+    assert idx.best("Movie.mkv", "eng")["path"] == "/films/Movie.en.srt"
+    assert idx.best("Movie.mkv", "fr")["path"] == "/films/Movie.fr.srt"
+    assert idx.best("Movie.mkv", "en", formats=("vtt",))["path"] == "/films/Movie.en.vtt"
+
+def test_best_skips_target_languages():
+    # Movie.fr.srt is the translation an earlier run wrote: never use it as the source
+    idx = index("Movie.mkv", "Movie.fr.srt", "Movie.de.srt")
+    assert idx.best("Movie.mkv", exclude_languages=["fr"])["path"] == "/films/Movie.de.srt"
+    assert idx.best("Movie.mkv", "fr", exclude_languages=["French", "deu"]) is None
+
+def test_normalize_language():
+    assert normalize_language("English") == "en"
+    assert normalize_language("fre") == "fr"
+    assert normalize_language(" EN ") == "en"
+    assert normalize_language("und") is None
+    assert normalize_language("") is None
@@ -0,0 +1,44 @@
+"""SubtitleProcessor: embedded text track selection and extraction clean-up."""
+import os
+import subprocess
+
+import pytest
+
+from core.media_info import MediaInfo
+from core.subtitle_processor import SubtitleProcessor
+
+def stream(index, language, codec="subrip", forced=False):
+    return {"index": index, "type": "subtitle", "codec": codec, "language": language, "forced": forced}
+
+MEDIA = MediaInfo("/films/Movie.mkv", 1, 1, 60.0, [
+    {"index": 0, "type": "video", "codec": "h264", "language": "und", "forced": False},
+    stream(2, "eng", forced=True),
+    stream(3, "eng", codec="ass"),
+    stream(4, "fre"),
+    stream(5, "ger", codec="hdmv_pgs_subtitle"),
+])
+
+def test_best_embedded_track_prefers_language_then_full_subrip():
+    assert SubtitleProcessor.best_embedded_track(MEDIA, "en")["index"] == 3
+    assert SubtitleProcessor.best_embedded_track(MEDIA, "fr")["index"] == 4
+    # Bitmap tracks are never candidates
+    assert SubtitleProcessor.best_embedded_track(MEDIA, "de")["index"] == 4
+
+def test_best_embedded_track_skips_target_languages():
+    # 'fre' is the track an earlier run muxed in
+    assert SubtitleProcessor.best_embedded_track(MEDIA, "fr", exclude_languages=["fr"])["index"] == 3
+    assert SubtitleProcessor.best_embedded_track(MEDIA, exclude_languages=["English", "fra"]) is None
+
+def open_fds():
+    return set(os.listdir("/proc/self/fd"))
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc")
+def test_failed_extraction_closes_every_pipe(monkeypatch):
+    def no_ffmpeg(*args, **kwargs):
+        raise FileNotFoundError("ffmpeg")
+
+    monkeypatch.setattr(subprocess, "Popen", no_ffmpeg)
+    before = open_fds()
+    with pytest.raises(FileNotFoundError):
+        SubtitleProcessor().extract_text_tracks("/films/Movie.mkv", [stream(3, "eng"), stream(4, "fre")])
+    assert open_fds() == before
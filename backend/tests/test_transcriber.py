@@ -0,0 +1,31 @@
+"""VideoTranscriber: failures of the legacy WAV extraction surface as errors."""
+import ffmpeg
+import pytest
+
+from core import transcriber as transcriber_module
+from core.transcriber import VideoTranscriber
+
+class FailingStream:
+    """ffmpeg-python chain whose run() fails the way a corrupt input does, after a partial write."""
+    def __init__(self, audio_path=None):
+        self.audio_path = audio_path
+
+    def output(self, path, **kwargs):
+        return FailingStream(path)
+
+    def overwrite_output(self):
+        return self
+
+    def run(self, **kwargs):
+        with open(self.audio_path, "wb") as f:
+            f.write(b"RIFF")
+        raise ffmpeg.Error("ffmpeg", b"", b"[matroska] EBML header parsing failed\nInvalid data found when processing input\n")
+
+def test_extract_audio_raises_and_removes_the_partial_wav(tmp_path, monkeypatch):
+    monkeypatch.setattr(transcriber_module.ffmpeg, "input", lambda path: FailingStream())
+    video = tmp_path / "broken.mkv"
+    video.write_bytes(b"\0" * 16)
+
+    with pytest.raises(Exception, match="Invalid data found when processing input"):
+        VideoTranscriber().extract_audio(str(video))
+    assert not (tmp_path / "broken.tmp.wav").exists()
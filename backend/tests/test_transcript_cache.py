@@ -0,0 +1,77 @@
+"""TranscriptCache: content fingerprints, keys and LRU eviction."""
+import os
+import time
+
+from core import transcript_cache
+from core.transcript_cache import TranscriptCache, fingerprint_file
+
+SEGMENTS = [{"start": 0.0, "end": 1.5, "text": "Hello."}, {"start": 2.0, "end": 3.0, "text": "Bye."}]
+
+def test_fingerprint_follows_content_not_name(tmp_path):
+    a = tmp_path / "a.mkv"
+    a.write_bytes(b"abc" * 1000)
+    moved = tmp_path / "renamed.mkv"
+    moved.write_bytes(b"abc" * 1000)
+    other = tmp_path / "other.mkv"
+    other.write_bytes(b"abd" * 1000)
+    assert fingerprint_file(str(a)) == fingerprint_file(str(moved))
+    assert fingerprint_file(str(a)) != fingerprint_file(str(other))
+
+def test_fingerprint_samples_head_middle_and_tail(tmp_path, monkeypatch):
+    monkeypatch.setattr(transcript_cache, "SAMPLE_BYTES", 16)
+    path = tmp_path / "big.mkv"
+    data = bytearray(b"\0" * 1000)
+    path.write_bytes(bytes(data))
+    before = fingerprint_file(str(path))
+    # A change between the samples goes unnoticed; one inside the middle sample does not
+    data[200] = 1
+    path.write_bytes(bytes(data))
+    assert fingerprint_file(str(path)) == before
+    data[500] = 1
+    path.write_bytes(bytes(data))
+    assert fingerprint_file(str(path)) != before
+
+def test_key_covers_model_decoding_and_prompt(tmp_path):
+    cache = TranscriptCache(str(tmp_path))
+    key = cache.make_key("fp", "small", {"beam_size": 5}, "bible")
+    assert key == cache.make_key("fp", "small", {"beam_size": 5}, "bible")
+    assert key != cache.make_key("fp", "medium", {"beam_size": 5}, "bible")
+    assert key != cache.make_key("fp", "small", {"beam_size": 1}, "bible")
+    assert key != cache.make_key("fp", "small", {"beam_size": 5}, None)
+
+def test_round_trip_and_hit_rate(tmp_path):
+    cache = TranscriptCache(str(tmp_path))
+    assert cache.get("missing") is None
+    cache.put("k", SEGMENTS, "small")
+    assert cache.get("k") == SEGMENTS
+    # A new instance finds the entries already on disk
+    again = TranscriptCache(str(tmp_path))
+    assert again.get("k") == SEGMENTS
+    assert again.stats()["entries"] == 1
+    assert cache.stats()["hitRate"] == 0.5
+
+def test_least_recently_used_is_evicted_first(tmp_path):
+    cache = TranscriptCache(str(tmp_path), max_bytes=10_000)
+    cache.put("old", SEGMENTS, "small")
+    cache.put("used", SEGMENTS, "small")
+    entry = os.path.getsize(tmp_path / "old.json")
+    # Room for two entries; sizes vary by a byte or two with the 'created' timestamp
+    cache.max_bytes = 2 * entry + entry // 2
+
+    past = time.time() - 100
+    os.utime(tmp_path / "old.json", (past, past))
+    os.utime(tmp_path / "used.json", (past - 50, past - 50))
+    # Reading 'used' makes it the most recent
+    assert cache.get("used") == SEGMENTS
+
+    cache.put("new", SEGMENTS, "small")
+    assert cache.get("old") is None
+    assert cache.get("used") == SEGMENTS
+    assert cache.get("new") == SEGMENTS
+    assert cache.evictions == 1
+
+def test_context_profiles_are_kept_by_fingerprint(tmp_path):
+    cache = TranscriptCache(str(tmp_path))
+    assert cache.get_context("fp") is None
+    cache.put_context("fp", "A story bible.")
+    assert cache.get_context("fp") == "A story bible."
@@ -0,0 +1,38 @@
+"""TranslationMemory: lookups by normalized text, language and profile, and LRU eviction."""
+import time
+
+from core.translation_memory import TranslationMemory, normalize_cue, profile_hash
+
+def test_normalize_cue_ignores_wrapping():
+    assert normalize_cue("  Hello,\nhow are   you?") == "Hello, how are you?"
+
+def test_profile_hash_changes_with_any_part():
+    assert profile_hash("gpt", "bible", True) == profile_hash("gpt", "bible", True)
+    assert profile_hash("gpt", "bible", True) != profile_hash("gpt", "bible", False)
+
+def test_lookup_is_scoped_by_language_and_profile(tmp_path):
+    memory = TranslationMemory(str(tmp_path / "tm.sqlite3"))
+    memory.store_many([("Hello.", "Bonjour."), ("Run!", "Cours !")], "fr", "p1")
+    assert memory.lookup_many(["Hello.", "Run!", "Bye."], "fr", "p1") == {"Hello.": "Bonjour.", "Run!": "Cours !"}
+    assert memory.lookup_many(["Hello."], "de", "p1") == {}
+    assert memory.lookup_many(["Hello."], "fr", "p2") == {}
+    stats = memory.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (2, 3, 2)
+
+def test_survives_a_restart(tmp_path):
+    TranslationMemory(str(tmp_path / "tm.sqlite3")).store_many([("Hello.", "Hallo.")], "de", "p")
+    assert TranslationMemory(str(tmp_path / "tm.sqlite3")).lookup_many(["Hello."], "de", "p") == {"Hello.": "Hallo."}
+
+def test_least_recently_used_rows_are_evicted(tmp_path, monkeypatch):
+    memory = TranslationMemory(str(tmp_path / "tm.sqlite3"), max_entries=2)
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    memory.store_many([("a", "A")], "fr", "p")
+    now[0] += 1
+    memory.store_many([("b", "B")], "fr", "p")
+    now[0] += 1
+    # Using 'a' makes 'b' the oldest
+    memory.lookup_many(["a"], "fr", "p")
+    now[0] += 1
+    memory.store_many([("c", "C")], "fr", "p")
+    assert memory.lookup_many(["a", "b", "c"], "fr", "p") == {"a": "A", "c": "C"}
@@ -0,0 +1,225 @@
+"""
+SubtitleTranslator against a fake OpenAI server: an httpx.MockTransport answers the
+chat completions the real AsyncOpenAI client sends, so the whole wire path is exercised.
+"""
+import asyncio
+import json
+import re
+
+import httpx
+import numpy as np
+from openai import AsyncOpenAI
+
+from core import rate_limit
+from core.cue_stream import CueStream
+from core.cues import CueList
+from core.rate_limit import RateLimiter, TokenBucket
+from core.translation_memory import TranslationMemory
+from core.translator import SubtitleTranslator
+
+class FakeLLM:
+    """Records every request; `replies` are consumed in order, then every cue is translated."""
+    def __init__(self, replies=()):
+        self.replies = list(replies)
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        payload = json.loads(body["messages"][1]["content"])
+        langs = re.findall(r'"(\w+)"', body["messages"][0]["content"].split("language codes", 1)[1].split("\n", 1)[0])
+        self.requests.append({"cues": payload["cues"], "langs": langs, "context": payload})
+        reply = self.replies.pop(0) if self.replies else None
+        if isinstance(reply, httpx.Response):
+            return reply
+        if reply is None:
+            reply = {lang: {i: f"[{lang}] {text}" for i, text in payload["cues"].items()} for lang in langs}
+        return httpx.Response(200, json={
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": json.dumps(reply)}}],
+            "usage": {"prompt_tokens": 50, "completion_tokens": 20, "total_tokens": 70}
+        })
+
+class Task:
+    is_aborted = False
+
+def make_translator(tmp_path, llm: FakeLLM) -> SubtitleTranslator:
+    translator = SubtitleTranslator(api_key="test")
+    translator.client = AsyncOpenAI(
+        api_key="test", max_retries=0, http_client=httpx.AsyncClient(transport=httpx.MockTransport(llm))
+    )
+    translator.memory = TranslationMemory(str(tmp_path / "tm.sqlite3"))
+    return translator
+
+def track(*texts):
+    n = len(texts)
+    return CueList(np.arange(n, dtype=np.int64) * 2000, np.arange(n, dtype=np.int64) * 2000 + 1500, list(texts))
+
+def translate(translator, cues, langs):
+    return asyncio.run(translator.translate_targets(
+        cues=cues, target_langs=langs, file_id="f1", on_progress=lambda *args: None,
+        task_manager=Task(), context_profile="A test film.", current_file=1, total_files=1
+    ))
+
+def test_multi_target_reply_in_one_request(tmp_path):
+    llm = FakeLLM()
+    translator = make_translator(tmp_path, llm)
+    result = translate(translator, track("Hello.", "Run!", "Hello."), ["fr", "de"])
+
+    assert len(llm.requests) == 1
+    assert llm.requests[0]["langs"] == ["fr", "de"]
+    # The repeated line is sent once and reused
+    assert llm.requests[0]["cues"] == {"1": "Hello.", "2": "Run!"}
+    assert result["fr"].texts == ["[fr] Hello.", "[fr] Run!", "[fr] Hello."]
+    assert result["de"].texts == ["[de] Hello.", "[de] Run!", "[de] Hello."]
+    assert result["fr"].starts.tolist() == [0, 2000, 4000]
+
+def test_broken_cues_are_re_requested(tmp_path):
+    # Cue 2 missing, cue 3 bloated with its neighbours: only those two go back
+    llm = FakeLLM(replies=[{"fr": {"1": "Bonjour.", "3": "Au revoir. " * 20}}])
+    translator = make_translator(tmp_path, llm)
+    result = translate(translator, track("Hello.", "Run!", "Goodbye."), ["fr"])
+
+    assert len(llm.requests) == 2
+    assert llm.requests[1]["cues"] == {"2": "Run!", "3": "Goodbye."}
+    assert translator.repaired_cues == 2
+    assert result["fr"].texts == ["Bonjour.", "[fr] Run!", "[fr] Goodbye."]
+
+def test_unrepaired_cues_keep_the_source_text(tmp_path):
+    llm = FakeLLM(replies=[{"fr": {"1": "Bonjour."}}] * 3)
+    translator = make_translator(tmp_path, llm)
+    result = translate(translator, track("Hello.", "Run!"), ["fr"])
+
+    assert len(llm.requests) == 1 + translator.repair_rounds
+    assert result["fr"].texts == ["Bonjour.", "Run!"]
+
+def test_429_honours_retry_after(tmp_path):
+    throttled = httpx.Response(429, headers={"retry-after-ms": "50"}, json={"error": {"message": "slow down"}})
+    llm = FakeLLM(replies=[throttled])
+    translator = make_translator(tmp_path, llm)
+    result = translate(translator, track("Hello."), ["fr"])
+
+    assert len(llm.requests) == 2
+    assert translator.limiter.throttled == 1
+    assert result["fr"].texts == ["[fr] Hello."]
+
+def test_second_run_is_served_from_memory(tmp_path):
+    llm = FakeLLM()
+    translator = make_translator(tmp_path, llm)
+    first = translate(translator, track("Hello.", "Run!"), ["fr"])
+    again = translate(translator, track("Hello.", "Run!  "), ["fr"])
+
+    assert len(llm.requests) == 1
+    assert again["fr"].texts == first["fr"].texts
+    report = translator.file_reports["f1|fr"]
+    assert report["servedLocally"] == 2 and report["sentToLlm"] == 0
+
+def stream_translate(translator, batches, ranges=None):
+    """Feeds `batches` of (start, text) one loop turn apart, then closes the stream."""
+    async def run():
+        stream = CueStream(asyncio.get_running_loop())
+        task = asyncio.create_task(translator.translate_stream(
+            stream, ["fr"], "f1", "A test film.", 1, 1, is_whisper_source=True, ranges=ranges
+        ))
+        for batch in batches:
+            stream.feed([{"start": start, "end": start + 1, "text": text} for start, text in batch])
+            for _ in range(5):
+                await asyncio.sleep(0)
+        stream.close()
+        return await task
+    return asyncio.run(run())
+
+def test_stream_in_gap_mode_only_sends_cues_inside_a_gap(tmp_path):
+    llm = FakeLLM()
+    translator = make_translator(tmp_path, llm)
+    cues = [(1.0, "Before."), (12.0, "Inside."), (19.5, "Also inside."), (20.0, "At the end."), (31.0, "Second gap.")]
+    prefetched = stream_translate(translator, [cues], ranges=[(10.0, 20.0), (30.0, 40.0)])
+
+    sent = [text for request in llm.requests for text in request["cues"].values()]
+    assert sent == ["Inside.", "Also inside.", "Second gap."]
+    assert set(prefetched["fr"]) == {"Inside.", "Also inside.", "Second gap."}
+
+def test_stream_looks_each_cue_up_once(tmp_path):
+    llm = FakeLLM()
+    translator = make_translator(tmp_path, llm)
+    translator.memory.store_many([("Line 0.", "Ligne 0.")], "fr", "other profile")
+    looked_up = []
+    lookup_many = translator.memory.lookup_many
+
+    def counting(sources, lang, profile):
+        looked_up.extend(sources)
+        return lookup_many(sources, lang, profile)
+
+    translator.memory.lookup_many = counting
+    rounds = [[(float(n), f"Line {n}.") for n in range(r * 4, r * 4 + 4)] for r in range(4)]
+    prefetched = stream_translate(translator, rounds)
+
+    assert sorted(looked_up) == sorted(f"Line {n}." for n in range(16))
+    assert len(prefetched["fr"]) == 16
+
+def test_validate_cues():
+    sources = {"1": "Hi.", "2": "Yes.", "3": "No.", "4": "Why?"}
+    asked = ["1", "2", "3", "4"]
+    # 2 is empty, 3 and 1 come back swapped, 4 is far too long
+    reply = {"3": "Non.", "1": "Salut.", "2": " ", "4": "Pourquoi ? " * 20}
+    good, broken = SubtitleTranslator._validate_cues(sources, asked, reply)
+    assert good == {"3": "Non."}
+    assert broken == ["1", "2", "4"]
+    assert SubtitleTranslator._validate_cues(sources, asked, "not a dict") == ({}, asked)
+
+def test_plan_batches_by_token_budget(tmp_path):
+    translator = make_translator(tmp_path, FakeLLM())
+    translator.batch_input_tokens = 30
+    translator.batch_output_tokens = 1000
+    translator.batch_max_cues = 10
+    # 40 chars = 10 tokens, plus 3 per cue: two cues fit in 30 tokens, a third does not
+    cues = [(i, "x" * 40) for i in range(5)]
+    assert [len(b) for b in translator._plan_batches(cues, 1)] == [2, 2, 1]
+    # Four languages: the output budget (13 x 4 per cue) now allows only one cue per 60 tokens
+    translator.batch_output_tokens = 60
+    assert [len(b) for b in translator._plan_batches(cues, 4)] == [1, 1, 1, 1, 1]
+    translator.batch_output_tokens = 1000
+    translator.batch_max_cues = 1
+    assert len(translator._plan_batches(cues, 1)) == 5
+
+def test_retry_after():
+    assert SubtitleTranslator._retry_after(httpx.Response(429, headers={"retry-after-ms": "1500"})) == 1.5
+    assert SubtitleTranslator._retry_after(httpx.Response(429, headers={"retry-after": "7"})) == 7.0
+    assert SubtitleTranslator._retry_after(httpx.Response(429, headers={"retry-after": "Wed, 21 Oct 2015"})) is None
+    assert SubtitleTranslator._retry_after(httpx.Response(429)) is None
+    assert SubtitleTranslator._retry_after(None) is None
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+def test_token_bucket_accounting(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock.monotonic)
+    bucket = TokenBucket(per_minute=600)  # 10 per second, capacity 600
+    assert bucket.wait_time(600) == 0.0
+    bucket.consume(650)
+    # 50 in debt: 100 more take 15 s
+    assert bucket.wait_time(100) == 15.0
+    clock.now += 15
+    assert bucket.wait_time(100) == 0.0
+    # Larger than the bucket: only waits for a full bucket
+    assert bucket.wait_time(5000) == (600 - 100) / 10
+    # Over-estimates are handed back, never above capacity
+    bucket.consume(-10_000)
+    assert bucket.level == 600
+
+def test_rate_limiter_settles_to_actual_usage(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock.monotonic)
+    limiter = RateLimiter(rpm=60, tpm=1000)
+    asyncio.run(limiter.acquire(300))
+    assert limiter.tokens.level == 700
+    limiter.settle(300, 100)
+    assert limiter.tokens.level == 900
+    assert limiter.requests.level == 59
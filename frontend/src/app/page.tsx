@@ -6,7 +6,7 @@ import GlobalProgress from '@/components/dashboard/GlobalProgress';
 import VideoList from '@/components/dashboard/VideoList';
 import { api } from '@/lib/api';
 import { VideoFile, GlobalSettings, StudioState } from '@/lib/types';
-import { createSSEConnection, SSEEvent } from '@/lib/sse';
+import { createTopicStream, libraryHandler, LibraryChange, SSEEvent, TopicStream } from '@/lib/sse';
 import { Terminal, Bug, X } from 'lucide-react';
 
 // --- CONTEXT ---
@@ -21,6 +21,50 @@ export const useStudio = () => {
   return context;
 };
 
+// --- TREE HELPERS ---
+
+/** Scanner item -> UI item, seeded with the current global settings. */
+const toVideoFile = (f: any, settings: GlobalSettings): VideoFile => ({
+  ...f,
+  id: f.filePath,
+  status: f.is_directory ? 'folder' : 'idle',
+  progress: 0,
+  sourceLang: settings.sourceLang,
+  targetLanguages: settings.targetLanguages,
+  workflowMode: settings.workflowMode,
+  stripExistingSubs: settings.stripExistingSubs,
+  selectedSrtPath: null, // Initialized as null
+  children: f.is_directory ? (f.children || []).map((c: any) => toVideoFile(c, settings)) : null,
+  // Browsed folders arrive empty with only their counts; their page loads on open
+  loaded: f.is_directory ? (f.children || []).length > 0 : undefined
+});
+
+/** Same order as the backend: folders first, then by name. */
+const sortItems = (list: VideoFile[]) => [...list].sort((a, b) =>
+  Number(a.is_directory === false) - Number(b.is_directory === false) ||
+  a.fileName.toLowerCase().localeCompare(b.fileName.toLowerCase())
+);
+
+/**
+ * Applies one folder's library deltas to its children. On 'change' only what the
+ * disk knows (subtitle badge, extension) is refreshed; the item's UI state is kept.
+ */
+const patchChildren = (list: VideoFile[], changes: LibraryChange[], settings: GlobalSettings): VideoFile[] => {
+  const byPath = new Map(changes.map(c => [c.path, c]));
+  const kept = list
+    .filter(item => byPath.get(item.filePath)?.op !== 'remove')
+    .map(item => {
+      const change = byPath.get(item.filePath);
+      if (change?.op !== 'change' || !change.item) return item;
+      return { ...item, subtitleInfo: change.item.subtitleInfo, extension: change.item.extension ?? item.extension, metaPending: false };
+    });
+  const known = new Set(kept.map(item => item.filePath));
+  const added = changes
+    .filter(c => c.op === 'add' && c.item && !known.has(c.path))
+    .map(c => toVideoFile(c.item, settings));
+  return added.length ? sortItems([...kept, ...added]) : kept;
+};
+
 // --- DEBUGGER ---
 function AppStatusDebugger() {
   const { state } = useStudio();
@@ -77,7 +121,9 @@ function DashboardContent() {
 // --- ROOT PAGE ---
 export default function DashboardPage() {
   const [mounted, setMounted] = useState(false);
-  const activeListeners = useRef<Record<string, EventSource>>({});
+  // One shared event stream: library deltas plus every file this tab is processing
+  const eventStream = useRef<TopicStream | null>(null);
+  const trackedFiles = useRef<Set<string>>(new Set());
   const hasInitialScanned = useRef(false);
 
   const [state, setState] = useState<StudioState>({
@@ -86,11 +132,14 @@ export default function DashboardPage() {
     logs: {},
     isScanning: false,
     currentPath: "/data",
+    nextCursor: null,
     settings: {
       sourceLang: ['auto'],
       targetLanguages: ['fr'], 
       workflowMode: 'whisper', // 'hybrid', 'whisper', 
       modelSize: 'medium',
+      deadlineMinutes: 0,
+      decodingProfile: 'balanced',
       autoGenerate: true,
       shouldMux: true,
       shouldRemoveOriginal: false,
@@ -112,28 +161,19 @@ export default function DashboardPage() {
     });
   }, []);
 
-  // 2. STABLE SCAN ACTION
+  // 2. STABLE SCAN ACTION: first page of the folder only; sub-folders load when opened
   const performScan = useCallback(async (path: string) => {
     if (state.isScanning) return; 
 
     setState(prev => ({ ...prev, isScanning: true }));
     try {
-      const data = await api.scanFolder(path);
-      setState(prev => {
-        const process = (files: any[]): VideoFile[] => files.map(f => ({
-          ...f, 
-          id: f.filePath, 
-          status: f.is_directory ? 'folder' : 'idle', 
-          progress: 0,
-          sourceLang: prev.settings.sourceLang,
-          targetLanguages: prev.settings.targetLanguages,
-          workflowMode: prev.settings.workflowMode,
-          stripExistingSubs: prev.settings.stripExistingSubs,
-          selectedSrtPath: null, // Initialized as null
-          children: f.is_directory ? process(f.children || []) : null
-        }));
-        return { ...prev, items: process(data.files || []), isScanning: false };
-      });
+      const page = await api.browseFolder(path);
+      setState(prev => ({
+        ...prev,
+        items: (page.items || []).map((f: any) => toVideoFile(f, prev.settings)),
+        nextCursor: page.nextCursor,
+        isScanning: false
+      }));
     } catch (e) {
       console.error("Scan Failed:", e);
       setState(prev => ({ ...prev, isScanning: false }));
@@ -141,28 +181,61 @@ export default function DashboardPage() {
   }, [state.isScanning]);
 
   // 3. SSE MANAGEMENT
+  const syncTopics = useCallback(() => {
+    eventStream.current?.setTopics(['library', ...Array.from(trackedFiles.current)]);
+  }, []);
+
   const subscribeToUpdates = useCallback((fileId: string) => {
-    if (activeListeners.current[fileId]) activeListeners.current[fileId].close();
+    trackedFiles.current.add(fileId);
+    syncTopics();
+  }, [syncTopics]);
 
-    // Ensure we URL-encode the fileId to avoid breaks in the connection
-    const encodedId = encodeURIComponent(fileId);
-    
-    const es = createSSEConnection(encodedId, (data: SSEEvent) => {
-      if (data.type === 'status') {
-        updateVideoInList(fileId, {
-          status: data.status,
-          progress: data.progress,
-          statusText: data.message 
-        });
-        if (['done', 'error', 'cancelled'].includes(data.status)) {
-          es.close();
-          delete activeListeners.current[fileId];
+  const handleFileEvent = useCallback((data: SSEEvent) => {
+    if (!trackedFiles.current.has(data.fileId)) return;
+    if (data.type === 'plan' && data.model) {
+      updateVideoInList(data.fileId, {
+        modelPlan: {
+          model: data.model,
+          predictedSeconds: data.predictedSeconds,
+          predictedFinishAt: data.predictedFinishAt,
+          actualSeconds: data.actualSeconds
         }
-      }
-    }, () => delete activeListeners.current[fileId]);
-    
-    activeListeners.current[fileId] = es;
-  }, [updateVideoInList]);
+      });
+      return;
+    }
+    if (data.type !== 'status') return;
+    updateVideoInList(data.fileId, {
+      status: data.status,
+      progress: data.progress,
+      statusText: data.message 
+    });
+    if (['done', 'error', 'cancelled'].includes(data.status || '')) {
+      trackedFiles.current.delete(data.fileId);
+      syncTopics();
+    }
+  }, [updateVideoInList, syncTopics]);
+
+  // Library deltas (watcher, badge fill-ins): patch the tree in place instead of rescanning
+  const applyLibraryChanges = useCallback((folder: string, changes: LibraryChange[]) => {
+    setState(prev => {
+      const walk = (list: VideoFile[]): VideoFile[] => list.map(item => {
+        if (!item.is_directory || !item.children) return item;
+        if (item.filePath === folder) {
+          // A folder never opened fetches its current listing when it is
+          if (item.loaded === false) return item;
+          return { ...item, children: patchChildren(item.children, changes, prev.settings) };
+        }
+        return { ...item, children: walk(item.children) };
+      });
+      const items = folder === prev.currentPath ? patchChildren(prev.items, changes, prev.settings) : walk(prev.items);
+
+      const removed = changes.filter(c => c.op === 'remove').map(c => c.path);
+      if (!removed.some(path => prev.selectedIds.has(path))) return { ...prev, items };
+      const selectedIds = new Set(prev.selectedIds);
+      removed.forEach(path => selectedIds.delete(path));
+      return { ...prev, items, selectedIds };
+    });
+  }, []);
 
   // 4. COMBINED ACTIONS
   const actions = useMemo(() => ({
@@ -191,6 +264,32 @@ export default function DashboardPage() {
 
     updateVideoData: (id: string, updates: Partial<VideoFile>) => updateVideoInList(id, updates),
 
+    /** Fetches a folder's first page (or the page after `cursor`) and puts it in the tree. */
+    loadFolder: async (folderPath: string, cursor?: string | null) => {
+      const isRoot = folderPath === state.currentPath;
+      if (!isRoot) updateVideoInList(folderPath, { isLoading: true });
+      try {
+        const page = await api.browseFolder(folderPath, cursor);
+        setState(prev => {
+          const fresh = (page.items || []).map((f: any) => toVideoFile(f, prev.settings));
+          if (isRoot) {
+            return { ...prev, items: cursor ? [...prev.items, ...fresh] : fresh, nextCursor: page.nextCursor };
+          }
+          const walk = (list: VideoFile[]): VideoFile[] => list.map(item => {
+            if (item.filePath === folderPath) {
+              const children = cursor ? [...(item.children || []), ...fresh] : fresh;
+              return { ...item, children, nextCursor: page.nextCursor, loaded: true, isLoading: false };
+            }
+            return item.children ? { ...item, children: walk(item.children) } : item;
+          });
+          return { ...prev, items: walk(prev.items) };
+        });
+      } catch (e) {
+        console.error("Browse Failed:", e);
+        if (!isRoot) updateVideoInList(folderPath, { isLoading: false });
+      }
+    },
+
     toggleSelection: (id: string, isDir: boolean, children?: any[]) => {
       setState(prev => {
         const next = new Set(prev.selectedIds);
@@ -223,6 +322,8 @@ export default function DashboardPage() {
         })),
         globalOptions: {
           transcriptionEngine: state.settings.modelSize,
+          deadlineMinutes: state.settings.modelSize === 'auto' ? state.settings.deadlineMinutes : undefined,
+          decodingProfile: state.settings.decodingProfile,
           generateSRT: state.settings.autoGenerate,
           muxIntoMkv: state.settings.shouldMux,
           cleanUp: state.settings.shouldRemoveOriginal
@@ -247,6 +348,19 @@ export default function DashboardPage() {
   }), [performScan, subscribeToUpdates, updateVideoInList, state.currentPath, state.settings]);
 
   // 5. LIFECYCLE
+  useEffect(() => {
+    const onLibrary = libraryHandler(applyLibraryChanges);
+    const stream = createTopicStream(['library', ...Array.from(trackedFiles.current)], (data) => {
+      if (data.type === 'library') onLibrary(data);
+      else handleFileEvent(data);
+    });
+    eventStream.current = stream;
+    return () => {
+      stream.close();
+      if (eventStream.current === stream) eventStream.current = null;
+    };
+  }, [applyLibraryChanges, handleFileEvent]);
+
   useEffect(() => {
     setMounted(true);
     if (!hasInitialScanned.current) {
@@ -254,9 +368,6 @@ export default function DashboardPage() {
       hasInitialScanned.current = true;
     }
 
-    return () => {
-      Object.values(activeListeners.current).forEach(es => es.close());
-    };
   }, [performScan]); 
 
   if (!mounted) return <div className="h-screen w-full bg-[#0a0a0a]" />;
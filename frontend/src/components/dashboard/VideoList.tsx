@@ -22,6 +22,7 @@ export default function VideoList({ videos, isNested = false }: VideoListProps)
       newExpanded.delete(item.id);
     } else {
       newExpanded.add(item.id);
+      if (item.loaded === false && !item.isLoading) actions.loadFolder(item.filePath);
     }
     setExpandedFolders(newExpanded);
   };
@@ -103,7 +104,9 @@ export default function VideoList({ videos, isNested = false }: VideoListProps)
                 </span>
 
                 <span className="text-[10px] font-mono text-gray-600 uppercase tabular-nums">
-                  {item.children?.length || 0} items
+                  {item.loaded === false && item.childCount
+                    ? item.childCount.folders + item.childCount.videos
+                    : item.children?.length || 0} items
                 </span>
               </div>
             ) : (
@@ -121,8 +124,23 @@ export default function VideoList({ videos, isNested = false }: VideoListProps)
             {/* --- RECURSIVE CHILD RENDER --- */}
             {item.is_directory && isExpanded && (
                <div className="ml-8 border-l border-white/10 pl-2 animate-in slide-in-from-top-2 duration-200">
-                  {item.children && item.children.length > 0 ? (
-                    <VideoList videos={item.children} isNested={true} />
+                  {item.isLoading && !item.children?.length ? (
+                    <div className="py-2 pl-10 flex items-center gap-2 text-[10px] text-gray-600 uppercase tracking-widest font-bold">
+                      <Loader2 size={12} className="animate-spin" /> Loading...
+                    </div>
+                  ) : item.children && item.children.length > 0 ? (
+                    <>
+                      <VideoList videos={item.children} isNested={true} />
+                      {item.nextCursor && (
+                        <button
+                          disabled={item.isLoading}
+                          onClick={() => actions.loadFolder(item.filePath, item.nextCursor)}
+                          className="py-2 pl-10 text-left text-[10px] text-indigo-400 hover:text-indigo-300 uppercase tracking-widest font-bold disabled:opacity-50"
+                        >
+                          Load more
+                        </button>
+                      )}
+                    </>
                   ) : (
                     <div className="py-2 pl-10 text-[10px] text-gray-600 uppercase tracking-widest font-bold">
                       Empty Folder
@@ -133,6 +151,14 @@ export default function VideoList({ videos, isNested = false }: VideoListProps)
           </div>
         );
       })}
+      {!isNested && state.nextCursor && (
+        <button
+          onClick={() => actions.loadFolder(state.currentPath, state.nextCursor)}
+          className="py-3 text-[10px] text-indigo-400 hover:text-indigo-300 uppercase tracking-widest font-bold"
+        >
+          Load more
+        </button>
+      )}
     </div>
   );
 }
\ No newline at end of file
@@ -111,6 +111,14 @@ export default function VideoCard({ video }: { video: any }) {
         <div className={`flex items-center gap-2 text-[10px] font-black uppercase tracking-widest ${getStatusColor(video.status)}`}>
           {isProcessing && <Loader2 size={12} className="animate-spin" />}
           {video.statusText || video.status}
+          {video.modelPlan && (
+            <span className="text-gray-500 normal-case tracking-normal font-mono">
+              [{video.modelPlan.model}{' '}
+              {video.modelPlan.actualSeconds != null
+                ? `${Math.round(video.modelPlan.actualSeconds / 60)} min, planned ${Math.round((video.modelPlan.predictedSeconds || 0) / 60)}`
+                : `ETA ${new Date((video.modelPlan.predictedFinishAt || 0) * 1000).toLocaleTimeString()}`}]
+            </span>
+          )}
         </div>
       </div>
 
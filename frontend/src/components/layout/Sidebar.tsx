@@ -168,12 +168,40 @@ export default function Sidebar() {
               onChange={(e) => actions.setSettings({ modelSize: e.target.value as any })}
               className="w-full bg-black/40 border border-white/10 p-2.5 rounded-lg text-xs font-mono outline-none focus:border-indigo-500 transition-colors cursor-pointer disabled:cursor-not-allowed"
             >
+              <option value="auto">Auto (largest that fits the deadline)</option>
               <option value="tiny">Tiny (Fastest)</option>
               <option value="base">Base (~1 GB)</option>
               <option value="small">Small (~2 GB)</option>
               <option value="medium">Medium (~5 GB)</option>
               <option value="large">Large-v3 (⚠ ~10 GB)</option>
             </select>
+            {settings.modelSize === 'auto' && (
+              <input
+                type="number"
+                min={0}
+                disabled={isAnyFileProcessing}
+                value={settings.deadlineMinutes || ''}
+                placeholder="Deadline in minutes (empty = keep up with real time)"
+                onChange={(e) => actions.setSettings({ deadlineMinutes: Number(e.target.value) || 0 })}
+                className="w-full bg-black/40 border border-white/10 p-2.5 rounded-lg text-xs font-mono outline-none focus:border-indigo-500 transition-colors disabled:cursor-not-allowed"
+              />
+            )}
+          </div>
+
+          <div className="space-y-2">
+            <label className="text-[10px] text-gray-500 font-bold uppercase flex items-center gap-2">
+              <Cpu size={12} /> Decoding Profile
+            </label>
+            <select 
+              disabled={isAnyFileProcessing}
+              value={settings.decodingProfile || 'balanced'}
+              onChange={(e) => actions.setSettings({ decodingProfile: e.target.value as any })}
+              className="w-full bg-black/40 border border-white/10 p-2.5 rounded-lg text-xs font-mono outline-none focus:border-indigo-500 transition-colors cursor-pointer disabled:cursor-not-allowed"
+            >
+              <option value="fast">Fast (greedy, skips silence)</option>
+              <option value="balanced">Balanced (beam 5, skips silence)</option>
+              <option value="accurate">Accurate (beam 5, word alignment)</option>
+            </select>
           </div>
 
           <div className="space-y-2">
@@ -186,7 +214,7 @@ export default function Sidebar() {
               onChange={(e) => actions.setSettings({ workflowMode: e.target.value as any })}
               className="w-full bg-black/40 border border-white/10 p-2.5 rounded-lg text-xs font-mono outline-none focus:border-indigo-500 transition-colors cursor-pointer disabled:cursor-not-allowed"
             >
-              <option value="hybrid">Hybrid: SRT if found else AI</option>
+              <option value="hybrid">Hybrid: SRT + AI for its gaps</option>
               <option value="whisper">Pure: AI Only</option>
               <option value="srt">Legacy: SRT Refining Only</option>
             </select>
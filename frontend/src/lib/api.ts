@@ -20,6 +20,27 @@ export const api = {
     return handleResponse(response, 'Failed to scan media library');
   },
 
+  /**
+   * 1b. One page of one folder (child folders unexpanded, with counts).
+   * Videos flagged 'metaPending' get their subtitle badge later through
+   * 'library' change events (see libraryHandler).
+   */
+  async browseFolder(path: string = "/data", cursor?: string | null, limit: number = 200, depth: number = 0) {
+    const params = new URLSearchParams({
+      path,
+      limit: String(limit),
+      depth: String(depth)
+    });
+    if (cursor) params.set('cursor', cursor);
+
+    const response = await fetch(`${API_BASE_URL}/api/browse?${params}`, {
+      method: 'GET',
+      headers: { 'Content-Type': 'application/json' },
+    });
+
+    return handleResponse(response, 'Failed to browse folder');
+  },
+
   /**
    * 2. Start Processing Job
    * Sends the unified payload (Sidebar globals + Card overrides)
@@ -87,4 +108,4 @@ async function handleResponse(response: Response, defaultError: string) {
 }
 
 // Named exports for convenience
-export const { uploadSubtitle, startJob, abortAll, cancelJob, scanFolder } = api;
\ No newline at end of file
+export const { uploadSubtitle, startJob, abortAll, cancelJob, scanFolder, browseFolder } = api;
\ No newline at end of file
@@ -1,5 +1,12 @@
+export type LibraryChange = {
+  op: 'add' | 'remove' | 'change';
+  path: string;
+  // Scanner item (folder or video) for add/change
+  item?: any;
+};
+
 export type SSEEvent = {
-  type: 'status' | 'log';
+  type: 'status' | 'log' | 'library' | 'gap' | 'plan';
   fileId: string;
   // Shared field: backend uses 'message' for both log text and status descriptions
   message: string; 
@@ -8,6 +15,20 @@ export type SSEEvent = {
   progress?: number;
   // Log-specific (Backend sends level as a string)
   level?: string;
+  // Library-specific: folder-level deltas pushed by the backend watcher
+  folder?: string;
+  changes?: LibraryChange[];
+  // Gap-specific: events fromId..toId for this fileId were evicted before we could get them
+  // (EventSource resends Last-Event-ID on reconnect, so anything still journaled is replayed)
+  fromId?: number;
+  toId?: number;
+  // Plan-specific ('auto' engine): model picked and predicted time, then the actual time once transcribed
+  model?: string;
+  predictedSeconds?: number | null;
+  predictedFinishAt?: number;
+  batchPredictedFinishAt?: number;
+  deadlineAt?: number | null;
+  actualSeconds?: number;
 };
 
 /**
@@ -55,4 +76,103 @@ export const createSSEConnection = (
   };
 
   return eventSource;
-};
\ No newline at end of file
+};
+
+/**
+ * Opens ONE multiplexed stream (/api/events) for many files at once.
+ * `topics` narrows it server-side (file ids, 'library', 'system_events'); null = everything,
+ * in which case callers filter on `fileId` themselves. `since` resumes after that event id
+ * (what EventSource does itself with Last-Event-ID when it reconnects on its own).
+ * onMessage also gets the frame's event id, when it has one.
+ */
+export const createMultiplexedConnection = (
+  topics: string[] | null,
+  onMessage: (data: SSEEvent, eventId?: number) => void,
+  onError?: (error: Event) => void,
+  since?: number | null
+) => {
+  const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000';
+  const params = new URLSearchParams();
+  (topics || []).forEach(topic => params.append('topic', topic));
+  if (since != null) params.append('since', String(since));
+  const query = params.toString();
+  const eventSource = new EventSource(`${API_BASE_URL}/api/events${query ? `?${query}` : ''}`);
+
+  eventSource.onmessage = (event) => {
+    try {
+      const data: SSEEvent = JSON.parse(event.data);
+      if (data && data.type) {
+        const eventId = parseInt(event.lastEventId, 10);
+        onMessage(data, Number.isNaN(eventId) ? undefined : eventId);
+      }
+    } catch (err) {
+      console.error("❌ SSE Parse Error:", err, "Raw data:", event.data);
+    }
+  };
+
+  eventSource.onerror = (error) => {
+    console.error("📡 SSE Connection Error (multiplexed):", error);
+    if (onError) onError(error);
+  };
+
+  return eventSource;
+};
+
+export type TopicStream = {
+  setTopics: (topics: string[]) => void;
+  close: () => void;
+};
+
+/**
+ * One multiplexed connection whose topic set can change. Changing it reopens the stream
+ * from the last event id received, so nothing emitted during the switch is lost.
+ * Changes made in the same tick (e.g. a batch of files starting) share one reconnect.
+ */
+export const createTopicStream = (
+  topics: string[],
+  onMessage: (data: SSEEvent) => void,
+  onError?: (error: Event) => void
+): TopicStream => {
+  let current = [...topics].sort();
+  let lastEventId: number | null = null;
+  let pending: ReturnType<typeof setTimeout> | null = null;
+  let source: EventSource | null = null;
+
+  const open = () => {
+    pending = null;
+    source?.close();
+    source = createMultiplexedConnection(current, (data, eventId) => {
+      if (eventId !== undefined) lastEventId = eventId;
+      onMessage(data);
+    }, onError, lastEventId);
+  };
+  open();
+
+  return {
+    setTopics: (next: string[]) => {
+      const sorted = Array.from(new Set(next)).sort();
+      if (sorted.join('\n') === current.join('\n')) return;
+      current = sorted;
+      if (pending === null) pending = setTimeout(open, 0);
+    },
+    close: () => {
+      if (pending !== null) clearTimeout(pending);
+      pending = null;
+      source?.close();
+      source = null;
+    }
+  };
+};
+
+/**
+ * Message handler for library deltas (files/folders added, removed or changed on disk),
+ * so the tree can be patched in place instead of re-scanned. Feed it the events of a
+ * stream that follows the 'library' topic.
+ */
+export const libraryHandler = (
+  onChanges: (folder: string, changes: LibraryChange[]) => void
+) => (data: SSEEvent) => {
+  if (data.type === 'library' && data.folder && data.changes) {
+    onChanges(data.folder, data.changes);
+  }
+};
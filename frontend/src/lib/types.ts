@@ -15,6 +15,14 @@ export type ProcessingStatus =
   | 'cancelled' 
   | 'folder';
 
+export interface ModelPlan {
+  model: string;
+  predictedSeconds?: number | null;
+  /** Epoch seconds */
+  predictedFinishAt?: number;
+  actualSeconds?: number;
+}
+
 export interface SubtitleInfo {
   hasSubtitles: boolean;
   subType: 'embedded' | 'external' | 'mixed' | null;
@@ -31,14 +39,24 @@ export interface VideoFile {
   is_directory: boolean;
   
   subtitleInfo?: SubtitleInfo;
+  /** Subtitle badge not known yet; it arrives later as a 'library' change event */
+  metaPending?: boolean;
   
   // UI State
   status: ProcessingStatus;
   progress: number;
   statusText?: string;
+  /** 'auto' engine: model picked for this file, predicted and (once transcribed) actual Whisper time */
+  modelPlan?: ModelPlan;
 
-  // Tree Structure
+  // Tree Structure (folders come from /api/browse unexpanded and load their page when opened)
   children?: VideoFile[] | null;
+  childCount?: { folders: number; videos: number };
+  /** False until the folder's first page has been fetched */
+  loaded?: boolean;
+  isLoading?: boolean;
+  /** Cursor of the folder's next page, null when complete */
+  nextCursor?: string | null;
 
   // Per-file settings (Overrides global settings)
   sourceLang?: string[];
@@ -56,7 +74,11 @@ export interface GlobalSettings {
   sourceLang: string[];
   targetLanguages: string[];
   workflowMode: 'hybrid' | 'whisper' | 'srt';
-  modelSize: 'tiny' | 'base' | 'small' | 'medium' | 'large';
+  modelSize: 'auto' | 'tiny' | 'base' | 'small' | 'medium' | 'large';
+  /** 'auto' engine only: minutes the batch's transcriptions should fit in (0 = no deadline) */
+  deadlineMinutes: number;
+  /** Whisper decoding profile: speed vs accuracy (see `python benchmark.py profiles`) */
+  decodingProfile: 'fast' | 'balanced' | 'accurate';
   autoGenerate: boolean;
   shouldMux: boolean;
   shouldRemoveOriginal: boolean;
@@ -70,6 +92,8 @@ export interface StudioState {
   logs: Record<string, string[]>;
   isScanning: boolean;
   currentPath: string;
+  /** Next page of the current folder (see browseFolder) */
+  nextCursor: string | null;
   settings: GlobalSettings;
 }
 
@@ -95,6 +119,8 @@ export interface ProcessRequest {
   }>;
   globalOptions: {
     transcriptionEngine: string;
+    deadlineMinutes?: number;
+    decodingProfile: string;
     generateSRT: boolean;
     muxIntoMkv: boolean;
     cleanUp: boolean;